@@ -1,106 +1,103 @@
-from rdflib import Graph, Namespace, URIRef
+from rdflib import Namespace, URIRef
 from rdflib.namespace import RDF, OWL, FOAF
-import requests
-import time
-import re
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from async_enrichment import enrich_resources
+from journal import Journal, journal_path, merge_journal
+from lookup_cache import shared_cache
+from snapshot import load_graph
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+INPUT_TTL = os.path.join(HERE, "..", "out.ttl")
+OUTPUT_TTL = os.path.join(HERE, "out_enriched.ttl")
 
 DBR = Namespace("http://dbpedia.org/resource/")
 DBO = Namespace("http://dbpedia.org/ontology/")
 WD = Namespace("http://www.wikidata.org/entity/")
 
-def check_dbpedia_exists(resource_name):
-    dbpedia_uri = f"http://dbpedia.org/resource/{resource_name}"
-    try:
-        r = requests.head(dbpedia_uri, timeout=10, allow_redirects=True)
-        return dbpedia_uri if r.status_code == 200 else None
-    except:
-        return None
-
-def get_wikidata_from_dbpedia_sparql(dbpedia_resource_name):
-    sparql_endpoint = "https://dbpedia.org/sparql"
-    
-    query = f"""
-    PREFIX owl: <http://www.w3.org/2002/07/owl#>
-    PREFIX dbr: <http://dbpedia.org/resource/>
-    
-    SELECT ?wikidata WHERE {{
-        dbr:{dbpedia_resource_name} owl:sameAs ?wikidata .
-        FILTER(STRSTARTS(STR(?wikidata), "http://www.wikidata.org/entity/"))
-    }}
-    LIMIT 1
-    """
-    
-    try:
-        r = requests.get(
-            sparql_endpoint,
-            params={'query': query, 'format': 'json'},
-            headers={'Accept': 'application/sparql-results+json'},
-            timeout=15
-        )
-        
-        if r.status_code == 200:
-            results = r.json()
-            bindings = results.get('results', {}).get('bindings', [])
-            if bindings:
-                return bindings[0]['wikidata']['value']
-        return None
-    except:
-        return None
-
-def get_wikidata_from_dbpedia_page(dbpedia_resource_name):
-    rdf_url = f"http://dbpedia.org/data/{dbpedia_resource_name}.ttl"
-    
-    try:
-        r = requests.get(rdf_url, timeout=15)
-        if r.status_code == 200:
-            temp_graph = Graph()
-            temp_graph.parse(data=r.text, format="turtle")
-            dbpedia_uri = URIRef(f"http://dbpedia.org/resource/{dbpedia_resource_name}")
-            
-            for _, _, o in temp_graph.triples((dbpedia_uri, OWL.sameAs, None)):
-                uri_str = str(o)
-                if "wikidata.org/entity/" in uri_str:
-                    return uri_str
-        return None
-    except:
-        return None
-
-def get_wikidata_combined(dbpedia_resource_name):
-    wikidata = get_wikidata_from_dbpedia_sparql(dbpedia_resource_name)
-    if wikidata:
-        return wikidata
-    wikidata = get_wikidata_from_dbpedia_page(dbpedia_resource_name)
-    return wikidata
+# Enrichissement concurrent (remplace les time.sleep fixes). DBPEDIA_BASE et
+# DBPEDIA_SPARQL permettent de viser un autre serveur (ex. mock_dbpedia.py).
+DBPEDIA_BASE = os.environ.get("DBPEDIA_BASE", "http://dbpedia.org")
+SPARQL_ENDPOINT = os.environ.get("DBPEDIA_SPARQL", "https://dbpedia.org/sparql")
+CONCURRENCY = 16
+RATE = 5.0  # requêtes / seconde au maximum vers DBpedia
+STEP = "persons"  # étape enregistrée dans le journal
 
 def format_name_for_dbpedia(given_name, family_name):
     full_name = f"{given_name}_{family_name}"
     return full_name.replace(" ", "_")
 
-g = Graph()
-g.parse("../out.ttl")
+def main():
+    parser = argparse.ArgumentParser(
+        description="Liens owl:sameAs DBpedia / Wikidata des personnes"
+    )
+    parser.add_argument("input", nargs="?", default=INPUT_TTL)
+    parser.add_argument("-o", "--output", default=OUTPUT_TTL)
+    parser.add_argument("--journal", help="journal de reprise (<sortie>.journal.tsv)")
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore le journal existant"
+    )
+    parser.add_argument("--dbpedia-base", default=DBPEDIA_BASE, metavar="URL")
+    parser.add_argument("--sparql-endpoint", default=SPARQL_ENDPOINT, metavar="URL")
+    args = parser.parse_args()
+    cache = shared_cache()
+
+    # snapshot binaire du converter s'il est à jour, sinon parsing du Turtle
+    g = load_graph(args.input)
+
+    persons = []
+    for s in g.subjects(RDF.type, FOAF.Person):
+        given = g.value(s, FOAF.givenName)
+        family = g.value(s, FOAF.familyName)
+        if given and family:
+            persons.append((s, str(given), str(family)))
 
-persons = []
-for s in g.subjects(RDF.type, FOAF.Person):
-    given = g.value(s, FOAF.givenName)
-    family = g.value(s, FOAF.familyName)
-    if given and family:
-        persons.append((s, str(given), str(family)))
+    # chaque personne traitée est écrite dans le journal : une exécution
+    # interrompue reprend là où elle s'était arrêtée
+    journal = Journal(
+        args.journal or journal_path(args.output), args.input, args.restart
+    )
+    by_name = {}
+    for person_uri, given_name, family_name in persons:
+        if journal.value(STEP, person_uri) is None:
+            dbpedia_name = format_name_for_dbpedia(given_name, family_name)
+            by_name.setdefault(dbpedia_name, []).append(person_uri)
+    if journal.count(STEP):
+        print(f"Reprise : {journal.count(STEP)} personnes déjà traitées")
 
-for person_uri, given_name, family_name in persons:
-    dbpedia_name = format_name_for_dbpedia(given_name, family_name)
-    dbpedia_uri = check_dbpedia_exists(dbpedia_name)
+    def resolved(dbpedia_name, result):
+        dbpedia_uri, wikidata_uri = result
+        for person_uri in by_name[dbpedia_name]:
+            added, removed = [], []
+            if dbpedia_uri:
+                removed = [
+                    (person_uri, OWL.sameAs, old)
+                    for old in g.objects(person_uri, OWL.sameAs)
+                ]
+                added.append((person_uri, OWL.sameAs, URIRef(dbpedia_uri)))
 
-    if dbpedia_uri:
-        for old in g.objects(person_uri, OWL.sameAs):
-            g.remove((person_uri, OWL.sameAs, old))
-        g.add((person_uri, OWL.sameAs, URIRef(dbpedia_uri)))
+                if wikidata_uri:
+                    added.append((person_uri, OWL.sameAs, URIRef(wikidata_uri)))
+            journal.record(STEP, person_uri, added, removed, dbpedia_uri or "")
 
-        wikidata_uri = get_wikidata_combined(dbpedia_name)
-        if wikidata_uri:
-            g.add((person_uri, OWL.sameAs, URIRef(wikidata_uri)))
+    enrich_resources(
+        by_name,
+        progress=resolved,
+        dbpedia_base=args.dbpedia_base,
+        sparql_endpoint=args.sparql_endpoint,
+        concurrency=CONCURRENCY,
+        rate=RATE,
+        cache=cache,
+    )
+    journal.close()
 
-        time.sleep(0.8)
+    # graphe de départ + journal, relus en flux
+    merge_journal(journal, args.output)
+    print(cache.summary())
 
-    time.sleep(0.3)
 
-g.serialize("out_enriched.ttl", format="turtle")
+if __name__ == "__main__":
+    main()
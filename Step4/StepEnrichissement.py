@@ -1,13 +1,36 @@
 from rdflib import Graph, Namespace, URIRef, Literal
 from rdflib.namespace import RDF, RDFS, OWL, FOAF
-import requests, time, re
-from urllib.parse import quote
+import requests, argparse, time, re, os, sys
+from urllib.parse import quote, urlparse
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from async_enrichment import answered
+from lookup_cache import MISS, shared_cache
+from org_linking import (
+    LabelIndexResolver,
+    Organization,
+    SparqlResolver,
+    link_organizations,
+    place_name,
+)
+from journal import Journal, journal_path, merge_journal
+from sameas_batch import resolve_wikidata_batch
+from snapshot import load_graph
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+INPUT_TTL = os.path.join(HERE, "out_enriched.ttl")
+OUTPUT_TTL = os.path.join(HERE, "out_enriched_complete.ttl")
+
 SCHEMA = Namespace("http://schema.org/")
 DBO = Namespace("http://dbpedia.org/ontology/")
 DBR = Namespace("http://dbpedia.org/resource/")
 
+WIKIDATA_BATCH = 200  # liens Wikidata résolus (et journalisés) par lot
+# serveur interrogé, modifiable pour viser mock_dbpedia.py (comme Step4.py)
+DBPEDIA_BASE = os.environ.get("DBPEDIA_BASE", "http://dbpedia.org").rstrip("/")
+SPARQL_ENDPOINT = os.environ.get("DBPEDIA_SPARQL", "https://dbpedia.org/sparql")
+
 # URI ENCODING
 def encode_dbpedia_uri(name):
     return quote(name, safe='_,')  # évite les apostrophes cassées
@@ -20,132 +43,290 @@ def sanitize(uri):
 
 
 # CHECK DBPEDIA
+# Les erreurs réseau (et 429 / 5xx) remontent en requests.RequestException :
+# rien n'est mis en cache et l'entité est reprise à l'exécution suivante.
 def dbpedia_exists(name):
-    try:
-        encoded = encode_dbpedia_uri(name)
-        url = f"http://dbpedia.org/resource/{encoded}"
-        r = requests.head(url, timeout=8)
-        return url if r.status_code == 200 else None
-    except:
-        return None
+    encoded = encode_dbpedia_uri(name)
+    uri = f"http://dbpedia.org/resource/{encoded}"
+
+    def fetch():
+        r = answered(requests.head(f"{DBPEDIA_BASE}/resource/{encoded}", timeout=8))
+        return uri if r.status_code == 200 else None
+
+    # HEAD sans suivre les redirections : clé de cache distincte de Step4
+    return shared_cache().lookup("dbpedia_exists_noredirect", uri, fetch)
 
 # GET WIKIDATA
 def wikidata_from_sparql(name):
+    encoded = encode_dbpedia_uri(name)
+    q = f"""
+    SELECT ?wd WHERE {{
+        <http://dbpedia.org/resource/{encoded}> owl:sameAs ?wd .
+        FILTER(STRSTARTS(STR(?wd),"http://www.wikidata.org/entity/"))
+    }} LIMIT 1
+    """
+    r = answered(requests.get(SPARQL_ENDPOINT,
+                              params={'query': q, 'format': 'json'},
+                              timeout=10))
+    if r.status_code != 200:
+        return None
     try:
-        encoded = encode_dbpedia_uri(name)
-        q = f"""
-        SELECT ?wd WHERE {{
-            <http://dbpedia.org/resource/{encoded}> owl:sameAs ?wd .
-            FILTER(STRSTARTS(STR(?wd),"http://www.wikidata.org/entity/"))
-        }} LIMIT 1
-        """
-        r = requests.get("https://dbpedia.org/sparql",
-                         params={'query': q, 'format': 'json'},
-                         timeout=10)
         b = r.json().get("results", {}).get("bindings", [])
-        return b[0]["wd"]["value"] if b else None
-    except:
-        return None
+    except ValueError as e:
+        raise requests.RequestException(f"réponse SPARQL illisible : {e}")
+    return b[0]["wd"]["value"] if b else None
 
 def wikidata_from_rdf(name):
-    try:
-        encoded = encode_dbpedia_uri(name)
-        url = f"http://dbpedia.org/data/{encoded}.ttl"
-        g = Graph()
-        g.parse(url, format="turtle")
-        s = URIRef(f"http://dbpedia.org/resource/{encoded}")
-        for _, _, o in g.triples((s, OWL.sameAs, None)):
-            if "wikidata.org/entity/" in str(o):
-                return str(o)
+    encoded = encode_dbpedia_uri(name)
+    r = answered(requests.get(f"{DBPEDIA_BASE}/data/{encoded}.ttl", timeout=15))
+    if r.status_code != 200:
         return None
-    except:
+    g = Graph()
+    try:
+        g.parse(data=r.text, format="turtle")
+    except Exception:
         return None
+    s = URIRef(f"http://dbpedia.org/resource/{encoded}")
+    for _, _, o in g.triples((s, OWL.sameAs, None)):
+        if "wikidata.org/entity/" in str(o):
+            return str(o)
+    return None
 
 def wikidata(name):
-    return wikidata_from_sparql(name) or wikidata_from_rdf(name)
+    return shared_cache().lookup(
+        "wikidata",
+        f"http://dbpedia.org/resource/{encode_dbpedia_uri(name)}",
+        lambda: wikidata_from_sparql(name) or wikidata_from_rdf(name),
+    )
 
+def wikidata_batch(names):
+    """Comme wikidata(name) pour une liste de noms, mais avec une requête
+    SPARQL VALUES par lot au lieu d'une requête par nom. Les noms restés sans
+    réponse (erreur réseau) sont absents du résultat."""
+    cache = shared_cache()
+    result = {}
+    todo = []
+    for name in set(names):
+        key = f"http://dbpedia.org/resource/{encode_dbpedia_uri(name)}"
+        wd = cache.get("wikidata", key)
+        if wd is MISS:
+            todo.append(name)
+        else:
+            result[name] = wd
 
-# LINK ADDER
-def add_sameas(g, s, uri):
-    try:
-        g.add((s, OWL.sameAs, sanitize(uri)))
-        return True
-    except Exception as e:
-        print("   ✗ erreur ajout sameAs:", e)
-        return False
+    found, failed = resolve_wikidata_batch(
+        [encode_dbpedia_uri(n) for n in todo], endpoint=SPARQL_ENDPOINT
+    )
+    failed = set(failed)
+    for name in todo:
+        encoded = encode_dbpedia_uri(name)
+        if encoded in failed:
+            continue  # lot sans réponse : ni cache ni résultat
+        # repli sur la page RDF pour les ressources sans réponse du lot
+        try:
+            wd = found.get(encoded) or wikidata_from_rdf(name)
+        except requests.RequestException:
+            continue
+        cache.set("wikidata", f"http://dbpedia.org/resource/{encoded}", wd)
+        result[name] = wd
+    return result
 
 
-def org_variants(name):
-    base = name.replace(" ", "_")
-    out = {base}
+# LINK
+def sameas(s, uri):
+    return s, OWL.sameAs, sanitize(uri)
 
-    if "University" in name:
-        out.add(name.replace("University", "").strip().replace(" ", "_"))
-        out.add("University_of_" + name.replace("University", "").strip().replace(" ", "_"))
 
-    if "Institute" in name:
-        out.add(name.replace(" ", "_"))
-        out.add(name.replace("Institute", "Institute_of_Technology").replace(" ", "_"))
+# Liaison des organisations (org_linking.py) : index de labels local si
+# NOBEL_LABEL_INDEX désigne un gazetteer (cf. reconcile.py), sinon requêtes
+# SPARQL VALUES par lot sur DBPEDIA_SPARQL.
+def org_resolver():
+    path = os.environ.get("NOBEL_LABEL_INDEX")
+    if path:
+        from reconcile import load_gazetteer
 
-    # Nettoyage 
-    return {v.strip("_").replace("__", "_") for v in out}
+        return LabelIndexResolver(load_gazetteer(path))
+    return SparqlResolver(SPARQL_ENDPOINT)
 
 
-g = Graph()
-g.parse("out_enriched.ttl")
+class EntityIndex:
+    """Partition du graphe en une seule passe : sujets par rdf:type, quelques
+    valeurs (nom, lieu, ville, pays) et domaines des owl:sameAs existants.
+    Les boucles d'enrichissement ne touchent ensuite que leurs entités et
+    "déjà lié à DBpedia ?" se répond sans parcourir le graphe."""
 
-def extract_entities(g, rdf_type):
-    return [
-        s for s in g.subjects(RDF.type, rdf_type)
-    ]
+    VALUES = (FOAF.name, SCHEMA.name, SCHEMA.location, DBO.city, DBO.country)
+
+    def __init__(self, g):
+        self.by_type = {}  # type -> {sujet: None}, dans l'ordre du graphe
+        self.values = {}  # (sujet, prédicat) -> {objet}
+        self.sameas = {}  # sujet -> {domaine}
+        indexed = set(self.VALUES)
+        for s, p, o in g:
+            if p == RDF.type:
+                self.by_type.setdefault(o, {})[s] = None
+            elif p == OWL.sameAs:
+                self.sameas.setdefault(s, set()).add(link_domain(o))
+            elif p in indexed:
+                self.values.setdefault((s, p), set()).add(o)
+
+    def entities(self, rdf_type):
+        return list(self.by_type.get(rdf_type, ()))
+
+    def value(self, s, p):
+        """Valeur de (s, p), comme g.value. Les prédicats indexés n'ont qu'une
+        valeur, sauf schema:location d'une organisation présente dans
+        plusieurs villes (University of California...) : la plus petite est
+        retenue, quel que soit l'ordre du graphe."""
+        values = self.values.get((s, p))
+        return min(values) if values else None
+
+    def linked(self, s, domain="dbpedia"):
+        return domain in self.sameas.get(s, ())
 
-orgs = extract_entities(g, None) 
-places = extract_entities(g, SCHEMA.Place)
 
+def link_domain(uri):
+    uri = str(uri)
+    if "dbpedia.org" in uri:
+        return "dbpedia"
+    if "wikidata.org" in uri:
+        return "wikidata"
+    parsed = urlparse(uri)
+    return parsed.netloc or parsed.scheme  # schéma pour urn:, mailto:...
 
-# ORGANIZATIONS
-for s in orgs:
-    name = g.value(s, FOAF.name) or g.value(s, SCHEMA.name)
-    if not name:
-        continue
 
-    name = str(name)
+def main():
+    parser = argparse.ArgumentParser(
+        description="Liens owl:sameAs des organisations et des lieux"
+    )
+    parser.add_argument("input", nargs="?", default=INPUT_TTL)
+    parser.add_argument("-o", "--output", default=OUTPUT_TTL)
+    parser.add_argument("--journal", help="journal de reprise (<sortie>.journal.tsv)")
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore le journal existant"
+    )
+    args = parser.parse_args()
+    cache = shared_cache()
 
-    # skip if DBpedia exists already
-    if any("dbpedia.org" in str(o) for o in g.objects(s, OWL.sameAs)):
-        continue
+    g = load_graph(args.input)
+    index = EntityIndex(g)
 
-    # try variations
-    for v in org_variants(name):
-        dbp = dbpedia_exists(v)
-        if dbp:
-            print(f"✓ DBpedia org trouvée pour {name} : {dbp}")
-            add_sameas(g, s, dbp)
-            wd = wikidata(v)
-            if wd:
-                add_sameas(g, s, wd)
-            break
+    orgs = index.entities(SCHEMA.Organization)
+    places = index.entities(SCHEMA.Place)
+    persons = index.entities(FOAF.Person)
+    print(
+        f"{len(orgs)} organisations, {len(places)} lieux, {len(persons)} personnes "
+        f"({sum(index.linked(s) for s in persons)} déjà liées à DBpedia)"
+    )
 
+    # liens écrits dans le journal au fil de l'eau ; à la reprise, les entités
+    # déjà traitées (étapes org, place, wikidata) sont sautées
+    journal = Journal(
+        args.journal or journal_path(args.output), args.input, args.restart
+    )
+    if journal.done:
+        print(
+            f"Reprise : {journal.count('org')} organisations, "
+            f"{journal.count('place')} lieux, {journal.count('wikidata')} liens "
+            "Wikidata déjà traités"
+        )
 
-# PLACES
-for s in places:
-    # skip if DBpedia present
-    if any("dbpedia.org" in str(o) for o in g.objects(s, OWL.sameAs)):
-        continue
+    # ORGANIZATIONS : candidats de toutes les organisations, résolus en lot
+    organizations = []
+    for s in orgs:
+        name = index.value(s, FOAF.name) or index.value(s, SCHEMA.name)
+        if not name:
+            continue
 
-    city = g.value(s, DBO.city)
-    country = g.value(s, DBO.country)
-    candidate = city or country
-    if not candidate:
-        continue
+        # skip if DBpedia exists already
+        if index.linked(s) or journal.value("org", s) is not None:
+            continue
 
-    name = str(candidate).split("/")[-1]
-    if dbpedia_exists(name):
-        add_sameas(g, s, str(candidate))
-        wd = wikidata(name)
-        if wd:
-            add_sameas(g, s, wd)
+        place = index.value(s, SCHEMA.location)
+        organizations.append(
+            Organization(
+                s,
+                str(name),
+                place_name(index.value(place, DBO.city)),
+                place_name(index.value(place, DBO.country)),
+            )
+        )
+
+    resolver = org_resolver()
+    links, unresolved, stats = link_organizations(
+        organizations, resolver, cache=cache if resolver.remote else None
+    )
+    linked = {link.subject: link for link in links}
+    unresolved = set(unresolved)
+    for organization in organizations:
+        if organization.subject in unresolved:
+            continue  # candidats sans réponse : reprise à la prochaine exécution
+        link = linked.get(organization.subject)
+        if link is None:
+            journal.record("org", organization.subject)
+            continue
+        print(
+            f"✓ DBpedia org trouvée pour {link.name} : {link.iri} ({link.score:.2f})"
+        )
+        journal.record(
+            "org",
+            link.subject,
+            [sameas(link.subject, DBR + link.resource)],
+            value=link.resource,
+        )
+    print(
+        f"Organisations : {stats['linked']}/{stats['organizations']} liées, "
+        f"{stats['candidates']} candidats distincts ({stats['variants']} variantes), "
+        f"{stats['lookups']} recherches, {stats['unresolved']} à reprendre"
+    )
+
+    # PLACES
+    for s in places:
+        # skip if DBpedia present
+        if index.linked(s) or journal.value("place", s) is not None:
+            continue
+
+        city = index.value(s, DBO.city)
+        country = index.value(s, DBO.country)
+        candidate = city or country
+        if not candidate:
+            continue
+
+        name = str(candidate).split("/")[-1]
+        try:
+            exists = dbpedia_exists(name)
+        except requests.RequestException as e:
+            print(f"✗ {name} : {e}")
+            continue
+        if exists:
+            journal.record("place", s, [sameas(s, str(candidate))], value=name)
+        else:
+            journal.record("place", s)
+
+    # WIKIDATA : (sujet, nom DBpedia) trouvés, y compris lors d'une exécution
+    # précédente, résolus par lots
+    found = [
+        (s, journal.value(step, s))
+        for step, entities in (("org", orgs), ("place", places))
+        for s in entities
+        if journal.value(step, s) and journal.value("wikidata", s) is None
+    ]
+    for i in range(0, len(found), WIKIDATA_BATCH):
+        chunk = found[i : i + WIKIDATA_BATCH]
+        wd_links = wikidata_batch([name for _, name in chunk])
+        for s, name in chunk:
+            if name not in wd_links:
+                continue  # sans réponse : repris à la prochaine exécution
+            if wd_links[name]:
+                journal.record("wikidata", s, [sameas(s, wd_links[name])], value=name)
+            else:
+                journal.record("wikidata", s)
+    journal.close()
 
+    # graphe de départ + journal, relus en flux
+    merge_journal(journal, args.output)
+    print("Fichier ttl terminé")
+    print(cache.summary())
 
-g.serialize("out_enriched_complete.ttl", format="turtle")
-print("Fichier ttl terminé")
+if __name__ == "__main__":
+    main()
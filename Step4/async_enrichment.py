@@ -0,0 +1,315 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from rdflib import Graph, URIRef
+from rdflib.namespace import OWL
+
+from sameas_batch import resolve_wikidata_batch
+
+# Moteur d'enrichissement concurrent pour Step4 : au lieu de traiter les
+# personnes une par une avec des time.sleep fixes, les requêtes partent en
+# parallèle (limite de concurrence) et un token bucket régule le débit.
+# Les appels HTTP passent par une requests.Session partagée (pool de
+# connexions keep-alive par hôte), exécutée dans des threads via asyncio.
+# Si un LookupCache (lookup_cache.py) est fourni, il est consulté avant
+# chaque appel réseau. Seules les vraies réponses y sont stockées : une erreur
+# réseau, un 429 ou un 5xx lèvent requests.RequestException, et la ressource
+# est reprise à l'exécution suivante.
+
+DBPEDIA_RESOURCE = "http://dbpedia.org/resource/"
+_MISS = object()
+
+
+def answered(r):
+    """Lève HTTPError si l'endpoint n'a pas vraiment répondu (429, 5xx)."""
+    if r.status_code == 429 or r.status_code >= 500:
+        raise requests.HTTPError(f"HTTP {r.status_code}", response=r)
+    return r
+
+
+class TokenBucket:
+    """Limiteur de débit : `rate` requêtes/s en moyenne, rafales de `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncEnricher:
+    def __init__(
+        self,
+        dbpedia_base="http://dbpedia.org",
+        sparql_endpoint="https://dbpedia.org/sparql",
+        concurrency=16,
+        rate=10.0,
+        timeout=10,
+        cache=None,
+        batch_size=200,
+    ):
+        self.dbpedia_base = dbpedia_base.rstrip("/")
+        self.sparql_endpoint = sparql_endpoint
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache = cache
+        self.batch_size = batch_size
+        self.bucket = TokenBucket(rate)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # un thread par requête en vol (le pool par défaut d'asyncio est
+        # limité au nombre de CPU)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.requests_sent = 0
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+    async def run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def request(self, method, url, **kwargs):
+        await self.bucket.acquire()
+        self.requests_sent += 1
+        kwargs.setdefault("timeout", self.timeout)
+        return await self.run_blocking(self.session.request, method, url, **kwargs)
+
+    async def cached(self, kind, key, compute):
+        # même logique que LookupCache.lookup, mais compute est une coroutine :
+        # rien n'est stocké si elle lève une exception
+        if self.cache is None:
+            return await compute()
+        value = self.cache.get(kind, key, _MISS)
+        if value is _MISS:
+            value = await compute()
+            self.cache.set(kind, key, value)
+        return value
+
+    async def check_dbpedia_exists(self, resource_name):
+        return await self.cached(
+            "dbpedia_exists",
+            DBPEDIA_RESOURCE + resource_name,
+            lambda: self._check_dbpedia_exists(resource_name),
+        )
+
+    async def _check_dbpedia_exists(self, resource_name):
+        r = await self.request(
+            "HEAD",
+            f"{self.dbpedia_base}/resource/{resource_name}",
+            allow_redirects=True,
+        )
+        answered(r)
+        return DBPEDIA_RESOURCE + resource_name if r.status_code == 200 else None
+
+    async def wikidata_from_sparql(self, resource_name):
+        query = f"""
+        PREFIX owl: <http://www.w3.org/2002/07/owl#>
+        PREFIX dbr: <http://dbpedia.org/resource/>
+
+        SELECT ?wikidata WHERE {{
+            dbr:{resource_name} owl:sameAs ?wikidata .
+            FILTER(STRSTARTS(STR(?wikidata), "http://www.wikidata.org/entity/"))
+        }}
+        LIMIT 1
+        """
+        r = answered(
+            await self.request(
+                "GET",
+                self.sparql_endpoint,
+                params={"query": query, "format": "json"},
+                headers={"Accept": "application/sparql-results+json"},
+            )
+        )
+        if r.status_code != 200:
+            return None
+        try:
+            bindings = r.json().get("results", {}).get("bindings", [])
+        except ValueError as e:
+            raise requests.RequestException(f"réponse SPARQL illisible : {e}")
+        return bindings[0]["wikidata"]["value"] if bindings else None
+
+    async def wikidata_from_page(self, resource_name):
+        r = answered(
+            await self.request("GET", f"{self.dbpedia_base}/data/{resource_name}.ttl")
+        )
+        if r.status_code != 200:
+            return None
+        g = Graph()
+        try:
+            await self.run_blocking(g.parse, data=r.text, format="turtle")
+        except Exception:
+            return None  # page invalide : réponse définitive, sans lien
+        subject = URIRef(DBPEDIA_RESOURCE + resource_name)
+        for o in g.objects(subject, OWL.sameAs):
+            if "wikidata.org/entity/" in str(o):
+                return str(o)
+        return None
+
+    async def wikidata_combined(self, resource_name):
+        async def compute():
+            return await self.wikidata_from_sparql(
+                resource_name
+            ) or await self.wikidata_from_page(resource_name)
+
+        return await self.cached("wikidata", DBPEDIA_RESOURCE + resource_name, compute)
+
+    async def enrich(self, resource_name):
+        dbpedia_uri = await self.check_dbpedia_exists(resource_name)
+        if not dbpedia_uri:
+            return None, None
+        return dbpedia_uri, await self.wikidata_combined(resource_name)
+
+    async def wikidata_batch(self, resource_names):
+        """Wikidata pour plusieurs ressources : cache, puis une requête
+        VALUES par lot, puis la page /data/*.ttl pour les manquants. Les
+        ressources restées sans réponse (erreur réseau) sont absentes."""
+        results = {}
+        todo = []
+        for name in resource_names:
+            value = (
+                self.cache.get("wikidata", DBPEDIA_RESOURCE + name, _MISS)
+                if self.cache
+                else _MISS
+            )
+            if value is _MISS:
+                todo.append(name)
+            else:
+                results[name] = value
+        if not todo:
+            return results
+
+        # un jeton du token bucket par lot envoyé
+        for _ in range(0, len(todo), self.batch_size):
+            await self.bucket.acquire()
+        found, failed = await self.run_blocking(
+            resolve_wikidata_batch,
+            todo,
+            endpoint=self.sparql_endpoint,
+            batch_size=self.batch_size,
+            timeout=self.timeout,
+            session=self.session,
+        )
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # lots sans réponse : ni repli, ni cache, absents du résultat
+        failed = set(failed)
+
+        async def fallback(name):
+            try:
+                async with semaphore:
+                    wikidata = found.get(name) or await self.wikidata_from_page(name)
+            except requests.RequestException:
+                return  # ni réponse ni cache : absent du résultat
+            if self.cache:
+                self.cache.set("wikidata", DBPEDIA_RESOURCE + name, wikidata)
+            results[name] = wikidata
+
+        await asyncio.gather(*(fallback(n) for n in todo if n not in failed))
+        return results
+
+    async def enrich_all(self, resource_names, progress=None):
+        """{nom: (uri_dbpedia, uri_wikidata)}. progress(nom, résultat) est
+        appelé dès qu'un résultat est définitif : tout de suite pour les
+        ressources absentes de DBpedia, par lot Wikidata pour les autres.
+        Les ressources en erreur réseau n'ont pas de résultat."""
+        names = list(dict.fromkeys(resource_names))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        exists = {}
+        results = {}
+        failed = []
+
+        def resolved(name, result):
+            results[name] = result
+            if progress:
+                progress(name, result)
+
+        async def check(name):
+            try:
+                async with semaphore:
+                    exists[name] = await self.check_dbpedia_exists(name)
+            except requests.RequestException:
+                failed.append(name)
+                return
+            if not exists[name]:
+                resolved(name, (None, None))
+
+        await asyncio.gather(*(check(n) for n in names))
+        found = [n for n in names if exists.get(n)]
+        for i in range(0, len(found), self.batch_size):
+            chunk = found[i : i + self.batch_size]
+            wikidata = await self.wikidata_batch(chunk)
+            for name in chunk:
+                if name in wikidata:
+                    resolved(name, (exists[name], wikidata[name]))
+                else:
+                    failed.append(name)
+        if failed:
+            print(f"   ✗ {len(failed)} ressources sans réponse, reprises plus tard")
+        return {name: results[name] for name in names if name in results}
+
+
+def enrich_resources(resource_names, progress=None, **options):
+    """Point d'entrée synchrone : renvoie {nom: (uri_dbpedia, uri_wikidata)}."""
+    enricher = AsyncEnricher(**options)
+    try:
+        return asyncio.run(enricher.enrich_all(resource_names, progress))
+    finally:
+        enricher.close()
+
+
+if __name__ == "__main__":
+    # Benchmark hors-ligne contre le serveur local de mock_dbpedia.py
+    import argparse
+
+    from mock_dbpedia import serve_in_thread
+
+    parser = argparse.ArgumentParser(description="Benchmark de l'enrichissement")
+    parser.add_argument("-n", type=int, default=1000, help="nombre de ressources")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rate", type=float, default=0, help="req/s (0 = illimité)")
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    names = [f"Person_{i}" for i in range(args.n)]
+    server, base = serve_in_thread(known=names[::2], latency=args.latency)
+    start = time.perf_counter()
+    res = enrich_resources(
+        names,
+        dbpedia_base=base,
+        sparql_endpoint=base + "/sparql",
+        concurrency=args.concurrency,
+        rate=args.rate,
+    )
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    found = sum(1 for d, _ in res.values() if d)
+    print(
+        f"{len(names)} ressources en {elapsed:.2f}s "
+        f"({len(names) / elapsed:.1f}/s), {found} trouvées sur DBpedia"
+    )
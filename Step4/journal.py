@@ -0,0 +1,181 @@
+import hashlib
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from snapshot import iter_graph, rdflib_term_factory, snapshot_path, write_snapshot
+from stream_writer import nt_term, open_writer
+from triplestore import TripleStore
+from ttl_stream import TurtleSyntaxError
+
+# Journal de reprise des étapes d'enrichissement (Step4.py, StepEnrichissement.py).
+# Chaque entité traitée y est ajoutée dès que ses liens sont connus, en une
+# seule écriture :
+#
+#   +   <s> <p> <o> .           triplet ajouté
+#   -   <s> <p> <o> .           triplet retiré du graphe de départ
+#   =   étape   <s>   valeur    entité traitée (valeur : nom DBpedia trouvé...)
+#
+# Les lignes + / - d'une entité ne comptent qu'une fois sa ligne = écrite :
+# après un arrêt brutal, l'entité en cours est simplement retraitée. La
+# première ligne enregistre l'empreinte du graphe de départ ; un journal écrit
+# pour un autre graphe est ignoré. La sortie finale est le graphe de départ
+# relu en flux, moins les triplets retirés, plus les triplets ajoutés
+# (merge_journal), sans graphe rdflib à re-sérialiser.
+
+SUFFIX = ".journal.tsv"
+FLUSH_SUBJECTS = 1000  # sujets gardés par le writer Turtle avant écriture
+
+
+def journal_path(output):
+    return os.path.splitext(output)[0] + SUFFIX
+
+
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _triple(line):
+    # "<s> <p> <o> ." -> (s, p, o) ; seuls les IRI apparaissent en sujet et
+    # prédicat, l'objet garde ses espaces éventuels
+    s, p, o = line[:-2].split(" ", 2)
+    return s, p, o
+
+
+class Journal:
+    """Journal append-only d'une étape d'enrichissement sur le graphe base."""
+
+    def __init__(self, path, base, restart=False):
+        self.path = path
+        self.base = base
+        self.header = f"#\tbase\t{file_digest(base)}\n"
+        self.added = {}  # (s, p, o) N-Triples -> None, dans l'ordre du journal
+        self.removed = set()
+        self.done = {}  # (étape, sujet N-Triples) -> valeur
+        resumed = not restart and self._read()
+        self.f = open(path, "a" if resumed else "w", encoding="utf-8")
+        if not resumed:
+            self.f.write(self.header)
+            self.f.flush()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            if f.readline() != self.header:
+                print(f"{self.path} : journal d'un autre graphe de départ, ignoré")
+                return False
+            pending = []
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # dernière ligne tronquée par un arrêt brutal
+                op, _, rest = line[:-1].partition("\t")
+                if op in "+-":
+                    pending.append((op, _triple(rest)))
+                elif op == "=":
+                    step, subject, value = rest.split("\t", 2)
+                    for kind, triple in pending:
+                        if kind == "+":
+                            self.added[triple] = None
+                        else:
+                            self.removed.add(triple)
+                    pending = []
+                    self.done[(step, subject)] = value
+        return True
+
+    def value(self, step, subject):
+        """Valeur enregistrée pour subject, None s'il reste à traiter."""
+        return self.done.get((step, nt_term(subject)))
+
+    def count(self, step):
+        return sum(1 for s, _ in self.done if s == step)
+
+    def record(self, step, subject, added=(), removed=(), value=""):
+        """Ajoute les triplets (rdflib) d'une entité et la marque traitée."""
+        lines = []
+        for kind, triples in (("-", removed), ("+", added)):
+            for triple in triples:
+                triple = tuple(nt_term(t) for t in triple)
+                if kind == "+":
+                    self.added[triple] = None
+                else:
+                    self.removed.add(triple)
+                lines.append(f"{kind}\t{' '.join(triple)} .\n")
+        subject = nt_term(subject)
+        lines.append(f"=\t{step}\t{subject}\t{value}\n")
+        self.done[(step, subject)] = value
+        self.f.write("".join(lines))
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+def turtle_prefixes(path):
+    """Préfixes déclarés en tête d'un fichier Turtle."""
+    prefixes = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("@prefix"):
+                _, prefix, namespace = line.split(None, 3)[:3]
+                prefixes[prefix.rstrip(":")] = namespace.strip("<>")
+            elif line.strip():
+                break
+    return prefixes
+
+
+def rdflib_triples(path):
+    """Triplets N-Triples de path lus par rdflib, regroupés par sujet."""
+    from rdflib import Graph
+
+    g = Graph().parse(path)
+    for s in g.subjects(unique=True):
+        for p, o in g.predicate_objects(s):
+            yield nt_term(s), nt_term(p), nt_term(o)
+
+
+def merge_journal(journal, output):
+    """Écrit output (Turtle) = graphe de départ - retirés + ajoutés, et son
+    snapshot. Les triplets ajoutés sont écrits avec ceux de leur sujet."""
+    try:
+        return _merge(journal, output, iter_graph(journal.base))
+    except TurtleSyntaxError as e:
+        # syntaxe hors de ce que lit ttl_stream : relecture complète par rdflib
+        print(f"{journal.base} : {e}, relecture avec rdflib")
+        return _merge(journal, output, rdflib_triples(journal.base))
+
+
+def _merge(journal, output, base_triples):
+    convert = rdflib_term_factory()
+    added = {}
+    for s, p, o in journal.added:
+        added.setdefault(s, []).append((s, p, o))
+    store = TripleStore(normalize=False)
+    with open_writer(output, "turtle") as w:
+        for prefix, namespace in turtle_prefixes(journal.base).items():
+            w.bind(prefix, namespace)
+
+        def write(triple):
+            store.add(*triple)
+            w.add(tuple(convert(t) for t in triple))
+
+        subject = None
+        for triple in base_triples:
+            if triple[0] != subject:
+                subject = triple[0]
+                if len(w.buffer) >= FLUSH_SUBJECTS:
+                    w.flush()
+                # un triplet retiré puis ajouté à nouveau reste dans le graphe
+                for extra in added.pop(subject, ()):
+                    write(extra)
+            if triple not in journal.removed and triple not in journal.added:
+                write(triple)
+        for triples in added.values():
+            for triple in triples:
+                write(triple)
+    write_snapshot(store, snapshot_path(output), source=output)
+    return len(store)
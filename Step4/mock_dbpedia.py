@@ -0,0 +1,141 @@
+import json
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+# Serveur local qui imite DBpedia (pages /resource, /data/*.ttl et
+# endpoint /sparql) pour tester et mesurer l'enrichissement hors-ligne.
+
+DBPEDIA_RESOURCE = "http://dbpedia.org/resource/"
+RESOURCE_RE = re.compile(r"dbr:([^\s.;,}]+)|<http://dbpedia\.org/resource/([^>]+)>")
+SELECT_VARS_RE = re.compile(r"SELECT\s+(?:DISTINCT\s+)?((?:\?\w+\s*)+)", re.I)
+
+
+def wikidata_for(name):
+    # identifiant Wikidata factice mais stable pour un nom donné
+    return f"http://www.wikidata.org/entity/Q{zlib.crc32(name.encode('utf-8'))}"
+
+
+class MockDBpediaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _known(self, name):
+        known = self.server.known
+        return known is None or name in known
+
+    def _route(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.server.hits += 1
+        url = urlparse(self.path)
+        if url.path.startswith("/resource/"):
+            name = unquote(url.path[len("/resource/") :])
+            return self._send(200 if self._known(name) else 404)
+        if url.path.startswith("/data/") and url.path.endswith(".ttl"):
+            name = unquote(url.path[len("/data/") : -len(".ttl")])
+            if not self._known(name):
+                return self._send(404)
+            body = (
+                f"<{DBPEDIA_RESOURCE}{name}> "
+                f"<http://www.w3.org/2002/07/owl#sameAs> <{wikidata_for(name)}> .\n"
+            )
+            return self._send(200, body.encode("utf-8"), "text/turtle")
+        if url.path == "/sparql":
+            query = parse_qs(url.query).get("query", [""])[0]
+            if self.command == "POST":
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                query = form.get("query", [query])[0]
+            return self._sparql(query)
+        return self._send(404)
+
+    def _sparql(self, query):
+        if self.server.max_query_length and len(query) > self.server.max_query_length:
+            return self._send(414, b"Query too long")
+        raw_names = [a or b for a, b in RESOURCE_RE.findall(query)]
+        m = SELECT_VARS_RE.search(query)
+        variables = re.findall(r"\?(\w+)", m.group(1)) if m else ["wikidata"]
+        bindings = []
+        for raw in dict.fromkeys(raw_names):
+            name = unquote(raw)
+            if not self._known(name):
+                continue
+            if "place" in variables:
+                # requête de liaison des organisations (org_linking.py)
+                s = {"type": "uri", "value": DBPEDIA_RESOURCE + raw}
+                places = self.server.places.get(name, ())
+                bindings.extend(
+                    {"s": s, "place": {"type": "uri", "value": DBPEDIA_RESOURCE + p}}
+                    for p in places
+                )
+                if not places:
+                    bindings.append({"s": s})
+                continue
+            values = [DBPEDIA_RESOURCE + raw, wikidata_for(name)]
+            if len(variables) == 1:
+                values = values[1:]
+            bindings.append(
+                {v: {"type": "uri", "value": x} for v, x in zip(variables, values)}
+            )
+        body = json.dumps(
+            {"head": {"vars": variables}, "results": {"bindings": bindings}}
+        )
+        self._send(200, body.encode("utf-8"), "application/sparql-results+json")
+
+    do_GET = _route
+    do_HEAD = _route
+    do_POST = _route
+
+
+def make_server(
+    host="127.0.0.1",
+    port=0,
+    known=None,
+    latency=0.0,
+    max_query_length=0,
+    places=None,
+):
+    """known=None : toutes les ressources existent. places : {nom: [lieux]}
+    (dbo:city / dbo:country renvoyés aux requêtes qui demandent ?place)."""
+    server = ThreadingHTTPServer((host, port), MockDBpediaHandler)
+    server.daemon_threads = True
+    server.known = set(known) if known is not None else None
+    server.places = places or {}
+    server.latency = latency
+    server.max_query_length = max_query_length
+    server.hits = 0
+    return server
+
+
+def serve_in_thread(**options):
+    server = make_server(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Faux DBpedia local")
+    parser.add_argument("--port", type=int, default=8890)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = make_server(port=args.port, latency=args.latency)
+    print(f"Mock DBpedia sur http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,229 @@
+import os
+import sys
+from collections import namedtuple
+from urllib.parse import unquote
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from lookup_cache import MISS
+from reconcile import alias_forms, local_label, normalize_key, trigrams
+from sameas_batch import DEFAULT_ENDPOINT, post_query, resource_iri, run_batches
+
+# Liaison des organisations à DBpedia en trois temps :
+#   1. candidats (variantes de nom) de toutes les organisations, dédoublonnés :
+#      "Harvard University" revient pour des centaines de lauréats ;
+#   2. résolution de tous les candidats en lot, soit dans un index de labels
+#      local (reconcile.py), soit par requêtes SPARQL VALUES (une par lot) ;
+#   3. score de chaque candidat trouvé : similarité du nom (trigrammes) et
+#      accord ville / pays avec le lieu de l'organisation. Le meilleur gagne.
+#
+# Le nombre de recherches dépend du nombre de candidats distincts, pas de
+# organisations x variantes.
+
+DBPEDIA_RESOURCE = "http://dbpedia.org/resource/"
+CACHE_KIND = "org_candidate"
+MIN_SCORE = 0.5
+CITY_BONUS = 0.2
+COUNTRY_BONUS = 0.1
+
+Organization = namedtuple("Organization", "subject name city country")
+Link = namedtuple("Link", "subject name resource iri score")
+
+
+def org_variants(name):
+    """Noms de ressources DBpedia plausibles pour name, le plus direct d'abord."""
+    base = name.replace(" ", "_")
+    out = [base]
+
+    if "University" in name:
+        rest = name.replace("University", "").strip()
+        out.append(rest.replace(" ", "_"))
+        out.append("University_of_" + rest.replace(" ", "_"))
+        if rest.startswith("of "):
+            # University of X -> X_University
+            out.append(rest[3:].replace(" ", "_") + "_University")
+
+    if "Institute" in name:
+        technology = name.replace("Institute", "Institute_of_Technology")
+        out.append(technology.replace(" ", "_"))
+
+    if name.startswith("The "):
+        out.append(name[4:].replace(" ", "_"))
+
+    # Nettoyage
+    cleaned = (v.strip("_").replace("__", "_") for v in out)
+    return list(dict.fromkeys(v for v in cleaned if v))
+
+
+def place_name(uri):
+    return local_label(str(uri)) if uri else None
+
+
+def generate_candidates(organizations):
+    """{candidat: [indices des organisations qui le proposent]}."""
+    candidates = {}
+    for i, org in enumerate(organizations):
+        for name in org_variants(org.name):
+            candidates.setdefault(name, []).append(i)
+    return candidates
+
+
+# --- Résolution en lot ---
+# resolve(noms) -> ({nom: {"iri": ressource, "places": [lieux DBpedia]}} pour
+# les candidats qui existent, [noms restés sans réponse]).
+
+
+class LabelIndexResolver:
+    """Candidats cherchés dans un index de labels local (reconcile.Gazetteer)."""
+
+    remote = False
+
+    def __init__(self, gazetteer):
+        self.gazetteer = gazetteer
+        self.lookups = 0
+
+    def resolve(self, names):
+        """({candidat: entrée} des candidats trouvés, candidats sans réponse)."""
+        found = {}
+        for name in names:
+            self.lookups += 1
+            iri = self.gazetteer.lookup(name.replace("_", " "))
+            if iri is not None and iri.startswith(DBPEDIA_RESOURCE):
+                found[name] = {"iri": iri, "places": []}
+        return found, []
+
+
+def build_candidates_query(names):
+    values = "\n        ".join(f"<{resource_iri(n)}>" for n in names)
+    return f"""
+    PREFIX dbo: <http://dbpedia.org/ontology/>
+
+    SELECT DISTINCT ?s ?place WHERE {{
+      VALUES ?s {{
+        {values}
+      }}
+      ?s ?p ?o .
+      FILTER NOT EXISTS {{ ?s dbo:wikiPageRedirects ?target }}
+      OPTIONAL {{ ?s dbo:city|dbo:country|dbo:location|dbo:state ?place }}
+    }}
+    """
+
+
+class SparqlResolver:
+    """Candidats cherchés par requêtes SPARQL VALUES (un aller-retour par lot)."""
+
+    remote = True
+
+    def __init__(self, endpoint=DEFAULT_ENDPOINT, batch_size=200, timeout=30):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.lookups = 0
+
+    def _query_batch(self, names):
+        self.lookups += 1
+        query = build_candidates_query(names)
+        by_iri = {resource_iri(n): n for n in names}
+        found = {}
+        for b in post_query(self.session, self.endpoint, query, self.timeout):
+            iri = b["s"]["value"]
+            if iri not in by_iri:
+                continue
+            entry = found.setdefault(by_iri[iri], {"iri": iri, "places": []})
+            if "place" in b and b["place"]["value"].startswith(DBPEDIA_RESOURCE):
+                entry["places"].append(b["place"]["value"])
+        return found
+
+    def resolve(self, names):
+        # lots abandonnés (erreur réseau, refus) : candidats sans réponse
+        return run_batches(names, self._query_batch, self.batch_size)
+
+
+def resolve_candidates(names, resolver, cache=None):
+    """{candidat: {"iri", "places"}} des candidats existants. Avec un
+    LookupCache, seuls les candidats absents du cache partent au résolveur,
+    et seuls ceux dont le lot a répondu y sont stockés.
+
+    Renvoie (candidats trouvés, candidats sans réponse)."""
+    found = {}
+    todo = []
+    for name in names:
+        cached = cache.get(CACHE_KIND, name) if cache else MISS
+        if cached is MISS:
+            todo.append(name)
+        elif cached is not None:
+            found[name] = cached
+    resolved, failed = resolver.resolve(todo) if todo else ({}, [])
+    failed = set(failed)
+    for name in todo:
+        entry = resolved.get(name)
+        if cache and name not in failed:
+            cache.set(CACHE_KIND, name, entry)
+        if entry is not None:
+            found[name] = entry
+    return found, failed
+
+
+# --- Score ---
+def similarity(a, b):
+    """Coefficient de Dice sur les trigrammes des deux noms normalisés."""
+    ta, tb = trigrams(normalize_key(a)), trigrams(normalize_key(b))
+    return 2 * len(ta & tb) / (len(ta) + len(tb)) if ta and tb else 0.0
+
+
+def _mentions(place, text):
+    return any(f" {normalize_key(f)} " in text for f in alias_forms(place))
+
+
+def score(org, iri, places):
+    label = local_label(iri)
+    # nom de la ressource et ses lieux : "University of California, Berkeley"
+    # s'accorde déjà avec la ville Berkeley CA
+    words = [normalize_key(label)] + [normalize_key(local_label(p)) for p in places]
+    text = f" {' '.join(words)} "
+    value = similarity(org.name, label)
+    if org.city and _mentions(org.city, text):
+        value += CITY_BONUS
+    elif org.country and _mentions(org.country, text):
+        value += COUNTRY_BONUS
+    return value
+
+
+def link_organizations(organizations, resolver, cache=None, min_score=MIN_SCORE):
+    """Meilleur lien DBpedia de chaque organisation.
+
+    Renvoie (liens, sujets à reprendre, statistiques). Une organisation dont
+    un candidat est resté sans réponse n'a pas de lien : elle est à reprendre."""
+    candidates = generate_candidates(organizations)
+    lookups_before = resolver.lookups
+    found, failed = resolve_candidates(list(candidates), resolver, cache)
+    unresolved = {i for name in failed for i in candidates[name]}
+
+    best = {}
+    for name, entry in found.items():
+        for i in candidates[name]:
+            if i in unresolved:
+                continue
+            value = score(organizations[i], entry["iri"], entry["places"])
+            if value >= min_score and (i not in best or value > best[i][1]):
+                best[i] = (entry["iri"], value)
+
+    links = []
+    for i, (iri, value) in sorted(best.items()):
+        org = organizations[i]
+        # nom non encodé : sanitize() / encode_dbpedia_uri l'encodent une fois
+        resource = unquote(iri[len(DBPEDIA_RESOURCE) :])
+        links.append(Link(org.subject, org.name, resource, iri, value))
+    stats = {
+        "organizations": len(organizations),
+        "candidates": len(candidates),
+        "variants": sum(len(v) for v in candidates.values()),
+        "found": len(found),
+        # une par candidat pour l'index local, une par lot pour SPARQL
+        "lookups": resolver.lookups - lookups_before,
+        "linked": len(links),
+        "unresolved": len(unresolved),
+    }
+    return links, [organizations[i].subject for i in sorted(unresolved)], stats
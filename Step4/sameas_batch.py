@@ -0,0 +1,121 @@
+import re
+
+import requests
+
+# Résolution DBpedia -> Wikidata par lots : une seule requête SPARQL
+# "VALUES ?s { ... }" pour des centaines de ressources au lieu d'une
+# requête LIMIT 1 par ressource. Si l'endpoint refuse une requête trop
+# grosse ou ne répond pas à temps, le lot est coupé en deux et réessayé.
+# Les noms d'un lot abandonné sont renvoyés à part : sans réponse, ils ne
+# doivent pas être pris (ni mis en cache) pour des ressources sans lien.
+
+DBPEDIA_RESOURCE = "http://dbpedia.org/resource/"
+WIKIDATA_ENTITY = "http://www.wikidata.org/entity/"
+DEFAULT_ENDPOINT = "https://dbpedia.org/sparql"
+
+# caractères interdits dans un IRIREF SPARQL
+_IRI_FORBIDDEN = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+
+
+def resource_iri(name):
+    return DBPEDIA_RESOURCE + _IRI_FORBIDDEN.sub(
+        lambda m: "%{:02X}".format(ord(m.group())), name
+    )
+
+
+def build_values_query(names):
+    values = "\n        ".join(f"<{resource_iri(n)}>" for n in names)
+    return f"""
+    PREFIX owl: <http://www.w3.org/2002/07/owl#>
+
+    SELECT ?s ?wikidata WHERE {{
+      VALUES ?s {{
+        {values}
+      }}
+      ?s owl:sameAs ?wikidata .
+      FILTER(STRSTARTS(STR(?wikidata), "{WIKIDATA_ENTITY}"))
+    }}
+    """
+
+
+class BatchRejected(Exception):
+    pass
+
+
+def post_query(session, endpoint, query, timeout):
+    """Bindings JSON d'une requête SELECT ; BatchRejected si l'endpoint la refuse."""
+    try:
+        # POST : les longues requêtes ne passent pas toujours en GET
+        r = session.post(
+            endpoint,
+            data={"query": query, "format": "json"},
+            headers={"Accept": "application/sparql-results+json"},
+            timeout=timeout,
+        )
+    except requests.Timeout as e:
+        raise BatchRejected(str(e))
+    if r.status_code != 200:
+        raise BatchRejected(f"HTTP {r.status_code}")
+    try:
+        return r.json().get("results", {}).get("bindings", [])
+    except ValueError as e:
+        raise BatchRejected(str(e))
+
+
+def run_batches(names, query_batch, batch_size=200):
+    """Appelle query_batch(lot) -> dict sur des lots de noms et fusionne les
+    résultats. Un lot refusé est coupé en deux (et les suivants aussi).
+
+    Renvoie (résultats, noms des lots abandonnés)."""
+    names = list(dict.fromkeys(names))
+    result = {}
+    failed = []
+    size = batch_size
+    pending = [names[i : i + size] for i in range(0, len(names), size)]
+    while pending:
+        batch = pending.pop(0)
+        try:
+            result.update(query_batch(batch))
+        except BatchRejected as e:
+            if len(batch) == 1:
+                print(f"   ✗ lot abandonné ({batch[0]}) : {e}")
+                failed.append(batch[0])
+                continue
+            # lot trop gros : on coupe en deux, et les lots suivants aussi
+            size = max(1, len(batch) // 2)
+            pending[:0] = [batch[:size], batch[size:]]
+            pending[2:] = [
+                b[i : i + size] for b in pending[2:] for i in range(0, len(b), size)
+            ]
+        except requests.RequestException as e:
+            print(f"   ✗ lot en erreur ({len(batch)} noms) : {e}")
+            failed.extend(batch)
+    return result, failed
+
+
+def _query_batch(session, endpoint, names, timeout):
+    bindings = post_query(session, endpoint, build_values_query(names), timeout)
+    by_iri = {resource_iri(n): n for n in names}
+    found = {}
+    for b in bindings:
+        name = by_iri.get(b["s"]["value"])
+        if name is not None and name not in found:
+            found[name] = b["wikidata"]["value"]
+    return found
+
+
+def resolve_wikidata_batch(
+    names, endpoint=DEFAULT_ENDPOINT, batch_size=200, timeout=30, session=None
+):
+    """Renvoie ({nom: uri_wikidata}, noms sans réponse) pour les noms de
+    ressources DBpedia donnés.
+
+    Les noms absents des deux n'ont pas de lien Wikidata connu ; ceux de la
+    seconde liste appartiennent à un lot en erreur réseau ou refusé même
+    réduit à un seul nom."""
+    session = session or requests.Session()
+    return run_batches(
+        names,
+        lambda batch: _query_batch(session, endpoint, batch, timeout),
+        batch_size,
+    )
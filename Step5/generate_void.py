@@ -1,5 +1,19 @@
-from rdflib import Graph, Namespace, RDF, RDFS, OWL, URIRef, Literal, XSD
-from rdflib.namespace import VOID, DCTERMS
+import argparse
+import hashlib
+import math
+import os
+import sys
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# rdflib (et numpy, via snapshot) ne sont importés que par les fonctions qui
+# s'en servent : `void --help` démarre sans eux
+
+# chemins relatifs à la racine du dépôt : le chemin d'entrée est publié tel
+# quel dans void:dataDump
+INPUT_TTL = "Step4/out_enriched_complete.ttl"
+OUTPUT_TTL = "void.ttl"
 
 local_namespaces = set([
     "http://example.org/nobel/award/",
@@ -21,9 +35,108 @@ vocabularies = set([
 apiLink = "https://api.triplydb.com/datasets/Ijjaziad/laureate-nobel/sparql"
 githubLink = "https://github.com/ahmad-fatayerji/M1-SPARQL"
 
-def generate_void_enriched(input_ttl, output_ttl, dataset_uri, creators):
-    g = Graph()
-    g.parse(input_ttl, format="turtle")
+# --- Comptage approximatif (HyperLogLog) pour les très gros dumps ---
+class HyperLogLog:
+    """Nombre approximatif de valeurs distinctes en 2**p octets de mémoire
+    (erreur relative ~ 1.04 / sqrt(2**p), soit ~0.8% pour p=14)."""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+
+    def add(self, value):
+        h = int.from_bytes(
+            hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        index = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def __len__(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0**-r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            # petite cardinalité : comptage linéaire
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+
+class DistinctCounter:
+    """Ensemble exact, ou HyperLogLog si approximate=True."""
+
+    def __init__(self, approximate=False):
+        self.values = HyperLogLog() if approximate else set()
+
+    def add(self, value):
+        self.values.add(value)
+
+    def __len__(self):
+        return len(self.values)
+
+
+# --- Statistiques en une seule passe sur le flux de triplets ---
+RDF_TYPE = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+OWL_SAMEAS = "<http://www.w3.org/2002/07/owl#sameAs>"
+
+
+def link_domain(iri):
+    """Domaine cible d'un lien owl:sameAs (schéma pour urn:, mailto:...)."""
+    parsed = urlparse(iri)
+    return parsed.netloc or parsed.scheme
+
+
+def compute_statistics(input_file, approximate=False):
+    """Statistiques VoID de input_file, comme len(g) et les requêtes sur
+    un rdflib.Graph : un triplet répété dans le fichier ne compte qu'une fois.
+    En mode approximatif, rien n'est gardé par triplet : l'entrée doit être
+    sans doublons (snapshot, sortie de csv_to_rdf)."""
+    from snapshot import iter_graph
+    from stream_writer import triple_digest
+
+    seen = None if approximate else set()
+    triples = 0
+    subjects = DistinctCounter(approximate)
+    classes = {}  # classe -> sujets distincts de ce type
+    properties = {}  # propriété -> nombre de triplets
+    linksets = {}  # domaine -> nombre de liens owl:sameAs
+
+    # snapshot binaire s'il est à jour, sinon lecture en flux du Turtle
+    for s, p, o in iter_graph(input_file):
+        if seen is not None:
+            # N-Triples du mode flux : un lauréat primé deux fois se répète
+            digest = triple_digest(f"{s} {p} {o}")
+            if digest in seen:
+                continue
+            seen.add(digest)
+        triples += 1
+        subjects.add(s)
+        properties[p] = properties.get(p, 0) + 1
+        if p == RDF_TYPE:
+            if o not in classes:
+                classes[o] = DistinctCounter(approximate)
+            classes[o].add(s)
+        elif p == OWL_SAMEAS and o.startswith("<"):
+            domain = link_domain(o[1:-1])
+            linksets[domain] = linksets.get(domain, 0) + 1
+
+    return {
+        "triples": triples,
+        "entities": len(subjects),
+        "classes": {c[1:-1]: len(n) for c, n in classes.items()},
+        "properties": {p[1:-1]: n for p, n in properties.items()},
+        "linksets": linksets,
+    }
+
+
+def generate_void_enriched(input_ttl, output_ttl, dataset_uri, creators, approximate=False):
+    from rdflib import BNode, Graph, RDF, RDFS, OWL, URIRef, Literal, XSD
+    from rdflib.namespace import VOID, DCTERMS
+
+    stats = compute_statistics(input_ttl, approximate)
     void_graph = Graph()
     
     dataset = URIRef(dataset_uri)
@@ -32,18 +145,12 @@ def generate_void_enriched(input_ttl, output_ttl, dataset_uri, creators):
     void_graph.add((dataset, VOID.sparqlEndpoint, URIRef("https://api.triplydb.com/datasets/Ijjaziad/laureate-nobel/sparql")))
     void_graph.add((dataset, RDFS.seeAlso, URIRef("https://github.com/ahmad-fatayerji/M1-SPARQL")))
 
-    # main statistics
-    triples_count = len(g)
-    classes = set(g.objects(predicate=RDF.type))
-    properties = set(g.predicates())
-    subjects = set(g.subjects())
-
     # main dataset description
     void_graph.add((dataset, RDF.type, VOID.Dataset))
-    void_graph.add((dataset, VOID.triples, Literal(triples_count, datatype=XSD.integer)))
-    void_graph.add((dataset, VOID.entities, Literal(len(subjects), datatype=XSD.integer)))
-    void_graph.add((dataset, VOID.classes, Literal(len(classes), datatype=XSD.integer)))
-    void_graph.add((dataset, VOID.properties, Literal(len(properties), datatype=XSD.integer)))
+    void_graph.add((dataset, VOID.triples, Literal(stats["triples"], datatype=XSD.integer)))
+    void_graph.add((dataset, VOID.entities, Literal(stats["entities"], datatype=XSD.integer)))
+    void_graph.add((dataset, VOID.classes, Literal(len(stats["classes"]), datatype=XSD.integer)))
+    void_graph.add((dataset, VOID.properties, Literal(len(stats["properties"]), datatype=XSD.integer)))
     void_graph.add((dataset, RDFS.label, Literal(f"VoID description of Nobel Prize laureates graph", datatype=XSD.string)))
     void_graph.add((dataset, DCTERMS.created, Literal("2025-11-17", datatype=XSD.date)))
     for creator in creators:
@@ -54,20 +161,25 @@ def generate_void_enriched(input_ttl, output_ttl, dataset_uri, creators):
     for v in vocabularies:
         void_graph.add((dataset, VOID.vocabulary, URIRef(v)))
 
+    # Partitions par classe et par propriété
+    for cls, entities in sorted(stats["classes"].items()):
+        partition = BNode()
+        void_graph.add((dataset, VOID.classPartition, partition))
+        void_graph.add((partition, VOID["class"], URIRef(cls)))
+        void_graph.add((partition, VOID.entities, Literal(entities, datatype=XSD.integer)))
+    for prop, count in sorted(stats["properties"].items()):
+        partition = BNode()
+        void_graph.add((dataset, VOID.propertyPartition, partition))
+        void_graph.add((partition, VOID.property, URIRef(prop)))
+        void_graph.add((partition, VOID.triples, Literal(count, datatype=XSD.integer)))
+
     # Linksets owl:sameAs 
-    sameas_links = list(g.triples((None, OWL.sameAs, None)))
-    linksets = {}
-    for s, _, o in sameas_links:
-        if isinstance(o, URIRef):
-            domain = o.split("/")[2]
-            linksets.setdefault(domain, []).append((s, o))
-
-    for domain, links in linksets.items():
+    for domain, links in stats["linksets"].items():
         linkset_uri = URIRef(f"{dataset_uri}/linkset/{domain}")
         void_graph.add((dataset, VOID.subset, linkset_uri))
         void_graph.add((linkset_uri, RDF.type, VOID.Linkset))
         void_graph.add((linkset_uri, VOID.linkPredicate, OWL.sameAs))
-        void_graph.add((linkset_uri, VOID.triples, Literal(len(links), datatype=XSD.integer)))
+        void_graph.add((linkset_uri, VOID.triples, Literal(links, datatype=XSD.integer)))
         void_graph.add((linkset_uri, VOID.subjectsTarget, dataset))
         void_graph.add((linkset_uri, VOID.objectsTarget, URIRef(f"http://{domain}")))
 
@@ -75,10 +187,25 @@ def generate_void_enriched(input_ttl, output_ttl, dataset_uri, creators):
     void_graph.serialize(output_ttl, format="turtle")
     print(f"VoID enrichi généré dans : {output_ttl}")
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Description VoID du graphe enrichi")
+    parser.add_argument("input", nargs="?", default=INPUT_TTL)
+    parser.add_argument("-o", "--output", default=OUTPUT_TTL)
+    parser.add_argument(
+        "--approximate",
+        action="store_true",
+        # comptes distincts approximatifs (HyperLogLog) pour les très gros dumps
+        help="comptes distincts approximatifs (HyperLogLog)",
+    )
+    args = parser.parse_args()
     generate_void_enriched(
-        input_ttl="Step4/out_enriched_complete.ttl",
-        output_ttl="void.ttl",
+        input_ttl=args.input,
+        output_ttl=args.output,
         dataset_uri="http://example.org/nobel",
-        creators=["Ahmad Fatayerji", "Hugo Piard", "Louis Boulanger", "Ziad Ijja"]
+        creators=["Ahmad Fatayerji", "Hugo Piard", "Louis Boulanger", "Ziad Ijja"],
+        approximate=args.approximate,
     )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import argparse
+import csv
+import os
+import random
+import sys
+
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from converter import CSV_COLUMNS
+
+# Générateur de CSV de lauréats synthétiques, même schéma que
+# nobel-prize-laureates.csv (17 colonnes, séparateur ";").
+#
+# Les valeurs sont tirées du vrai CSV en gardant les n-uplets cohérents
+# (pays / code / ville, organisation / ville / pays) et leurs fréquences :
+# USA, Paris ou Harvard reviennent aussi souvent que dans les vraies données.
+# Une petite part de villes et d'organisations nouvelles est inventée pour
+# que le nombre de valeurs distinctes continue de croître avec la taille.
+
+SOURCE_CSV = os.path.join(ROOT, "nobel-prize-laureates.csv")
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SIZES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+
+NEW_CITY_RATE = 0.02
+NEW_ORG_RATE = 0.02
+ORG_LAUREATE_RATE = 0.03
+
+
+def parse_size(text):
+    if text in SIZES:
+        return SIZES[text]
+    text = text.lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * factor)
+
+
+def size_label(rows):
+    for label, n in SIZES.items():
+        if n == rows:
+            return label
+    return str(rows)
+
+
+class Pools:
+    """Valeurs réelles (avec répétitions) dans lesquelles on tire."""
+
+    def __init__(self, source=SOURCE_CSV):
+        df = pd.read_csv(source, delimiter=";", encoding="utf-8", dtype=str)
+        df = df.fillna("")
+        people = df[df["Gender"] != "org"]
+        self.firstnames = people["Firstname"].tolist()
+        self.surnames = [s for s in people["Surname"] if s]
+        self.genders = people["Gender"].tolist()
+        self.categories = df["Category"].tolist()
+        self.motivations = df["Motivation"].tolist()
+        self.orgs_laureates = df.loc[df["Gender"] == "org", "Firstname"].tolist()
+        self.born = people[["Born", "Born country", "Born country code", "Born city"]]
+        self.born = self.born.values.tolist()
+        self.died = people[["Died", "Died country", "Died country code", "Died city"]]
+        self.died = self.died.values.tolist()
+        self.orgs = people[
+            ["Organization name", "Organization city", "Organization country"]
+        ].values.tolist()
+
+
+def generate_rows(rows, seed=0, pools=None):
+    pools = pools or Pools()
+    rng = random.Random(seed)
+    new_cities = 0
+    new_orgs = 0
+    for i in range(rows):
+        year = str(rng.randint(1901, 2024))
+        category = rng.choice(pools.categories)
+        motivation = rng.choice(pools.motivations)
+        if rng.random() < ORG_LAUREATE_RATE:
+            name = f"{rng.choice(pools.orgs_laureates)} {i}"
+            yield [name] + [""] * 9 + ["org", year, category, motivation, "", "", ""]
+            continue
+
+        born, born_country, born_code, born_city = rng.choice(pools.born)
+        if born_city and rng.random() < NEW_CITY_RATE:
+            new_cities += 1
+            born_city = f"{born_city} {new_cities}"
+        died, died_country, died_code, died_city = rng.choice(pools.died)
+        org, org_city, org_country = rng.choice(pools.orgs)
+        if org and rng.random() < NEW_ORG_RATE:
+            new_orgs += 1
+            org = f"{org} Campus {new_orgs}"
+        # le suffixe garde des lauréats distincts (l'URI vient du nom)
+        yield [
+            rng.choice(pools.firstnames),
+            f"{rng.choice(pools.surnames)} {i}",
+            born,
+            died,
+            born_country,
+            born_code,
+            born_city,
+            died_country,
+            died_code,
+            died_city,
+            rng.choice(pools.genders),
+            year,
+            category,
+            motivation,
+            org,
+            org_city,
+            org_country,
+        ]
+
+
+def write_csv(path, rows, seed=0, pools=None):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        # même écriture que le CSV d'origine : ";" et guillemets au besoin
+        writer = csv.writer(f, delimiter=";", lineterminator="\n")
+        writer.writerow(CSV_COLUMNS)
+        writer.writerows(generate_rows(rows, seed, pools))
+    return path
+
+
+def dataset_path(rows, seed=0):
+    return os.path.join(DATA_DIR, f"laureates-{size_label(rows)}-s{seed}.csv")
+
+
+def ensure_dataset(rows, seed=0, pools=None):
+    """Chemin du CSV synthétique de cette taille, généré s'il n'existe pas."""
+    path = dataset_path(rows, seed)
+    if not os.path.exists(path):
+        write_csv(path, rows, seed, pools)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV de lauréats synthétiques")
+    parser.add_argument("sizes", nargs="*", default=["1k", "100k", "1M"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="fichier de sortie (une seule taille)")
+    args = parser.parse_args()
+
+    pools = Pools()
+    for size in args.sizes:
+        rows = parse_size(size)
+        path = args.output or dataset_path(rows, args.seed)
+        write_csv(path, rows, args.seed, pools)
+        print(f"{rows} lignes -> {path}")
@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+sys.path.insert(0, ROOT)
+
+from converter import (
+    add_prepared_row_triples,
+    add_row_triples,
+    clear_caches,
+    iter_records,
+    prepare_frame,
+    record_from_row,
+)
+from generate_data import Pools, ensure_dataset, parse_size, size_label
+
+# Coût par ligne de la boucle du converter, hors lecture du CSV et hors
+# insertion dans un graphe (les triplets vont dans un puits qui les compte) :
+#
+#   series    df.iterrows() puis LaureateRecord depuis chaque pandas.Series
+#             (coût de l'ancien accès row.get(...) par ligne)
+#   records   iter_records : un LaureateRecord par ligne, lu colonne par colonne
+#   prepared  prepare_frame + add_prepared_row_triples (mode vectorisé)
+#
+# Chaque mode est mesuré à froid (caches de normalisation vidés) puis à chaud,
+# meilleur temps de --repeat passes.
+
+MODES = ("series", "records", "prepared")
+
+
+class CountingSink:
+    def __init__(self):
+        self.triples = 0
+
+    def add(self, triple):
+        self.triples += 1
+
+
+def run_series(df, sink):
+    for _, row in df.iterrows():
+        r = record_from_row(row)
+        if r is not None:
+            add_row_triples(sink, r)
+
+
+def run_records(df, sink):
+    for r in iter_records(df):
+        add_row_triples(sink, r)
+
+
+def run_prepared(df, sink):
+    for r in prepare_frame(df).itertuples(index=False):
+        add_prepared_row_triples(sink, r)
+
+
+RUNNERS = {"series": run_series, "records": run_records, "prepared": run_prepared}
+
+
+def measure(df, mode, repeat, warm):
+    best = None
+    for _ in range(repeat):
+        if not warm:
+            clear_caches()
+        sink = CountingSink()
+        start = time.perf_counter()
+        RUNNERS[mode](df, sink)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, sink.triples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coût par ligne du converter")
+    parser.add_argument("sizes", nargs="*", default=["20k"], help="ex. 1k 100k")
+    parser.add_argument("--csv", help="CSV à mesurer au lieu des CSV générés")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="résultats en JSON")
+    args = parser.parse_args()
+
+    if args.csv:
+        datasets = [args.csv]
+    else:
+        pools = Pools()
+        datasets = [ensure_dataset(parse_size(s), args.seed, pools) for s in args.sizes]
+
+    results = []
+    for path in datasets:
+        df = pd.read_csv(path, delimiter=";", encoding="utf-8")
+        for mode in args.modes:
+            for warm in (False, True):
+                seconds, triples = measure(df, mode, args.repeat, warm)
+                results.append(
+                    {
+                        "csv": os.path.basename(path),
+                        "rows": len(df),
+                        "mode": mode,
+                        "caches": "chaud" if warm else "froid",
+                        "seconds": round(seconds, 4),
+                        "us_per_row": round(1e6 * seconds / len(df), 1),
+                        "triples": triples,
+                    }
+                )
+                r = results[-1]
+                print(
+                    f"{size_label(r['rows']):>5} {mode:<9} {r['caches']:<6}"
+                    f"{r['us_per_row']:>8.1f} µs/ligne  ({triples} triplets)"
+                )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
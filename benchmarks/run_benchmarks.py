@@ -0,0 +1,243 @@
+import argparse
+import contextlib
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+from rdflib import Graph
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Step4"))
+sys.path.insert(0, os.path.join(ROOT, "Step5"))
+
+from converter import (
+    add_prepared_row_triples,
+    add_row_triples,
+    bind_namespaces,
+    csv_to_rdf_stream,
+    iter_records,
+    prepare_frame,
+)
+from generate_data import Pools, ensure_dataset, parse_size, size_label
+
+# Mesure chaque étape du pipeline CSV -> RDF -> enrichissement -> VoID sur des
+# CSV synthétiques (generate_data.py) et écrit les résultats en JSON.
+#
+# Chaque étape est d'abord chronométrée seule, puis rejouée sous tracemalloc
+# pour le pic mémoire (tracemalloc ralentit beaucoup : les deux mesures ne
+# sont jamais mélangées). --no-memory saute la deuxième passe.
+
+RESULTS_DIR = os.path.join(HERE, "results")
+STAGES = ("read_csv", "build_graph", "serialize", "stream_nt", "void", "enrichment")
+
+
+def measure(fn, memory=True):
+    """(résultat, secondes, pic mémoire en octets ou None)."""
+    gc.collect()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def build_graph(df, vectorized):
+    g = Graph()
+    bind_namespaces(g)
+    if vectorized:
+        for r in prepare_frame(df).itertuples(index=False):
+            add_prepared_row_triples(g, r)
+    else:
+        for r in iter_records(df):
+            add_row_triples(g, r)
+    return g
+
+
+def person_names(df, limit):
+    # mêmes noms de ressources que Step4 (Prénom_Nom)
+    people = df[df["Gender"] != "org"].dropna(subset=["Firstname", "Surname"])
+    names = (people["Firstname"] + "_" + people["Surname"]).str.replace(" ", "_")
+    return list(dict.fromkeys(names))[:limit]
+
+
+def run_enrichment(names, latency, concurrency):
+    from async_enrichment import enrich_resources
+    from mock_dbpedia import serve_in_thread
+
+    # une ressource sur deux existe côté DBpedia
+    server, base = serve_in_thread(known=names[::2], latency=latency)
+    try:
+        result = enrich_resources(
+            names,
+            dbpedia_base=base,
+            sparql_endpoint=base + "/sparql",
+            concurrency=concurrency,
+            rate=0,
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+    return result
+
+
+def bench_size(rows, args, pools):
+    from generate_void import generate_void_enriched
+
+    csv_path = ensure_dataset(rows, args.seed, pools)
+    results = []
+
+    def record(stage, fn, items=None):
+        if stage not in args.stages:
+            return None
+        print(f"  {size_label(rows)} {stage}...", flush=True)
+        result, seconds, peak = measure(fn, not args.no_memory)
+        count = items(result) if items else rows
+        entry = {
+            "size": rows,
+            "stage": stage,
+            "seconds": round(seconds, 4),
+            "peak_memory_mb": None if peak is None else round(peak / 2**20, 2),
+            "items": count,
+            "items_per_second": round(count / seconds, 1) if seconds else None,
+        }
+        results.append(entry)
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ttl_path = os.path.join(tmp, "out.ttl")
+
+        def read():
+            return pd.read_csv(csv_path, delimiter=";", encoding="utf-8")
+
+        df = record("read_csv", read)
+        if df is None:
+            df = read()
+
+        g = record(
+            "build_graph", lambda: build_graph(df, args.vectorized), items=len
+        )
+        if g is None and ("serialize" in args.stages or "void" in args.stages):
+            g = build_graph(df, args.vectorized)
+        if g is not None:
+            record(
+                "serialize",
+                lambda: g.serialize(destination=ttl_path, format="turtle"),
+                items=lambda _: len(g),
+            )
+            if not os.path.exists(ttl_path):
+                g.serialize(destination=ttl_path, format="turtle")
+            triples = len(g)
+            del g
+
+        record(
+            "stream_nt",
+            lambda: csv_to_rdf_stream(
+                csv_path, os.path.join(tmp, "out.nt"), snapshot=False
+            ),
+        )
+        if os.path.exists(ttl_path):
+            record(
+                "void",
+                lambda: generate_void_enriched(
+                    ttl_path,
+                    os.path.join(tmp, "void.ttl"),
+                    "http://example.org/nobel",
+                    ["benchmark"],
+                ),
+                items=lambda _: triples,
+            )
+        names = person_names(df, args.enrich_limit)
+        record(
+            "enrichment",
+            lambda: run_enrichment(names, args.latency, args.concurrency),
+            items=lambda _: len(names),
+        )
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline Nobel RDF")
+    parser.add_argument("sizes", nargs="*", default=["1k"], help="ex. 1k 100k 1M")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--vectorized", action="store_true")
+    parser.add_argument("--no-memory", action="store_true", help="pas de tracemalloc")
+    parser.add_argument("--enrich-limit", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.01, help="mock DBpedia (s)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("-o", "--output", help="fichier JSON (défaut : results/)")
+    args = parser.parse_args()
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    report = {
+        "created": now.isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "options": {
+            "seed": args.seed,
+            "vectorized": args.vectorized,
+            "memory": not args.no_memory,
+            "enrich_limit": args.enrich_limit,
+            "latency": args.latency,
+            "concurrency": args.concurrency,
+        },
+        "results": [],
+    }
+    pools = Pools()
+    for size in args.sizes:
+        report["results"].extend(bench_size(parse_size(size), args, pools))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench-{now.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for r in report["results"]:
+        memory = "" if r["peak_memory_mb"] is None else f", pic {r['peak_memory_mb']} Mo"
+        print(
+            f"{size_label(r['size']):>5} {r['stage']:<12} {r['seconds']:>9.3f}s "
+            f"({r['items_per_second']}/s{memory})"
+        )
+    print(f"Résultats : {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+NOBEL = os.path.join(ROOT, "nobel.py")
+
+# Temps de démarrage de chaque sous-commande de nobel.py : `--help` mesure
+# l'import du module et la construction de l'argparse, sans aucun travail.
+# Chaque mesure est un nouveau processus Python (le meilleur de --repeat), à
+# comparer avec `python -c pass`.
+
+COMMANDS = (
+    "convert",
+    "enrich persons",
+    "enrich others",
+    "validate",
+    "void",
+    "query",
+    "serve",
+    "search",
+)
+
+
+def startup(argv, repeat):
+    """Meilleur temps (secondes) de repeat lancements de argv."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Démarrage des sous-commandes")
+    parser.add_argument("commands", nargs="*", default=list(COMMANDS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max",
+        type=float,
+        metavar="SECONDES",
+        help="code de sortie 1 si une sous-commande démarre plus lentement",
+    )
+    parser.add_argument("-o", "--output", help="résultats en JSON")
+    args = parser.parse_args()
+
+    results = {
+        "python -c pass": startup([sys.executable, "-c", "pass"], args.repeat),
+        "nobel.py --help": startup([sys.executable, NOBEL, "--help"], args.repeat),
+    }
+    for command in args.commands:
+        argv = [sys.executable, NOBEL, *command.split(), "--help"]
+        results[command] = startup(argv, args.repeat)
+
+    for name, seconds in results.items():
+        print(f"{name:<16} {1000 * seconds:>7.0f} ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({k: round(v, 4) for k, v in results.items()}, f, indent=2)
+    slow = [c for c in args.commands if args.max and results[c] > args.max]
+    if slow:
+        sys.exit(f"démarrage au-delà de {args.max}s : {', '.join(slow)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import argparse
+import os
+
+import pandas as pd
+
+# Export en colonnes (Parquet ou Arrow IPC) du graphe des lauréats, pour les
+# analyses agrégées (lauréates par pays, prix par catégorie et décennie...)
+# sans passer par SPARQL sur le Turtle. Les tables sont construites à partir
+# des mêmes lignes normalisées que le RDF (converter.prepare_frame) : mêmes
+# URI (dont les dbr: résolues), mêmes valeurs, une ligne par combinaison de
+# triplets distincts.
+#
+#   awards        award, recipient, year, category, motivation
+#   persons       person, given_name, family_name, birth_date, death_date,
+#                 gender, birth_place, death_place
+#   organizations organization, name, place
+#   affiliations  person, organization
+#   places        place, label, city, country
+#
+# Les colonnes d'URI et de libellés répétés sont des catégories pandas,
+# écrites en colonnes dictionnaire (Parquet / Arrow) : un group-by par pays
+# ou par catégorie se fait sur des codes entiers. pyarrow n'est nécessaire
+# que pour écrire ou relire les fichiers.
+
+SUFFIX = ".tables"
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+TABLES = ("awards", "persons", "organizations", "affiliations", "places")
+# colonnes de texte libre, gardées en chaînes ; toutes les autres sont
+# dictionnaire
+TEXT_COLUMNS = {"motivation", "given_name", "family_name", "birth_date", "death_date"}
+
+
+def tables_path(source):
+    return os.path.splitext(source)[0] + SUFFIX
+
+
+def _uri(series):
+    # URIRef / None -> str / NA
+    return series.map(lambda u: None if u is None else str(u)).astype("string")
+
+
+def _text(series):
+    return series.astype("string").mask(series == "")
+
+
+def _finish(df):
+    df = df.drop_duplicates(ignore_index=True)
+    for name in df.columns:
+        if name not in TEXT_COLUMNS and not pd.api.types.is_numeric_dtype(df[name]):
+            df[name] = df[name].astype("string").astype("category")
+    return df
+
+
+def build_tables(prepared):
+    """Tables d'un DataFrame issu de converter.prepare_frame.
+
+    Mêmes règles que add_prepared_row_triples : année et catégorie "unknown"
+    absentes, genre seulement male / female, lieux et affiliations seulement
+    pour les personnes."""
+    p = prepared
+    year = p["year"].where(p["year"] != "unknown")
+    awards = pd.DataFrame(
+        {
+            "award": _uri(p["award_uri"]),
+            "recipient": _uri(p["laureate_uri"]),
+            "year": pd.to_numeric(year, errors="coerce").astype("Int16"),
+            "category": _text(p["category"].where(p["category"] != "unknown", "")),
+            "motivation": p["motivation"].astype("string"),
+        }
+    )
+
+    persons_rows = p[~p["is_org"]]
+    gender = persons_rows["gender"]
+    gender = gender.where(gender.str.lower().isin(["male", "female"]), "")
+    persons = pd.DataFrame(
+        {
+            "person": _uri(persons_rows["laureate_uri"]),
+            "given_name": _text(persons_rows["firstname"]),
+            "family_name": _text(persons_rows["surname"]),
+            "birth_date": _text(persons_rows["born"]),
+            "death_date": _text(persons_rows["died"]),
+            "gender": _text(gender),
+            "birth_place": _uri(persons_rows["birth_place"]),
+            "death_place": _uri(persons_rows["death_place"]),
+        }
+    )
+
+    org_rows = p[p["is_org"]]
+    org_names = org_rows["firstname"].where(
+        org_rows["firstname"] != "", org_rows["surname"]
+    )
+    affiliated = persons_rows[persons_rows["org_uri"].notna()]
+    organizations = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "organization": _uri(org_rows["laureate_uri"]),
+                    "name": _text(org_names),
+                    "place": pd.Series(pd.NA, index=org_rows.index, dtype="string"),
+                }
+            ),
+            pd.DataFrame(
+                {
+                    "organization": _uri(affiliated["org_uri"]),
+                    "name": _text(affiliated["org_name"]),
+                    "place": _uri(affiliated["org_place"]),
+                }
+            ),
+        ],
+        ignore_index=True,
+    )
+    affiliations = pd.DataFrame(
+        {
+            "person": _uri(affiliated["laureate_uri"]),
+            "organization": _uri(affiliated["org_uri"]),
+        }
+    )
+
+    places = []
+    for rows, prefix in (
+        (persons_rows, "birth"),
+        (persons_rows, "death"),
+        (affiliated, "org"),
+    ):
+        rows = rows[rows[f"{prefix}_place"].notna()]
+        places.append(
+            pd.DataFrame(
+                {
+                    "place": _uri(rows[f"{prefix}_place"]),
+                    "label": rows[f"{prefix}_label"].astype("string"),
+                    "city": _uri(rows[f"{prefix}_city"]),
+                    "country": _uri(rows[f"{prefix}_country"]),
+                }
+            )
+        )
+    places = pd.concat(places, ignore_index=True)
+
+    tables = {
+        "awards": awards,
+        "persons": persons,
+        "organizations": organizations,
+        "affiliations": affiliations,
+        "places": places,
+    }
+    return {name: _finish(df) for name, df in tables.items()}
+
+
+def concat_tables(parts):
+    """Tables de plusieurs chunks (conversion en flux) réunies en une seule."""
+    tables = {}
+    for name in TABLES:
+        frames = [part[name] for part in parts]
+        # catégories différentes d'un chunk à l'autre : recodées par _finish
+        tables[name] = _finish(pd.concat(frames, ignore_index=True))
+    return tables
+
+
+def require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "l'export Parquet / Arrow demande pyarrow (pip install pyarrow)"
+        )
+
+
+def write_tables(tables, directory, fmt="parquet"):
+    """Écrit une table par fichier dans directory (<table>.parquet ou .arrow)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format inconnu : {fmt!r} ({', '.join(FORMATS)})")
+    require_pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    for name, df in tables.items():
+        path = os.path.join(directory, name + FORMATS[fmt])
+        tmp = path + ".tmp"
+        if fmt == "parquet":
+            df.to_parquet(tmp, index=False)
+        else:
+            df.to_feather(tmp)
+        os.replace(tmp, path)
+    return directory
+
+
+def read_tables(directory):
+    """{nom: DataFrame} des tables écrites par write_tables."""
+    require_pyarrow()
+    tables = {}
+    for name in TABLES:
+        for fmt, ext in FORMATS.items():
+            path = os.path.join(directory, name + ext)
+            if os.path.exists(path):
+                reader = pd.read_parquet if fmt == "parquet" else pd.read_feather
+                tables[name] = reader(path)
+                break
+    return tables
+
+
+def laureates_by_country(tables, gender=None):
+    """Nombre de lauréats distincts par pays de naissance (libellé du lieu),
+    comme les comptes par pays de queryFinal.sparql."""
+    persons = tables["persons"]
+    if gender is not None:
+        persons = persons[persons["gender"] == gender]
+    places = tables["places"].drop_duplicates("place")
+    born = persons.merge(
+        places[["place", "label"]], left_on="birth_place", right_on="place"
+    )
+    counts = born.groupby("label", observed=True)["person"].nunique()
+    return counts.sort_values(ascending=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tables en colonnes des lauréats")
+    parser.add_argument("directory", nargs="?", default=tables_path("out.ttl"))
+    parser.add_argument(
+        "--gender", help="male / female : lauréats par pays de naissance"
+    )
+    args = parser.parse_args()
+
+    tables = read_tables(args.directory)
+    for name, df in tables.items():
+        print(f"{name:<14} {len(df):>6} lignes  {', '.join(df.columns)}")
+    if args.gender:
+        print(laureates_by_country(tables, args.gender).to_string())
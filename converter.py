@@ -1,10 +1,31 @@
+import argparse
+import functools
+import hashlib
+import heapq
+import json
 import os
-from urllib.parse import quote
+import sys
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote, unquote
 
 import pandas as pd
 from rdflib import RDF, RDFS, Graph, Literal, Namespace, URIRef
 from rdflib.namespace import FOAF, XSD
 
+from columnar import (
+    build_tables,
+    concat_tables,
+    require_pyarrow,
+    tables_path,
+    write_tables,
+)
+from instrumentation import start_run
+from snapshot import write_file_snapshot, write_graph_snapshot
+from stream_writer import nt_line, open_writer, triple_digest
+from text_index import SearchIndex, index_path
+
 # --- Mapping manuel pour les pays avec noms historiques / abréviations ---
 COUNTRY_URI_MAP = {
     "U.S.A.": "United States",
@@ -108,8 +129,95 @@ CITY_URI_MAP = {
     # Non finis car trop de villes dans le fichier
 }
 
+# Colonnes du CSV (cf. CommentCaMarche.txt)
+CSV_COLUMNS = [
+    "Firstname",
+    "Surname",
+    "Born",
+    "Died",
+    "Born country",
+    "Born country code",
+    "Born city",
+    "Died country",
+    "Died country code",
+    "Died city",
+    "Gender",
+    "Year",
+    "Category",
+    "Motivation",
+    "Organization name",
+    "Organization city",
+    "Organization country",
+]
+
+# --- Namespaces du graphe ---
+SCHEMA = Namespace("http://schema.org/")
+DBO = Namespace("http://dbpedia.org/ontology/")
+DBR = Namespace("http://dbpedia.org/resource/")
+NOBEL = Namespace("http://example.org/nobel/")
+PLACE_NS = Namespace("http://example.org/nobel/place/")
+ORG_NS = Namespace("http://example.org/nobel/organization/")
+
+
+def bind_namespaces(g):
+    g.bind("foaf", FOAF)
+    g.bind("dbo", DBO)
+    g.bind("dbr", DBR)
+    g.bind("nobel", NOBEL)
+    g.bind("place", PLACE_NS)
+    g.bind("organization", ORG_NS)
+    g.bind("schema", SCHEMA)
+
+
+# --- Cache des normalisations ---
+# Les mêmes pays, villes et organisations reviennent des milliers de fois :
+# chaque valeur distincte n'est normalisée (et son URIRef construite)
+# qu'une seule fois. Les chaînes renvoyées sont internées.
+NORMALIZATION_CACHE_SIZE = int(os.environ.get("CONVERTER_CACHE_SIZE", 65536))
+_CACHED_FUNCTIONS = []
+
+
+def memoized(func):
+    @functools.lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
+    @functools.wraps(func)
+    def wrapper(*args):
+        result = func(*args)
+        return sys.intern(result) if type(result) is str else result
+
+    _CACHED_FUNCTIONS.append(wrapper)
+    return wrapper
+
+
+def cache_stats() -> dict:
+    """Compteurs hits / misses de chaque fonction mise en cache."""
+    stats = {}
+    for func in _CACHED_FUNCTIONS:
+        info = func.cache_info()
+        calls = info.hits + info.misses
+        stats[func.__name__] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "hit_rate": round(info.hits / calls, 4) if calls else 0.0,
+        }
+    return stats
+
+
+def clear_caches():
+    for func in _CACHED_FUNCTIONS:
+        func.cache_clear()
+
+
+def print_cache_stats():
+    for name, st in cache_stats().items():
+        print(
+            f"  {name:<26} hits={st['hits']:<8} misses={st['misses']:<8} "
+            f"taux={st['hit_rate']:.1%}"
+        )
+
 
 # --- Fonctions utilitaires ---
+@memoized
 def safe_uri_component(value: str) -> str:
     return quote(value.strip().replace(" ", "_"))
 
@@ -124,14 +232,66 @@ def normalize_country_text(value) -> str:
     return normalize_text(value).replace(".", "").replace("  ", " ")
 
 
+# --- Réconciliation optionnelle des lieux (reconcile.py) ---
+# Avec CONVERTER_GAZETTEER (ou use_gazetteer), les villes et pays absents
+# des deux dictionnaires ci-dessus sont résolus dans un gazetteer local au
+# lieu de l'URI naïve. Sans gazetteer la sortie ne change pas.
+_gazetteer = None
+_gazetteer_path = None
+_gazetteer_loaded = False
+
+
+def _load_gazetteer(path):
+    global _gazetteer, _gazetteer_path, _gazetteer_loaded
+    if path is None:
+        _gazetteer = None
+    else:
+        from reconcile import load_gazetteer
+
+        _gazetteer = load_gazetteer(path)
+    _gazetteer_path = path
+    _gazetteer_loaded = True
+
+
+def use_gazetteer(path):
+    """Active (ou désactive avec None) la réconciliation par gazetteer."""
+    _load_gazetteer(path)
+    clear_caches()  # les URI déjà calculées peuvent changer
+
+
+def gazetteer():
+    if not _gazetteer_loaded:
+        # premier appel, depuis une normalisation en cours : rien n'a encore
+        # été réconcilié, les caches (et leurs compteurs) restent valides
+        _load_gazetteer(os.environ.get("CONVERTER_GAZETTEER") or None)
+    return _gazetteer
+
+
+@memoized
+def reconciled_uri(value: str) -> str:
+    """IRI trouvée dans le gazetteer pour value, ou None."""
+    match = gazetteer().resolve(value) if value and gazetteer() else None
+    if match is None:
+        return None
+    if match.iri.startswith(DBR):
+        # gazetteer brut (Göttingen) ou déjà encodé (G%C3%B6ttingen) : même
+        # encodage que les URI des dictionnaires
+        return str(DBR) + safe_uri_component(unquote(match.iri[len(DBR) :]))
+    return match.iri
+
+
+@memoized
 def normalize_country_to_uri(country: str, dbpedia_res: Namespace) -> URIRef:
     c = normalize_country_text(country)
     if not c:
         return None
     if c in COUNTRY_URI_MAP:
         return URIRef(dbpedia_res + safe_uri_component(COUNTRY_URI_MAP[c]))
+    if reconciled_uri(c):
+        return URIRef(reconciled_uri(c))
     return URIRef(dbpedia_res + safe_uri_component(c))
 
+@memoized
 def normalize_country(country: str) -> str:
     c = normalize_text(country)
     if not c:
@@ -142,219 +302,888 @@ def normalize_country(country: str) -> str:
         return c
 
 
+@memoized
 def normalize_city_to_uri(city: str, dbpedia_res: Namespace) -> URIRef:
     c = normalize_text(city)
     if not c:
         return None
     if c in CITY_URI_MAP:
         return URIRef(dbpedia_res + CITY_URI_MAP[c])
+    if reconciled_uri(c):
+        return URIRef(reconciled_uri(c))
     return URIRef(dbpedia_res + safe_uri_component(c))
 
 
-# --- Construction des URI ---
-def create_laureate_uri(row, nobel_ns, org_ns):
-    firstname = normalize_text(row.get("Firstname"))
-    surname = normalize_text(row.get("Surname"))
-    gender = normalize_text(row.get("Gender")).lower()
-
-    has_name = bool(firstname or surname)
-    if not has_name:
-        return None, False, ""
-
-    is_org = gender == "org"
-    display_name = (
-        firstname
-        if is_org and firstname
-        else (
-            f"{firstname} {surname}".strip()
-            if firstname and surname
-            else (firstname or surname)
-        )
-    )
+# --- Mode ligne par ligne : un enregistrement normalisé par ligne du CSV ---
+# Chaque ligne est lue une seule fois en LaureateRecord : champs normalisés,
+# URI du lauréat et du prix déjà construites. Les fonctions add_*_triples ne
+# font ensuite que lire des attributs, sans accès à une pandas.Series ni
+# normalisation répétée.
+RECORD_COLUMNS = (
+    "Firstname",
+    "Surname",
+    "Gender",
+    "Born",
+    "Died",
+    "Year",
+    "Category",
+    "Motivation",
+    "Born city",
+    "Born country",
+    "Died city",
+    "Died country",
+    "Organization name",
+    "Organization city",
+    "Organization country",
+)
+
+LaureateRecord = namedtuple(
+    "LaureateRecord",
+    "laureate_uri is_org name firstname surname gender born died "
+    "award_uri year category motivation born_city born_country "
+    "died_city died_country org_name org_city org_country",
+)
+
+
+def make_record(
+    firstname,
+    surname,
+    gender,
+    born,
+    died,
+    year,
+    category,
+    motivation,
+    born_city,
+    born_country,
+    died_city,
+    died_country,
+    org_name,
+    org_city,
+    org_country,
+):
+    """LaureateRecord des valeurs brutes d'une ligne (ordre de RECORD_COLUMNS),
+    ou None si la ligne n'a pas de nom."""
+    firstname = normalize_text(firstname)
+    surname = normalize_text(surname)
+    if not (firstname or surname):
+        return None
+    gender = normalize_text(gender)
+    is_org = gender.lower() == "org"
 
     name_for_uri = (
         f"{firstname}_{surname}" if firstname and surname else (firstname or surname)
     )
     name_enc = safe_uri_component(name_for_uri)
-
     if is_org:
-        return URIRef(org_ns + name_enc), True, display_name
-    return URIRef(nobel_ns + f"person/{name_enc}"), False, display_name
+        laureate_uri = URIRef(ORG_NS + name_enc)
+        name = firstname or surname
+    else:
+        laureate_uri = URIRef(NOBEL + f"person/{name_enc}")
+        name = f"{firstname} {surname}".strip()
+
+    year = normalize_text(year) or "unknown"
+    category = normalize_text(category) or "unknown"
+    motivation = normalize_text(motivation).replace('"', "") or "unknown"
+    award_name = safe_uri_component(f"{firstname}_{surname}".strip("_") or "unknown")
+    award_uri = URIRef(
+        NOBEL
+        + f"award/{award_name}_{safe_uri_component(year)}_"
+        + safe_uri_component(category)
+    )
+
+    return LaureateRecord(
+        laureate_uri,
+        is_org,
+        name,
+        firstname,
+        surname,
+        gender,
+        normalize_text(born),
+        normalize_text(died),
+        award_uri,
+        year,
+        category,
+        motivation,
+        normalize_text(born_city),
+        normalize_country_text(born_country),
+        normalize_text(died_city),
+        normalize_country_text(died_country),
+        normalize_text(org_name),
+        normalize_text(org_city),
+        normalize_country_text(org_country),
+    )
+
+
+def record_from_row(row):
+    """LaureateRecord d'une ligne déjà lue (pandas.Series ou dict)."""
+    return make_record(*(row.get(c) for c in RECORD_COLUMNS))
+
+
+def iter_records(df):
+    """LaureateRecord de chaque ligne nommée d'un DataFrame du CSV, colonne
+    par colonne plutôt que par df.iterrows()."""
+    columns = [column(df, c).tolist() for c in RECORD_COLUMNS]
+    for values in zip(*columns):
+        r = make_record(*values)
+        if r is not None:
+            yield r
+
+
+def index_record(index, r):
+    """Document de recherche (text_index.SearchIndex) d'un LaureateRecord,
+    identique à celui de SearchIndex.add_frame pour la même ligne."""
+    index.add(
+        str(r.award_uri),
+        str(r.laureate_uri),
+        r.name,
+        "" if r.motivation == "unknown" else r.motivation,
+        r.category,
+        r.year,
+        r.gender.lower(),
+        "" if r.is_org else normalize_country(r.born_country),
+        r.org_name,
+    )
 
 
 # --- Ajout des triplets RDF ---
-def add_laureate_triples(g, laureate_uri, row, is_org, schema):
-    firstname = normalize_text(row.get("Firstname"))
-    surname = normalize_text(row.get("Surname"))
-    born = normalize_text(row.get("Born"))
-    died = normalize_text(row.get("Died"))
-    gender = normalize_text(row.get("Gender"))
+def add_laureate_triples(g, r):
+    laureate_uri = r.laureate_uri
 
-    if is_org:
-        g.add((laureate_uri, RDF.type, schema.Organization))
-        if firstname or surname:
-            g.add(
-                (
-                    laureate_uri,
-                    FOAF.name,
-                    Literal(firstname or surname, datatype=XSD.string),
-                )
-            )
+    if r.is_org:
+        g.add((laureate_uri, RDF.type, SCHEMA.Organization))
+        g.add((laureate_uri, FOAF.name, Literal(r.name, datatype=XSD.string)))
     else:
         g.add((laureate_uri, RDF.type, FOAF.Person))
-        if firstname:
+        if r.firstname:
+            g.add(
+                (laureate_uri, FOAF.givenName, Literal(r.firstname, datatype=XSD.string))
+            )
+        if r.surname:
             g.add(
-                (laureate_uri, FOAF.givenName, Literal(firstname, datatype=XSD.string))
+                (laureate_uri, FOAF.familyName, Literal(r.surname, datatype=XSD.string))
             )
-        if surname:
+        if r.born:
+            g.add((laureate_uri, SCHEMA.birthDate, Literal(r.born, datatype=XSD.date)))
+        if r.died:
+            g.add((laureate_uri, SCHEMA.deathDate, Literal(r.died, datatype=XSD.date)))
+        if r.gender.lower() in {"male", "female"}:
             g.add(
-                (laureate_uri, FOAF.familyName, Literal(surname, datatype=XSD.string))
+                (laureate_uri, SCHEMA.gender, Literal(r.gender, datatype=XSD.string))
             )
-        if born:
-            g.add((laureate_uri, schema.birthDate, Literal(born, datatype=XSD.date)))
-        if died:
-            g.add((laureate_uri, schema.deathDate, Literal(died, datatype=XSD.date)))
-        if gender.lower() in {"male", "female"}:
-            g.add((laureate_uri, schema.gender, Literal(gender, datatype=XSD.string)))
 
 
-def add_place_triples(
-    g, subject_uri, city, country, predicate, place_ns, dbo, dbr, schema
-):
+def add_place_triples(g, subject_uri, city, country, predicate):
     if not city and not country:
         return
 
     place_id = safe_uri_component(f"{city}_{country}")
-    place_uri = URIRef(place_ns + place_id)
+    place_uri = URIRef(PLACE_NS + place_id)
     g.add((subject_uri, predicate, place_uri))
-    g.add((place_uri, RDF.type, schema.Place))
+    g.add((place_uri, RDF.type, SCHEMA.Place))
     g.add((place_uri, RDFS.label, Literal(normalize_country(country), lang="en"))) # country label
 
     if city:
-        city_uri = normalize_city_to_uri(city, dbr)
+        city_uri = normalize_city_to_uri(city, DBR)
         if city_uri:
-            g.add((place_uri, dbo.city, city_uri))
+            g.add((place_uri, DBO.city, city_uri))
     if country:
-        country_uri = normalize_country_to_uri(country, dbr)
+        country_uri = normalize_country_to_uri(country, DBR)
         if country_uri:
-            g.add((place_uri, dbo.country, country_uri))
-            
+            g.add((place_uri, DBO.country, country_uri))
 
 
-def add_award_triples(g, laureate_uri, row, nobel_ns, schema):
-    year = normalize_text(row.get("Year")) or "unknown"
-    category = normalize_text(row.get("Category")) or "unknown"
-    motivation = normalize_text(row.get("Motivation")).replace('"', "") or "unknown"
+def add_award_triples(g, r):
+    award_uri = r.award_uri
+    g.add((award_uri, RDF.type, SCHEMA.Award))
+    if r.year != "unknown":
+        g.add((award_uri, SCHEMA.awardDate, Literal(r.year, datatype=XSD.gYear)))
+    if r.category != "unknown":
+        g.add((award_uri, SCHEMA.category, Literal(r.category, datatype=XSD.string)))
+    g.add((award_uri, SCHEMA.description, Literal(r.motivation, lang="en")))
+    g.add((award_uri, SCHEMA.recipient, r.laureate_uri))
 
-    year_enc = safe_uri_component(year)
-    category_enc = safe_uri_component(category)
-    name_for_uri = safe_uri_component(
-        f"{normalize_text(row.get('Firstname'))}_{normalize_text(row.get('Surname'))}".strip(
-            "_"
-        )
-        or "unknown"
+
+def add_organization_triples(g, r):
+    if not r.org_name:
+        return
+
+    org_uri = URIRef(ORG_NS + safe_uri_component(r.org_name))
+    g.add((r.laureate_uri, SCHEMA.affiliation, org_uri))
+    g.add((org_uri, RDF.type, SCHEMA.Organization))
+    g.add((org_uri, FOAF.name, Literal(r.org_name)))
+    add_place_triples(g, org_uri, r.org_city, r.org_country, SCHEMA.location)
+
+
+# --- Mode vectorisé : normalisation colonne par colonne ---
+# Même logique que les fonctions ci-dessus, mais appliquée à des colonnes
+# pandas entières. Les fonctions purement Python (quote, URIRef) ne sont
+# appelées qu'une fois par valeur distincte.
+def map_unique(series, func):
+    uniques = series.unique()
+    return series.map(dict(zip(uniques, map(func, uniques))))
+
+
+def column(df, name):
+    if name in df.columns:
+        return df[name]
+    return pd.Series("", index=df.index)
+
+
+def normalize_column(series):
+    missing = series.isna()
+    return series.astype(str).str.strip().mask(missing, "")
+
+
+def normalize_country_column(series):
+    return (
+        normalize_column(series)
+        .str.replace(".", "", regex=False)
+        .str.replace("  ", " ", regex=False)
+    )
+
+
+def safe_uri_column(series):
+    return map_unique(
+        series.str.strip().str.replace(" ", "_", regex=False), quote
+    )
+
+
+def uri_column(series):
+    # "" -> None, sinon URIRef (construit une seule fois par valeur)
+    uris = series.map({v: URIRef(v) for v in series.unique() if v}).astype(object)
+    return uris.where(uris.notna(), None)
+
+
+def place_columns(city, country):
+    has_place = (city != "") | (country != "")
+    place_uri = str(PLACE_NS) + safe_uri_column(city + "_" + country)
+
+    label = country.str.strip()
+    label = label.map(COUNTRY_URI_MAP).fillna(label)
+
+    c = city.str.strip()
+    mapped = c.map(CITY_URI_MAP)
+    city_uri = str(DBR) + mapped.fillna(safe_uri_column(c))
+    if gazetteer() is not None:
+        reconciled = map_unique(c, reconciled_uri).where(mapped.isna())
+        city_uri = reconciled.fillna(city_uri)
+
+    k = normalize_country_column(country)
+    mapped = k.map(COUNTRY_URI_MAP)
+    country_uri = str(DBR) + safe_uri_column(mapped.fillna(k))
+    if gazetteer() is not None:
+        reconciled = map_unique(k, reconciled_uri).where(mapped.isna())
+        country_uri = reconciled.fillna(country_uri)
+
+    return (
+        uri_column(place_uri.where(has_place, "")),
+        label,
+        uri_column(city_uri.where(c != "", "")),
+        uri_column(country_uri.where(k != "", "")),
+    )
+
+
+def prepare_frame(df):
+    """Normalise et encode toutes les colonnes d'un DataFrame du CSV.
+
+    Renvoie un DataFrame avec une ligne par lauréat, prête pour
+    add_prepared_row_triples.
+    """
+    firstname = normalize_column(column(df, "Firstname"))
+    surname = normalize_column(column(df, "Surname"))
+    gender = normalize_column(column(df, "Gender"))
+    is_org = gender.str.lower() == "org"
+
+    both = (firstname != "") & (surname != "")
+    name_for_uri = (firstname + "_" + surname).where(both, firstname + surname)
+    name_enc = safe_uri_column(name_for_uri)
+    laureate_uri = (str(NOBEL) + "person/" + name_enc).where(
+        ~is_org, str(ORG_NS) + name_enc
+    )
+    has_name = (firstname != "") | (surname != "")
+
+    year = normalize_column(column(df, "Year"))
+    year = year.mask(year == "", "unknown")
+    category = normalize_column(column(df, "Category"))
+    category = category.mask(category == "", "unknown")
+    motivation = normalize_column(column(df, "Motivation")).str.replace(
+        '"', "", regex=False
+    )
+    motivation = motivation.mask(motivation == "", "unknown")
+    award_name = (firstname + "_" + surname).str.strip("_")
+    award_name = award_name.mask(award_name == "", "unknown")
+    award_uri = (
+        str(NOBEL)
+        + "award/"
+        + safe_uri_column(award_name)
+        + "_"
+        + safe_uri_column(year)
+        + "_"
+        + safe_uri_column(category)
     )
 
-    award_uri = URIRef(nobel_ns + f"award/{name_for_uri}_{year_enc}_{category_enc}")
-    g.add((award_uri, RDF.type, schema.Award))
-    if year and year != "unknown":
-        g.add((award_uri, schema.awardDate, Literal(year, datatype=XSD.gYear)))
-    if category and category != "unknown":
-        g.add((award_uri, schema.category, Literal(category, datatype=XSD.string)))
-    if motivation:
-        g.add((award_uri, schema.description, Literal(motivation, lang="en")))
-    g.add((award_uri, schema.recipient, laureate_uri))
+    birth = place_columns(
+        normalize_column(column(df, "Born city")),
+        normalize_country_column(column(df, "Born country")),
+    )
+    death = place_columns(
+        normalize_column(column(df, "Died city")),
+        normalize_country_column(column(df, "Died country")),
+    )
+
+    org_name = normalize_column(column(df, "Organization name"))
+    org_uri = (str(ORG_NS) + safe_uri_column(org_name)).where(org_name != "", "")
+    org_place = place_columns(
+        normalize_column(column(df, "Organization city")),
+        normalize_country_column(column(df, "Organization country")),
+    )
 
+    prepared = pd.DataFrame(
+        {
+            "laureate_uri": uri_column(laureate_uri.where(has_name, "")),
+            "is_org": is_org,
+            "firstname": firstname,
+            "surname": surname,
+            "born": normalize_column(column(df, "Born")),
+            "died": normalize_column(column(df, "Died")),
+            "gender": gender,
+            "award_uri": uri_column(award_uri),
+            "year": year,
+            "category": category,
+            "motivation": motivation,
+            "birth_place": birth[0],
+            "birth_label": birth[1],
+            "birth_city": birth[2],
+            "birth_country": birth[3],
+            "death_place": death[0],
+            "death_label": death[1],
+            "death_city": death[2],
+            "death_country": death[3],
+            "org_uri": uri_column(org_uri),
+            "org_name": org_name,
+            "org_place": org_place[0],
+            "org_label": org_place[1],
+            "org_city": org_place[2],
+            "org_country": org_place[3],
+        }
+    )
+    return prepared[has_name]
 
-def add_organization_triples(g, laureate_uri, row, org_ns, place_ns, dbo, dbr, schema):
-    org_name = normalize_text(row.get("Organization name"))
-    org_city = normalize_text(row.get("Organization city"))
-    org_country = normalize_country_text(row.get("Organization country"))
 
-    if not org_name:
+def add_prepared_place_triples(
+    g, subject_uri, predicate, place_uri, label, city_uri, country_uri
+):
+    if place_uri is None:
+        return
+    g.add((subject_uri, predicate, place_uri))
+    g.add((place_uri, RDF.type, SCHEMA.Place))
+    g.add((place_uri, RDFS.label, Literal(label, lang="en")))
+    if city_uri is not None:
+        g.add((place_uri, DBO.city, city_uri))
+    if country_uri is not None:
+        g.add((place_uri, DBO.country, country_uri))
+
+
+def add_prepared_row_triples(g, r):
+    """Ajoute les triplets d'une ligne issue de prepare_frame."""
+    laureate_uri = r.laureate_uri
+
+    if r.is_org:
+        g.add((laureate_uri, RDF.type, SCHEMA.Organization))
+        g.add(
+            (
+                laureate_uri,
+                FOAF.name,
+                Literal(r.firstname or r.surname, datatype=XSD.string),
+            )
+        )
+    else:
+        g.add((laureate_uri, RDF.type, FOAF.Person))
+        if r.firstname:
+            g.add(
+                (laureate_uri, FOAF.givenName, Literal(r.firstname, datatype=XSD.string))
+            )
+        if r.surname:
+            g.add(
+                (laureate_uri, FOAF.familyName, Literal(r.surname, datatype=XSD.string))
+            )
+        if r.born:
+            g.add((laureate_uri, SCHEMA.birthDate, Literal(r.born, datatype=XSD.date)))
+        if r.died:
+            g.add((laureate_uri, SCHEMA.deathDate, Literal(r.died, datatype=XSD.date)))
+        if r.gender.lower() in {"male", "female"}:
+            g.add(
+                (laureate_uri, SCHEMA.gender, Literal(r.gender, datatype=XSD.string))
+            )
+
+    award_uri = r.award_uri
+    g.add((award_uri, RDF.type, SCHEMA.Award))
+    if r.year != "unknown":
+        g.add((award_uri, SCHEMA.awardDate, Literal(r.year, datatype=XSD.gYear)))
+    if r.category != "unknown":
+        g.add((award_uri, SCHEMA.category, Literal(r.category, datatype=XSD.string)))
+    g.add((award_uri, SCHEMA.description, Literal(r.motivation, lang="en")))
+    g.add((award_uri, SCHEMA.recipient, laureate_uri))
+
+    if r.is_org:
         return
 
-    org_id = safe_uri_component(org_name)
-    org_uri = URIRef(org_ns + org_id)
-    g.add((laureate_uri, schema.affiliation, org_uri))
-    g.add((org_uri, RDF.type, schema.Organization))
-    g.add((org_uri, FOAF.name, Literal(org_name)))
+    add_prepared_place_triples(
+        g, laureate_uri, SCHEMA.birthPlace,
+        r.birth_place, r.birth_label, r.birth_city, r.birth_country,
+    )
+    add_prepared_place_triples(
+        g, laureate_uri, SCHEMA.deathPlace,
+        r.death_place, r.death_label, r.death_city, r.death_country,
+    )
+    if r.org_uri is not None:
+        g.add((laureate_uri, SCHEMA.affiliation, r.org_uri))
+        g.add((r.org_uri, RDF.type, SCHEMA.Organization))
+        g.add((r.org_uri, FOAF.name, Literal(r.org_name)))
+        add_prepared_place_triples(
+            g, r.org_uri, SCHEMA.location,
+            r.org_place, r.org_label, r.org_city, r.org_country,
+        )
 
-    if org_city or org_country:
+
+def add_row_triples(g, r):
+    """Ajoute tous les triplets d'un LaureateRecord (mode ligne par ligne)."""
+    add_laureate_triples(g, r)
+    add_award_triples(g, r)
+
+    if not r.is_org:
+        laureate_uri = r.laureate_uri
+        add_place_triples(
+            g, laureate_uri, r.born_city, r.born_country, SCHEMA.birthPlace
+        )
         add_place_triples(
-            g,
-            org_uri,
-            org_city,
-            org_country,
-            schema.location,
-            place_ns,
-            dbo,
-            dbr,
-            schema,
+            g, laureate_uri, r.died_city, r.died_country, SCHEMA.deathPlace
         )
+        add_organization_triples(g, r)
 
 
 # --- Fonction principale ---
-def csv_to_rdf(csv_file, output_ttl=None):
+# Fonctions chronométrées quand l'instrumentation est active (CONVERTER_PROFILE
+# ou profile=...). Temps inclusifs : add_organization_triples compte aussi
+# l'appel à add_place_triples pour le lieu de l'organisation, mais chaque
+# triplet n'est attribué qu'à la fonction qui l'a ajouté.
+ROW_HELPERS = (
+    "add_laureate_triples",
+    "add_award_triples",
+    "add_place_triples",
+    "add_organization_triples",
+)
+PREPARED_HELPERS = ("add_prepared_row_triples", "add_prepared_place_triples")
+
+
+def csv_to_rdf(
+    csv_file,
+    output_ttl=None,
+    vectorized=False,
+    snapshot=True,
+    search_index=True,
+    tables=None,
+    profile=None,
+):
+    """tables : None, "parquet" ou "arrow" pour écrire aussi les tables en
+    colonnes (columnar.py, demande pyarrow) dans out.tables/."""
     if output_ttl is None:
         output_ttl = os.path.splitext(csv_file)[0] + ".ttl"
+    if tables:
+        require_pyarrow()  # avant la conversion plutôt qu'après
+    run = start_run("csv_to_rdf", profile)
 
-    df = pd.read_csv(csv_file, delimiter=";", encoding="utf-8")
+    with run.stage("read_csv"):
+        df = pd.read_csv(csv_file, delimiter=";", encoding="utf-8")
     g = Graph()
+    bind_namespaces(g)
+    sink = run.sink(g)
+
+    prepared = None
+    index = SearchIndex() if search_index else None
+    if vectorized or tables:
+        with run.stage("prepare_frame"):
+            prepared = prepare_frame(df)
+    if vectorized:
+        # toute la normalisation est faite par colonnes, la boucle
+        # ne fait plus qu'émettre les triplets
+        with run.stage("row_loop"), run.hooks(globals(), PREPARED_HELPERS):
+            for r in prepared.itertuples(index=False):
+                add_prepared_row_triples(sink, r)
+        if index is not None:
+            index.add_frame(prepared)
+    else:
+        # l'index est rempli avec les enregistrements de la boucle : chaque
+        # ligne n'est normalisée qu'une fois
+        with run.stage("row_loop"), run.hooks(globals(), ROW_HELPERS):
+            for r in iter_records(df):
+                add_row_triples(sink, r)
+                if index is not None:
+                    index_record(index, r)
 
-    schema = Namespace("http://schema.org/")
-    dbo = Namespace("http://dbpedia.org/ontology/")
-    dbr = Namespace("http://dbpedia.org/resource/")
-    nobel = Namespace("http://example.org/nobel/")
-    place_ns = Namespace("http://example.org/nobel/place/")
-    org_ns = Namespace("http://example.org/nobel/organization/")
+    with run.stage("serialize"):
+        g.serialize(destination=output_ttl, format="turtle")
+    print(f"Conversion terminée. Fichier TTL sauvegardé : {output_ttl}")
+    if snapshot:
+        # rechargement rapide pour Step4 / Step5 / request.py
+        with run.stage("snapshot"):
+            path = write_graph_snapshot(g, output_ttl)
+        print(f"Snapshot binaire : {path}")
+    if index is not None:
+        # recherche plein texte / facettes sans charger le graphe
+        with run.stage("search_index"):
+            path = index.write(index_path(output_ttl))
+        print(f"Index de recherche : {path}")
+    if tables:
+        with run.stage("tables"):
+            path = write_tables(build_tables(prepared), tables_path(output_ttl), tables)
+        print(f"Tables en colonnes : {path}")
+    if run.enabled:
+        run.finish(rows=len(df), triples=len(g))
 
-    g.bind("foaf", FOAF)
-    g.bind("dbo", dbo)
-    g.bind("dbr", dbr)
-    g.bind("nobel", nobel)
-    g.bind("place", place_ns)
-    g.bind("organization", org_ns)
-    g.bind("schema", schema)
 
+def csv_to_rdf_stream(
+    csv_file,
+    output=None,
+    fmt="nt",
+    chunksize=5000,
+    vectorized=True,
+    snapshot=True,
+    search_index=True,
+    tables=None,
+    profile=None,
+):
+    """Conversion en flux : le CSV est lu par chunks et les triplets sont
+    écrits sur disque au fur et à mesure (mémoire bornée par la taille
+    d'un chunk + l'ensemble des triplets partagés déjà vus)."""
+    if output is None:
+        output = os.path.splitext(csv_file)[0] + (".nt" if fmt == "nt" else ".ttl")
+    if tables:
+        require_pyarrow()
+    run = start_run("csv_to_rdf_stream", profile)
+    helpers = PREPARED_HELPERS if vectorized else ROW_HELPERS
+
+    # lieux et organisations reviennent sur des centaines de lignes ; un
+    # lauréat primé plusieurs fois répète seulement ses propres triplets
+    # (doublons sans effet sur le graphe), ce qui ne justifie pas un
+    # ensemble de vus qui grandirait avec le nombre de lauréats
+    shared = (PLACE_NS, ORG_NS)
+    index = SearchIndex() if search_index else None
+    table_parts = []
+    with open_writer(output, fmt, dedup_prefixes=shared) as w, run.hooks(
+        globals(), helpers
+    ):
+        bind_namespaces(w)
+        w.bind("rdfs", RDFS)
+        sink = run.sink(w)
+        chunks = iter(
+            pd.read_csv(csv_file, delimiter=";", encoding="utf-8", chunksize=chunksize)
+        )
+        while True:
+            with run.stage("read_csv"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            run.count("rows", len(chunk))
+            if vectorized or tables:
+                with run.stage("prepare_frame"):
+                    prepared = prepare_frame(chunk)
+            if vectorized and index is not None:
+                with run.stage("search_index"):
+                    index.add_frame(prepared)
+            if tables:
+                with run.stage("tables"):
+                    table_parts.append(build_tables(prepared))
+            if vectorized:
+                with run.stage("row_loop"):
+                    for r in prepared.itertuples(index=False):
+                        add_prepared_row_triples(sink, r)
+            else:
+                with run.stage("row_loop"):
+                    for r in iter_records(chunk):
+                        add_row_triples(sink, r)
+                        if index is not None:
+                            index_record(index, r)
+            with run.stage("serialize"):
+                w.flush()
+
+    print(
+        f"Conversion terminée ({w.written} triplets, {w.duplicates} doublons ignorés). "
+        f"Fichier sauvegardé : {output}"
+    )
+    if snapshot:
+        with run.stage("snapshot"):
+            path = write_file_snapshot(output)
+        print(f"Snapshot binaire : {path}")
+    if index is not None:
+        with run.stage("search_index"):
+            path = index.write(index_path(output))
+        print(f"Index de recherche : {path}")
+    if tables:
+        with run.stage("tables"):
+            path = write_tables(concat_tables(table_parts), tables_path(output), tables)
+        print(f"Tables en colonnes : {path}")
+    if run.enabled:
+        run.finish(triples=w.written, duplicates=w.duplicates)
+
+
+# --- Mode parallèle : conversion par chunks dans un pool de processus ---
+class _LineSink:
+    # "graphe" minimal : garde les lignes N-Triples distinctes
+    def __init__(self):
+        self.lines = set()
+
+    def add(self, triple):
+        self.lines.add(nt_line(triple))
+
+
+def _init_worker(gazetteer_path):
+    # le gazetteer est rechargé dans chaque processus : sous spawn (macOS,
+    # Windows), un worker ne voit ni --gazetteer ni use_gazetteer du parent
+    use_gazetteer(gazetteer_path)
+
+
+def _convert_chunk(chunk, shard_path):
+    sink = _LineSink()
+    for r in iter_records(chunk):
+        add_row_triples(sink, r)
+    with open(shard_path, "w", encoding="utf-8") as f:
+        f.writelines(sorted(sink.lines))
+    return shard_path
+
+
+def _merge_shards(shard_paths, output):
+    # fusion k-voies des shards triés : les entités partagées (lieux,
+    # organisations) émises par plusieurs chunks n'apparaissent qu'une fois
+    files = [open(path, encoding="utf-8") for path in shard_paths]
+    count = 0
+    try:
+        with open(output, "w", encoding="utf-8") as out:
+            previous = None
+            for line in heapq.merge(*files):
+                if line != previous:
+                    out.write(line)
+                    count += 1
+                    previous = line
+    finally:
+        for f in files:
+            f.close()
+    return count
+
+
+def csv_to_rdf_parallel(
+    csv_file, output=None, fmt="nt", workers=None, chunksize=2000, snapshot=True
+):
+    """Conversion multi-processus. Le CSV est découpé en plages de lignes,
+    chaque plage est convertie dans un processus puis les shards sont
+    fusionnés. La sortie N-Triples est triée : elle est identique octet
+    pour octet quel que soit le nombre de workers ou la taille des chunks."""
+    if output is None:
+        output = os.path.splitext(csv_file)[0] + (".nt" if fmt == "nt" else ".ttl")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    elif workers < 1:
+        raise ValueError(f"workers doit être >= 1 (reçu : {workers})")
+    gazetteer()  # CONVERTER_GAZETTEER résolu ici, transmis aux workers
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shard_paths = []
+        chunks = pd.read_csv(
+            csv_file, delimiter=";", encoding="utf-8", chunksize=chunksize
+        )
+        if workers == 1:
+            for i, chunk in enumerate(chunks):
+                shard_paths.append(
+                    _convert_chunk(chunk, os.path.join(tmp, f"shard-{i:06d}.nt"))
+                )
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(_gazetteer_path,),
+            ) as pool:
+                pending = []
+                for i, chunk in enumerate(chunks):
+                    path = os.path.join(tmp, f"shard-{i:06d}.nt")
+                    pending.append(pool.submit(_convert_chunk, chunk, path))
+                    # pas plus de 2 chunks en attente par worker
+                    if len(pending) >= 2 * workers:
+                        shard_paths.append(pending.pop(0).result())
+                shard_paths.extend(f.result() for f in pending)
+
+        if fmt == "nt":
+            count = _merge_shards(shard_paths, output)
+        else:
+            merged = os.path.join(tmp, "merged.nt")
+            count = _merge_shards(shard_paths, merged)
+            g = Graph()
+            bind_namespaces(g)
+            g.parse(merged, format="nt")
+            g.serialize(destination=output, format="turtle")
+
+    print(
+        f"Conversion terminée ({count} triplets, {workers} workers). "
+        f"Fichier sauvegardé : {output}"
+    )
+    if snapshot:
+        print(f"Snapshot binaire : {write_file_snapshot(output)}")
+
+
+# --- Mode incrémental : ne ré-émettre que les lignes modifiées ---
+# Le manifeste (à côté de la sortie) garde pour chaque ligne son empreinte
+# et les empreintes des triplets qu'elle produit. Un triplet partagé
+# (lieu, organisation...) n'est retiré que si plus aucune ligne ne le
+# produit. Il garde aussi les réglages du converter (converter_config) :
+# s'ils ont changé, tout est reconverti.
+class _TripleSink:
+    def __init__(self):
+        self.triples = []
+
+    def add(self, triple):
+        self.triples.append(triple)
+
+
+def row_fingerprint(row) -> str:
+    values = "\x1f".join(normalize_text(row.get(c)) for c in CSV_COLUMNS)
+    return hashlib.sha1(values.encode("utf-8")).hexdigest()
+
+
+def row_key(row) -> str:
+    # identité d'une ligne = identité du prix
+    fields = ("Firstname", "Surname", "Year", "Category")
+    return "|".join(normalize_text(row.get(c)) for c in fields)
+
+
+def row_triples(row):
+    sink = _TripleSink()
+    r = record_from_row(row)
+    if r is not None:
+        add_row_triples(sink, r)
+    return sink.triples
+
+
+def read_manifest(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def converter_config():
+    """Réglages du converter qui changent les triplets d'une ligne sans
+    changer son empreinte : aujourd'hui, le gazetteer (chemin, taille, date)."""
+    gazetteer()  # CONVERTER_GAZETTEER résolu ici
+    if _gazetteer_path is None:
+        return {"gazetteer": None}
+    st = os.stat(_gazetteer_path)
+    return {
+        "gazetteer": {
+            "path": os.path.abspath(_gazetteer_path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+    }
+
+
+def write_manifest(path, rows, config):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"version": 2, "columns": CSV_COLUMNS, "config": config, "rows": rows}, f
+        )
+
+
+def csv_to_rdf_incremental(
+    csv_file, output_ttl=None, manifest_path=None, snapshot=True
+):
+    if output_ttl is None:
+        output_ttl = os.path.splitext(csv_file)[0] + ".ttl"
+    if manifest_path is None:
+        manifest_path = output_ttl + ".manifest.json"
+
+    df = pd.read_csv(csv_file, delimiter=";", encoding="utf-8")
+    new_rows = {}
     for _, row in df.iterrows():
-        laureate_uri, is_org, _ = create_laureate_uri(row, nobel, org_ns)
-        if not laureate_uri:
-            continue
+        key = row_key(row)
+        # lignes en double : on numérote les occurrences
+        n = 1
+        while f"{key}#{n}" in new_rows:
+            n += 1
+        new_rows[f"{key}#{n}"] = (row_fingerprint(row), row)
 
-        add_laureate_triples(g, laureate_uri, row, is_org, schema)
-        add_award_triples(g, laureate_uri, row, nobel, schema)
+    manifest = read_manifest(manifest_path)
+    config = converter_config()
+    if manifest is not None and manifest.get("config") != config:
+        # lignes inchangées mais URI des lieux peut-être différentes
+        print("Réglages du converter modifiés (gazetteer) : reconstruction complète")
+        manifest = None
+    if manifest is None or not os.path.exists(output_ttl):
+        old_rows = {}
+        g = Graph()
+    else:
+        old_rows = manifest["rows"]
+        g = Graph()
+        g.parse(output_ttl, format="turtle")
+    bind_namespaces(g)
 
-        if not is_org:
-            add_place_triples(
-                g,
-                laureate_uri,
-                normalize_text(row.get("Born city")),
-                normalize_country_text(row.get("Born country")),
-                schema.birthPlace,
-                place_ns,
-                dbo,
-                dbr,
-                schema,
-            )
-            add_place_triples(
-                g,
-                laureate_uri,
-                normalize_text(row.get("Died city")),
-                normalize_country_text(row.get("Died country")),
-                schema.deathPlace,
-                place_ns,
-                dbo,
-                dbr,
-                schema,
-            )
-            add_organization_triples(
-                g, laureate_uri, row, org_ns, place_ns, dbo, dbr, schema
-            )
+    added = [k for k in new_rows if k not in old_rows]
+    removed = [k for k in old_rows if k not in new_rows]
+    changed = [
+        k for k in new_rows if k in old_rows and old_rows[k]["fp"] != new_rows[k][0]
+    ]
 
-    g.serialize(destination=output_ttl, format="turtle")
-    print(f"Conversion terminée. Fichier TTL sauvegardé : {output_ttl}")
+    refcounts = {}
+    for entry in old_rows.values():
+        for d in entry["triples"]:
+            refcounts[d] = refcounts.get(d, 0) + 1
+
+    # retraits : lignes supprimées et anciennes versions des lignes modifiées
+    to_retract = set()
+    for k in removed + changed:
+        for d in old_rows[k]["triples"]:
+            refcounts[d] -= 1
+            if refcounts[d] == 0:
+                to_retract.add(d)
+
+    rows = {k: v for k, v in old_rows.items() if k not in removed}
+    for k in added + changed:
+        fp, row = new_rows[k]
+        digests = []
+        for triple in row_triples(row):
+            d = triple_digest(nt_line(triple)).hex()
+            digests.append(d)
+            refcounts[d] = refcounts.get(d, 0) + 1
+            to_retract.discard(d)
+            g.add(triple)
+        rows[k] = {"fp": fp, "triples": digests}
+
+    if to_retract:
+        for triple in list(g):
+            if triple_digest(nt_line(triple)).hex() in to_retract:
+                g.remove(triple)
+
+    if added or removed or changed or manifest is None:
+        g.serialize(destination=output_ttl, format="turtle")
+        if snapshot:
+            write_graph_snapshot(g, output_ttl)
+    write_manifest(manifest_path, rows, config)
+    print(
+        f"Conversion incrémentale : {len(added)} ajoutées, {len(removed)} supprimées, "
+        f"{len(changed)} modifiées, {len(to_retract)} triplets retirés. "
+        f"Fichier TTL : {output_ttl}"
+    )
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def main():
+    # options analysées par converter_cli.py, sans pandas ni rdflib
+    import converter_cli
+
+    converter_cli.main()
 
 
 if __name__ == "__main__":
-    csv_to_rdf("nobel-prize-laureates.csv", "out.ttl")
+    # converter_cli importe converter : une seule copie du module (caches,
+    # gazetteer) quand le converter est lancé en script
+    sys.modules.setdefault("converter", sys.modules[__name__])
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import os
+
+# Options de `python converter.py` / `python nobel.py convert`. Le module
+# n'importe ni pandas ni rdflib : `convert --help` et une erreur d'option
+# répondent sans charger le converter, importé seulement une fois les
+# options validées.
+
+
+def positive_int(value):
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"au moins 1 (reçu : {value})")
+    return n
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Conversion du CSV des lauréats en RDF")
+    parser.add_argument("csv", nargs="?", default="nobel-prize-laureates.csv")
+    parser.add_argument(
+        "output", nargs="?", help="out.ttl par défaut (out.nt avec --stream nt)"
+    )
+    parser.add_argument(
+        "--vectorized",
+        action="store_true",
+        help="normalisation par colonnes pandas (sortie identique)",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--stream",
+        nargs="?",
+        const="nt",
+        choices=("nt", "turtle"),
+        help="conversion en flux par chunks, sans Graph en mémoire",
+    )
+    mode.add_argument(
+        "--workers",
+        nargs="?",
+        type=positive_int,
+        const=os.cpu_count() or 1,
+        metavar="N",
+        help="conversion sur N processus (sans N : tous les cœurs)",
+    )
+    mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="ne reconvertit que les lignes modifiées depuis le dernier lancement",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="1",
+        choices=("1", "cprofile", "pyinstrument"),
+        help="instrumentation (équivalent de CONVERTER_PROFILE)",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="hits / misses des caches de normalisation (affichés avec --profile)",
+    )
+    parser.add_argument(
+        "--gazetteer",
+        metavar="FICHIER",
+        help="réconciliation des lieux (équivalent de CONVERTER_GAZETTEER)",
+    )
+    parser.add_argument(
+        "--tables",
+        nargs="?",
+        const="parquet",
+        choices=("parquet", "arrow"),
+        help="tables en colonnes dans out.tables/",
+    )
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    whole_file = args.workers or args.incremental
+    if whole_file and (args.vectorized or args.tables or args.profile):
+        parser.error(
+            "--vectorized, --tables et --profile ne s'appliquent pas à --workers "
+            "ni à --incremental"
+        )
+    output = args.output or ("out.nt" if args.stream == "nt" else "out.ttl")
+
+    import converter
+
+    if args.gazetteer:
+        converter.use_gazetteer(args.gazetteer)
+    if args.stream:
+        converter.csv_to_rdf_stream(
+            args.csv,
+            output,
+            fmt=args.stream,
+            vectorized=args.vectorized,
+            tables=args.tables,
+            profile=args.profile,
+        )
+    elif args.workers:
+        fmt = "nt" if output.endswith(".nt") else "turtle"
+        converter.csv_to_rdf_parallel(args.csv, output, fmt=fmt, workers=args.workers)
+    elif args.incremental:
+        converter.csv_to_rdf_incremental(args.csv, output)
+    else:
+        converter.csv_to_rdf(
+            args.csv,
+            output,
+            vectorized=args.vectorized,
+            tables=args.tables,
+            profile=args.profile,
+        )
+    if args.cache_stats or args.profile:
+        print("Cache des normalisations :")
+        converter.print_cache_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import time
+
+import requests
+
+from sparql_engine import SparqlUnsupported, Term
+
+# Exécution des SERVICE distants pour sparql_engine.py.
+#
+# Le groupe d'un SERVICE (avec ce que le moteur y a poussé : VALUES des
+# variables déjà liées, FILTER IN des clés de jointure) est réécrit en texte
+# SPARQL, envoyé à l'endpoint, et la réponse JSON est gardée sur disque
+# (SERVICE_CACHE, une entrée par endpoint + requête, durée de vie TTL).
+# La jointure avec le reste de la requête est faite en local, par hachage.
+#
+# Pour développer sans réseau, un endpoint peut être remplacé par un
+# "stand-in" : un fichier local (évalué par le moteur) ou l'URL d'un
+# endpoint local, par exemple `python sparql_server.py --data donnees.ttl`.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.environ.get(
+    "NOBEL_SERVICE_CACHE", os.path.join(ROOT, "service_cache")
+)
+DEFAULT_TTL = 24 * 3600
+TIMEOUT = 60
+
+
+class ServiceError(SparqlUnsupported):
+    pass
+
+
+# --- réécriture en texte SPARQL ---
+def term_text(term):
+    kind, value = term
+    return f"?{value}" if kind == "var" else value
+
+
+def expr_text(expr):
+    kind = expr[0]
+    if kind in ("var", "const"):
+        return term_text(expr)
+    if kind == "or":
+        return f"({expr_text(expr[1])} || {expr_text(expr[2])})"
+    if kind == "and":
+        return f"({expr_text(expr[1])} && {expr_text(expr[2])})"
+    if kind == "not":
+        return f"!({expr_text(expr[1])})"
+    if kind in ("cmp", "arith"):
+        return f"({expr_text(expr[2])} {expr[1]} {expr_text(expr[3])})"
+    if kind == "neg":
+        return f"-({expr_text(expr[1])})"
+    if kind == "pos":
+        return f"+({expr_text(expr[1])})"
+    if kind == "in":
+        options = ", ".join(expr_text(o) for o in expr[2])
+        return f"({expr_text(expr[1])} {'NOT IN' if expr[3] else 'IN'} ({options}))"
+    if kind == "exists":
+        return f"{'NOT ' if expr[2] else ''}EXISTS {{ {group_text(expr[1])} }}"
+    if kind == "agg":
+        _, name, distinct, arg, separator = expr
+        inner = "*" if arg is None else expr_text(arg)
+        if distinct:
+            inner = "DISTINCT " + inner
+        if name == "GROUP_CONCAT":
+            inner += f"; SEPARATOR={json.dumps(separator, ensure_ascii=False)}"
+        return f"{name}({inner})"
+    if kind == "call":
+        name = expr[1]
+        name = f"<{name}>" if ":" in name else name
+        return f"{name}({', '.join(expr_text(a) for a in expr[2])})"
+    raise SparqlUnsupported(f"expression non réécrite : {kind}")
+
+
+def values_text(variables, rows):
+    head = " ".join(f"?{v}" for v in variables)
+    body = " ".join(
+        "(" + " ".join("UNDEF" if x is None else x for x in row) + ")" for row in rows
+    )
+    return f"VALUES ({head}) {{ {body} }}"
+
+
+def group_text(elements):
+    if len(elements) == 1 and elements[0][0] == "subquery":
+        # { SELECT ... } : les accolades sont celles du groupe englobant
+        return query_text(elements[0][1])
+    parts = []
+    for element in elements:
+        kind = element[0]
+        if kind == "bgp":
+            parts.extend(" ".join(map(term_text, p)) + " ." for p in element[1])
+        elif kind == "filter":
+            parts.append(f"FILTER({expr_text(element[1])})")
+        elif kind == "bind":
+            parts.append(f"BIND({expr_text(element[1])} AS ?{element[2]})")
+        elif kind == "optional":
+            parts.append(f"OPTIONAL {{ {group_text(element[1])} }}")
+        elif kind == "union":
+            parts.append(" UNION ".join(f"{{ {group_text(b)} }}" for b in element[1]))
+        elif kind == "group":
+            parts.append(f"{{ {group_text(element[1])} }}")
+        elif kind == "subquery":
+            parts.append(f"{{ {query_text(element[1])} }}")
+        elif kind == "minus":
+            parts.append(f"MINUS {{ {group_text(element[1])} }}")
+        elif kind == "values":
+            parts.append(values_text(*element[1]))
+        elif kind == "service":
+            _, endpoint, group, silent = element
+            silent = "SILENT " if silent else ""
+            parts.append(
+                f"SERVICE {silent}{term_text(endpoint)} {{ {group_text(group)} }}"
+            )
+        elif kind == "graph":
+            name, group = element[1], element[2]
+            parts.append(f"GRAPH {term_text(name)} {{ {group_text(group)} }}")
+    return "\n".join(parts)
+
+
+def query_text(q):
+    if q.projection is None:
+        projection = "*"
+    else:
+        projection = " ".join(
+            f"?{var}" if expr is None else f"({expr_text(expr)} AS ?{var})"
+            for var, expr in q.projection
+        )
+    text = f"SELECT {'DISTINCT ' if q.distinct else ''}{projection} WHERE {{\n"
+    text += group_text(q.where) + "\n}"
+    if q.group_by:
+        keys = []
+        for expr, var in q.group_by:
+            if var is not None and expr == ("var", var):
+                keys.append(f"?{var}")
+            elif var is not None:
+                keys.append(f"({expr_text(expr)} AS ?{var})")
+            else:
+                keys.append(f"({expr_text(expr)})")
+        text += " GROUP BY " + " ".join(keys)
+    if q.having:
+        text += " HAVING " + " ".join(f"({expr_text(e)})" for e in q.having)
+    if q.order_by:
+        keys = [
+            f"{'DESC' if desc else 'ASC'}({expr_text(e)})" for e, desc in q.order_by
+        ]
+        text += " ORDER BY " + " ".join(keys)
+    if q.limit is not None:
+        text += f" LIMIT {q.limit}"
+    if q.offset:
+        text += f" OFFSET {q.offset}"
+    if q.values is not None:
+        text += " " + values_text(*q.values)
+    return text
+
+
+def service_query(elements):
+    return "SELECT * WHERE {\n" + group_text(elements) + "\n}"
+
+
+# --- résultats JSON ---
+def binding_nt(binding):
+    kind = binding["type"]
+    if kind == "uri":
+        return Term("iri", binding["value"]).nt()
+    if kind == "bnode":
+        return Term("bnode", binding["value"]).nt()
+    return Term(
+        "literal", binding["value"], binding.get("xml:lang"), binding.get("datatype")
+    ).nt()
+
+
+def parse_results(data):
+    variables = data.get("head", {}).get("vars", [])
+    rows = [
+        {var: binding_nt(b) for var, b in binding.items()}
+        for binding in data.get("results", {}).get("bindings", [])
+    ]
+    return variables, rows
+
+
+# --- cache disque ---
+class ServiceCache:
+    """Une entrée JSON par (endpoint, requête), valable ttl secondes."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, endpoint, text):
+        key = hashlib.sha1(f"{endpoint}\n{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, endpoint, text):
+        path = self.path(endpoint, text)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if entry.get("created", 0) + self.ttl < time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["rows"]
+
+    def set(self, endpoint, text, rows):
+        path = self.path(endpoint, text)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            "endpoint": endpoint,
+            "query": text,
+            "created": time.time(),
+            "rows": rows,
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+class Federation:
+    """Exécute les SERVICE non locaux pour l'Evaluator.
+
+    endpoints : {iri du SERVICE: URL à interroger à la place} (stand-ins) ;
+    offline=True : seulement le cache, jamais de requête réseau."""
+
+    def __init__(
+        self,
+        endpoints=None,
+        cache_dir=DEFAULT_CACHE_DIR,
+        ttl=DEFAULT_TTL,
+        timeout=TIMEOUT,
+        offline=False,
+    ):
+        self.endpoints = dict(endpoints or {})
+        self.cache = ServiceCache(cache_dir, ttl) if cache_dir else None
+        self.timeout = timeout
+        self.offline = offline
+        self.session = requests.Session()
+        self.requests = 0
+
+    def select(self, iri, elements):
+        """Solutions (dicts de termes N-Triples) du groupe elements sur iri."""
+        url = self.endpoints.get(iri, iri)
+        text = service_query(elements)
+        rows = self.cache.get(url, text) if self.cache else None
+        if rows is not None:
+            return rows
+        if self.offline:
+            raise ServiceError(f"SERVICE <{iri}> absent du cache (mode hors ligne)")
+        self.requests += 1
+        try:
+            r = self.session.post(
+                url,
+                data={"query": text},
+                headers={"Accept": "application/sparql-results+json"},
+                timeout=self.timeout,
+            )
+            r.raise_for_status()
+            _, rows = parse_results(r.json())
+        except (requests.RequestException, ValueError) as e:
+            raise ServiceError(f"SERVICE <{iri}> : {e}")
+        if self.cache:
+            self.cache.set(url, text, rows)
+        return rows
+
+    def summary(self):
+        if not self.cache:
+            return f"services : {self.requests} requêtes"
+        return (
+            f"services : {self.requests} requêtes, cache {self.cache.hits} hits / "
+            f"{self.cache.misses} misses"
+        )
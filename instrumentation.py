@@ -0,0 +1,266 @@
+import contextlib
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+# Instrumentation optionnelle du converter : durée de chaque étape, compteurs
+# (lignes, appels à add et triplets nouveaux par fonction add_*), pic de RSS
+# et, au besoin, un profil
+# cProfile ou pyinstrument. Activée par CONVERTER_PROFILE (ou profile=...) :
+#
+#   CONVERTER_PROFILE=1            minuteurs + compteurs + RSS
+#   CONVERTER_PROFILE=cprofile     idem + dump cProfile (.prof)
+#   CONVERTER_PROFILE=pyinstrument idem + rapport HTML pyinstrument
+#
+# Désactivée, start_run renvoie NULL_RUN dont les méthodes ne font rien : le
+# graphe n'est pas enveloppé et les fonctions add_* ne sont pas remplacées,
+# la boucle de conversion tourne donc exactement comme sans instrumentation.
+
+ENV_VAR = "CONVERTER_PROFILE"
+OUTPUT_ENV_VAR = "CONVERTER_PROFILE_OUTPUT"
+DEFAULT_OUTPUT = "converter-profile.json"
+MODES = ("1", "cprofile", "pyinstrument")
+RSS_INTERVAL = 0.05  # secondes entre deux mesures de RSS
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class _NullRun:
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_CONTEXT
+
+    def count(self, name, n=1):
+        pass
+
+    def sink(self, graph):
+        return graph
+
+    def hooks(self, namespace, names):
+        return _NULL_CONTEXT
+
+    def finish(self, **counters):
+        return None
+
+
+NULL_RUN = _NullRun()
+
+
+def _current_rss():
+    # RSS courant en octets (Linux) ; None ailleurs
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _peak_rss():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilo-octets sous Linux, octets sous macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _size(graph):
+    # rdflib.Graph : len ; writers de stream_writer.py : triplets écrits
+    return len(graph) if hasattr(graph, "__len__") else graph.written
+
+
+class _CountingSink:
+    """Enveloppe d'un graphe : compte, par fonction add_*, les appels à add
+    et les triplets réellement nouveaux (un lieu partagé par cent lignes est
+    ajouté cent fois mais ne compte qu'un triplet)."""
+
+    def __init__(self, graph, run):
+        self._graph = graph
+        self._run = run
+
+    def add(self, triple):
+        run = self._run
+        before = _size(self._graph)
+        self._graph.add(triple)
+        run.adds[run.current] = run.adds.get(run.current, 0) + 1
+        run.triples[run.current] = (
+            run.triples.get(run.current, 0) + _size(self._graph) - before
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._graph, name)
+
+
+class Run:
+    enabled = True
+
+    def __init__(self, name, mode="1", output=None):
+        self.name = name
+        self.mode = mode
+        self.output = output or os.environ.get(OUTPUT_ENV_VAR) or DEFAULT_OUTPUT
+        self.stages = {}  # étape -> [secondes, appels, pic RSS]
+        self.helpers = {}  # fonction -> [secondes, appels]
+        self.adds = {}  # fonction -> appels à add
+        self.triples = {}  # fonction -> triplets nouveaux dans le graphe
+        self.counters = {}
+        self.current = "autre"
+        self._active = []
+        self._start = time.perf_counter()
+
+        self._sampling = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+        self._sampler.start()
+
+        self.profiler = None
+        if mode == "cprofile":
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif mode == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                print("pyinstrument n'est pas installé : profil ignoré")
+            else:
+                self.profiler = Profiler()
+                self.profiler.start()
+
+    def _sample_rss(self):
+        while not self._sampling.wait(RSS_INTERVAL):
+            rss = _current_rss()
+            if rss is None:
+                return
+            for stage in self._active:
+                entry = self.stages[stage]
+                entry[2] = max(entry[2], rss)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        entry = self.stages.setdefault(name, [0.0, 0, _current_rss() or 0])
+        self._active.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry[0] += time.perf_counter() - start
+            entry[1] += 1
+            self._active.remove(name)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def sink(self, graph):
+        return _CountingSink(graph, self)
+
+    @contextlib.contextmanager
+    def hooks(self, namespace, names):
+        """Remplace temporairement les fonctions names de namespace (globals()
+        d'un module) par des versions chronométrées."""
+        originals = {name: namespace[name] for name in names}
+
+        def timed(name, fn):
+            entry = self.helpers.setdefault(name, [0.0, 0])
+
+            def wrapper(*args, **kwargs):
+                previous, self.current = self.current, name
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    entry[0] += time.perf_counter() - start
+                    entry[1] += 1
+                    self.current = previous
+
+            return wrapper
+
+        namespace.update({name: timed(name, fn) for name, fn in originals.items()})
+        try:
+            yield
+        finally:
+            namespace.update(originals)
+
+    def _stop_profiler(self):
+        if self.profiler is None:
+            return None
+        base = os.path.splitext(self.output)[0]
+        if self.mode == "cprofile":
+            self.profiler.disable()
+            path = base + ".prof"
+            self.profiler.dump_stats(path)
+        else:
+            self.profiler.stop()
+            path = base + ".html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.profiler.output_html())
+        return path
+
+    def summary(self):
+        wall = time.perf_counter() - self._start
+        mb = 1 / 2**20
+        return {
+            "run": self.name,
+            "wall_seconds": round(wall, 4),
+            "stages": {
+                name: {
+                    "seconds": round(seconds, 4),
+                    "calls": calls,
+                    "share": round(seconds / wall, 4) if wall else None,
+                    "peak_rss_mb": round(peak * mb, 1),
+                }
+                for name, (seconds, calls, peak) in self.stages.items()
+            },
+            "helpers": {
+                name: {
+                    "seconds": round(seconds, 4),
+                    "calls": calls,
+                    "adds": self.adds.get(name, 0),
+                    "triples": self.triples.get(name, 0),
+                }
+                for name, (seconds, calls) in self.helpers.items()
+            },
+            "counters": dict(self.counters),
+            "peak_rss_mb": round(_peak_rss() * mb, 1),
+        }
+
+    def finish(self, **counters):
+        """Arrête les mesures, affiche et écrit le résumé JSON."""
+        self._sampling.set()
+        for name, n in counters.items():
+            self.count(name, n)
+        summary = self.summary()
+        summary["profile"] = self._stop_profiler()
+        with open(self.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+        print(f"Instrumentation ({summary['wall_seconds']:.2f}s au total) :")
+        for name, s in summary["stages"].items():
+            print(
+                f"  {name:<20} {s['seconds']:>8.3f}s  {100 * (s['share'] or 0):5.1f}%"
+                f"  RSS {s['peak_rss_mb']} Mo"
+            )
+        for name, s in summary["helpers"].items():
+            print(
+                f"  {name:<28} {s['seconds']:>8.3f}s  {s['calls']} appels, "
+                f"{s['adds']} ajouts, {s['triples']} triplets nouveaux"
+            )
+        print(f"  compteurs : {summary['counters']}, pic RSS {summary['peak_rss_mb']} Mo")
+        print(f"  résumé : {self.output}")
+        if summary["profile"]:
+            print(f"  profil : {summary['profile']}")
+        return summary
+
+
+def start_run(name, profile=None, output=None):
+    """profile : None -> variable CONVERTER_PROFILE ; False / "" -> désactivé ;
+    True, "1", "cprofile" ou "pyinstrument" -> activé."""
+    if profile is None:
+        profile = os.environ.get(ENV_VAR, "")
+    if profile is True:
+        profile = "1"
+    if not profile or profile in ("0", "false"):
+        return NULL_RUN
+    if profile not in MODES:
+        raise ValueError(f"mode d'instrumentation inconnu : {profile!r} ({MODES})")
+    return Run(name, profile, output)
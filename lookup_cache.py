@@ -0,0 +1,102 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Cache persistant (SQLite) des recherches distantes : existence d'une URI
+# DBpedia, lien sameAs vers Wikidata... Partagé par Step4, StepEnrichissement
+# et request.py, pour qu'une relance après une petite modification du CSV
+# ne refasse presque aucune requête réseau.
+
+DEFAULT_PATH = os.environ.get(
+    "NOBEL_LOOKUP_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "lookup_cache.sqlite"),
+)
+
+DAY = 24 * 3600
+POSITIVE_TTL = 30 * DAY  # une ressource trouvée reste valable longtemps
+NEGATIVE_TTL = 1 * DAY  # une absence peut être corrigée côté DBpedia
+
+MISS = object()
+
+
+class LookupCache:
+    def __init__(
+        self, path=DEFAULT_PATH, positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL
+    ):
+        self.path = path
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS lookups (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT,
+                expires REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            )"""
+        )
+
+    def get(self, kind, key, default=MISS):
+        """Renvoie la valeur en cache (None = résultat négatif) ou `default`."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT value, expires FROM lookups WHERE kind = ? AND key = ?",
+                (kind, key),
+            ).fetchone()
+            if row is None or row[1] < time.time():
+                self.misses += 1
+                return default
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, kind, key, value):
+        ttl = self.positive_ttl if value else self.negative_ttl
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO lookups (kind, key, value, expires) "
+                "VALUES (?, ?, ?, ?)",
+                (kind, key, json.dumps(value), time.time() + ttl),
+            )
+
+    def lookup(self, kind, key, compute):
+        """Valeur en cache, sinon compute() puis mise en cache.
+
+        Si compute lève une exception (erreur réseau), rien n'est stocké :
+        compute doit laisser passer les erreurs de transport plutôt que de
+        renvoyer None, qui serait mis en cache comme une absence."""
+        value = self.get(kind, key)
+        if value is MISS:
+            value = compute()
+            self.set(kind, key, value)
+        return value
+
+    def purge_expired(self):
+        with self.lock:
+            self.db.execute("DELETE FROM lookups WHERE expires < ?", (time.time(),))
+
+    def close(self):
+        self.db.close()
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"cache : {self.hits} hits / {self.misses} misses ({rate:.0%})"
+
+
+_shared = None
+
+
+def shared_cache():
+    """Instance unique par processus, sur DEFAULT_PATH."""
+    global _shared
+    if _shared is None:
+        _shared = LookupCache()
+    return _shared
@@ -0,0 +1,295 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+from sparql_engine import Evaluator, Parser, SparqlSyntaxError, SparqlUnsupported
+from stream_writer import triple_digest
+from triplestore import TripleStore
+from snapshot import iter_graph
+from ttl_stream import iter_quads
+
+# Matérialisation des règles d'inférence (inferences/inferences_insert.sparql)
+# sans serveur SPARQL. Chaque règle est un INSERT { ... } WHERE { ... } ; elles
+# sont appliquées jusqu'au point fixe, en semi-naïf : à chaque tour, un motif
+# du WHERE est restreint aux triplets nouveaux (le delta) et les autres motifs
+# portent sur tout le graphe (données + triplets déjà inférés).
+#
+# Les triplets inférés sont écrits dans un fichier TriG séparé, graphe
+# <urn:materialized>. Un fichier d'état à côté garde les empreintes des
+# triplets source : au lancement suivant, seuls les triplets ajoutés servent
+# de delta. Une suppression (ou un changement de règles) impose un recalcul
+# complet, car les inférences qui en dépendaient ne sont pas retirées une à une.
+
+MATERIALIZED_GRAPH = "urn:materialized"
+DEFAULT_RULES = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "inferences", "inferences_insert.sparql"
+)
+DELTA_GRAPH = "urn:delta"
+
+
+class Rule:
+    def __init__(self, name, template, where):
+        self.name = name
+        self.template = template  # [(s, p, o, graph)] en termes de motif
+        self.where = where
+
+
+def parse_rules(text, name="règle"):
+    """Découpe une suite de INSERT { ... } WHERE { ... } séparés par ';'."""
+    parser = Parser(text)
+    rules = []
+    while True:
+        parser.prologue()
+        if parser.peek()[0] is None:
+            return rules
+        if not parser.accept("INSERT"):
+            raise SparqlUnsupported(
+                f"seules les règles INSERT sont gérées (trouvé {parser.peek()[1]!r})"
+            )
+        template = parse_template(parser)
+        parser.expect("WHERE")
+        where = parser.group()
+        parser.accept(";")
+        rules.append(Rule(f"{name} {len(rules) + 1}", template, where))
+
+
+def parse_template(parser):
+    parser.expect("{")
+    template = []
+    while not parser.accept("}"):
+        graph = MATERIALIZED_GRAPH
+        if parser.accept("GRAPH"):
+            kind, value = parser.var_or_iri()
+            if kind != "const":
+                raise SparqlUnsupported("GRAPH ?var non géré dans un INSERT")
+            graph = value[1:-1]
+        parser.expect("{")
+        while not parser.accept("}"):
+            if parser.accept("."):
+                continue
+            patterns = []
+            parser.triples_block(patterns)
+            template.extend((s, p, o, graph) for s, p, o in patterns)
+    if not template:
+        raise SparqlSyntaxError("INSERT vide")
+    return template
+
+
+def load_rules(paths):
+    rules = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            rules.extend(parse_rules(f.read(), os.path.basename(path)))
+    return rules
+
+
+def rules_fingerprint(paths):
+    h = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+# --- évaluation semi-naïve ---
+
+
+def delta_variants(elements):
+    """Variantes du WHERE où un seul motif de triplet est lu dans le delta.
+
+    Seules les parties monotones (BGP, UNION, groupes) sont restreintes ;
+    OPTIONAL, MINUS et FILTER restent évalués sur tout le graphe."""
+    for i, element in enumerate(elements):
+        kind = element[0]
+        before, after = elements[:i], elements[i + 1 :]
+        if kind == "bgp":
+            patterns = element[1]
+            for k, pattern in enumerate(patterns):
+                rest = patterns[:k] + patterns[k + 1 :]
+                delta = ("graph", ("const", f"<{DELTA_GRAPH}>"), [("bgp", [pattern])])
+                restricted = [delta]
+                if rest:
+                    restricted.append(("bgp", rest))
+                yield before + restricted + after
+        elif kind == "union":
+            for branch in element[1]:
+                for variant in delta_variants(branch):
+                    yield before + [("group", variant)] + after
+        elif kind == "group":
+            for variant in delta_variants(element[1]):
+                yield before + [("group", variant)] + after
+
+
+def instantiate(template, solutions):
+    quads = set()
+    for sol in solutions:
+        for pattern in template:
+            terms = []
+            for kind, value in pattern[:3]:
+                terms.append(value if kind == "const" else sol.get(value))
+            s, p, o = terms
+            # variable non liée, sujet littéral ou prédicat non IRI : ignoré
+            if s is None or p is None or o is None:
+                continue
+            if s.startswith('"') or not p.startswith("<"):
+                continue
+            quads.add((s, p, o, pattern[3]))
+    return quads
+
+
+def build_store(triples):
+    store = TripleStore()
+    for s, p, o in triples:
+        store.add(s, p, o)
+    return store.freeze()
+
+
+def named_graphs(inferred):
+    graphs = {}
+    for s, p, o, g in inferred:
+        graphs.setdefault(g, []).append((s, p, o))
+    return {g: build_store(triples) for g, triples in graphs.items()}
+
+
+def fixpoint(store, rules, inferred, delta=None, verbose=True):
+    """Applique les règles jusqu'au point fixe.
+
+    store : données + inférences déjà connues ; inferred : set de quads,
+    complété sur place. delta=None : premier tour naïf (recalcul complet)."""
+    round_no = 0
+    while True:
+        round_no += 1
+        graphs = named_graphs(inferred)
+        if delta is not None:
+            graphs[DELTA_GRAPH] = build_store(delta)
+        new = set()
+        for rule in rules:
+            evaluator = Evaluator(store, graphs)
+            if delta is None:
+                bodies = [rule.where]
+            else:
+                bodies = list(delta_variants(rule.where))
+            found = set()
+            for body in bodies:
+                found |= instantiate(rule.template, evaluator.eval_group(body))
+            found -= inferred
+            new |= found
+            if verbose and found:
+                print(f"   tour {round_no}, {rule.name} : {len(found)} triplets")
+        new -= inferred
+        if not new:
+            return round_no
+        inferred |= new
+        # les triplets inférés alimentent les règles suivantes (le store
+        # supprime les doublons avec les données au freeze)
+        delta = {(s, p, o) for s, p, o, _ in new}
+        for s, p, o in delta:
+            store.add(s, p, o)
+        store.freeze()
+
+
+# --- fichiers ---
+
+
+def read_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_state(path, rules_hash, digests):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "rules": rules_hash, "base": sorted(digests)}, f)
+
+
+def read_inferred(path):
+    return {(s, p, o, g[1:-1]) for s, p, o, g in iter_quads(path) if g is not None}
+
+
+def write_inferred(path, inferred):
+    by_graph = {}
+    for s, p, o, g in inferred:
+        by_graph.setdefault(g, []).append(f"{s} {p} {o} .\n")
+    with open(path, "w", encoding="utf-8") as f:
+        for graph in sorted(by_graph):
+            f.write(f"<{graph}> {{\n")
+            f.writelines(sorted(by_graph[graph]))
+            f.write("}\n")
+
+
+def materialize(data, output=None, rule_files=None, state_path=None, full=False):
+    """Matérialise les règles sur data (Turtle / N-Triples) dans output (TriG)."""
+    if output is None:
+        output = os.path.splitext(data)[0] + ".materialized.trig"
+    if state_path is None:
+        state_path = output + ".state.json"
+    rule_files = rule_files or [DEFAULT_RULES]
+    rules = load_rules(rule_files)
+    rules_hash = rules_fingerprint(rule_files)
+
+    start = time.perf_counter()
+    base = {}
+    for s, p, o in iter_graph(data):
+        base[triple_digest(f"{s} {p} {o} .\n").hex()] = (s, p, o)
+
+    state = None if full else read_state(state_path)
+    incremental = (
+        state is not None
+        and state.get("rules") == rules_hash
+        and os.path.exists(output)
+    )
+    if incremental:
+        previous = set(state["base"])
+        removed = previous - base.keys()
+        if removed:
+            print(f"{len(removed)} triplets supprimés : recalcul complet")
+            incremental = False
+
+    store = TripleStore()
+    for s, p, o in base.values():
+        store.add(s, p, o)
+    if incremental:
+        inferred = read_inferred(output)
+        for s, p, o, _ in inferred:
+            store.add(s, p, o)
+        delta = {base[d] for d in base.keys() - previous}
+        if not delta:
+            print("Aucun triplet nouveau : inférences à jour")
+            return output
+        print(f"Mode incrémental : {len(delta)} triplets nouveaux")
+    else:
+        inferred = set()
+        delta = None
+    store.freeze()
+
+    rounds = fixpoint(store, rules, inferred, delta)
+    write_inferred(output, inferred)
+    write_state(state_path, rules_hash, base.keys())
+    print(
+        f"{len(inferred)} triplets inférés ({len(rules)} règles, {rounds} tours) "
+        f"en {time.perf_counter() - start:.2f}s -> {output}"
+    )
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Matérialise les règles d'inférence")
+    parser.add_argument("data", nargs="?", default="out.ttl")
+    parser.add_argument("-o", "--output")
+    parser.add_argument(
+        "-r",
+        "--rules",
+        action="append",
+        help="fichier de règles INSERT ... WHERE (répétable ; défaut : "
+        "inferences/inferences_insert.sparql)",
+    )
+    parser.add_argument("--full", action="store_true", help="ignore l'état précédent")
+    args = parser.parse_args()
+    materialize(args.data, args.output, args.rules, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
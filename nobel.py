@@ -0,0 +1,86 @@
+import argparse
+import importlib
+import os
+import sys
+
+# Point d'entrée unique du pipeline :
+#
+#   python nobel.py convert [csv] [out.ttl]     CSV -> RDF
+#   python nobel.py enrich [persons|others]     liens DBpedia / Wikidata (Step4)
+#   python nobel.py validate [ttl]              vérification des URI DBpedia
+#   python nobel.py void [ttl]                  description VoID (Step5)
+#   python nobel.py query requete.sparql        requête SPARQL locale
+#
+# Chaque sous-commande est le main() d'un module existant, importé seulement
+# quand elle est lancée : `nobel.py --help` ne charge ni pandas ni rdflib, et
+# `nobel.py query` ne paie pas l'import du converter. `convert` passe par
+# converter_cli.py, qui n'importe le converter qu'après l'analyse des
+# options. Les options après la sous-commande sont celles du module
+# (`nobel.py convert --help`).
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PATHS = (ROOT, os.path.join(ROOT, "Step4"), os.path.join(ROOT, "Step5"))
+
+# sous-commande -> (modules dont le main() est lancé, description)
+COMMANDS = {
+    "convert": (("converter_cli",), "conversion du CSV des lauréats en RDF"),
+    "enrich": (
+        ("Step4", "StepEnrichissement"),
+        "liens owl:sameAs DBpedia / Wikidata (personnes, puis le reste)",
+    ),
+    "validate": (("request",), "vérification des URI DBpedia du graphe"),
+    "void": (("generate_void",), "description VoID du graphe enrichi"),
+    "query": (("sparql_engine",), "requête SPARQL sur le graphe local"),
+    "serve": (("sparql_server",), "endpoint SPARQL HTTP sur le graphe local"),
+    "search": (("text_index",), "recherche dans l'index plein texte des prix"),
+}
+# étapes de `enrich` lançables seules
+ENRICH_STEPS = {"persons": "Step4", "others": "StepEnrichissement"}
+
+
+def run(module_name, prog, argv):
+    """Lance module.main() comme si le module était appelé avec argv."""
+    for path in PATHS:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    module = importlib.import_module(module_name)
+    saved = sys.argv
+    sys.argv = [prog] + list(argv)
+    try:
+        return module.main()
+    finally:
+        sys.argv = saved
+
+
+def main(argv=None):
+    width = max(map(len, COMMANDS))
+    parser = argparse.ArgumentParser(
+        prog="nobel.py",
+        description="Pipeline des lauréats Nobel (CSV -> RDF -> enrichissement)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="sous-commandes :\n"
+        + "\n".join(
+            f"  {name:<{width}}  {description}"
+            for name, (_, description) in COMMANDS.items()
+        )
+        + "\n\nenrich persons / enrich others : une seule des deux étapes",
+    )
+    parser.add_argument("command", choices=COMMANDS, metavar="commande")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="options du module")
+    args = parser.parse_args(argv)
+
+    modules, _ = COMMANDS[args.command]
+    prog, rest = f"nobel.py {args.command}", args.args
+    if args.command == "enrich":
+        if rest and rest[0] in ENRICH_STEPS:
+            modules = (ENRICH_STEPS[rest[0]],)
+            prog, rest = f"{prog} {rest[0]}", rest[1:]
+        elif rest:
+            # options différentes d'une étape à l'autre
+            parser.error("enrich : préciser persons ou others avant les options")
+    for module_name in modules:
+        run(module_name, prog, rest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+import argparse
+import bz2
+import gzip
+import os
+import pickle
+import re
+import time
+import unicodedata
+from array import array
+from collections import namedtuple
+from urllib.parse import unquote
+
+from ttl_stream import iter_triples_from, unescape
+
+# Réconciliation locale des lieux (villes, pays) vers des ressources DBpedia,
+# sans aucune requête HTTP. L'index est construit une fois à partir d'un
+# gazetteer hors ligne puis gardé à côté (<gazetteer>.index, reconstruit si
+# le fichier source change) :
+#
+#   - dump de labels DBpedia (.ttl / .nt, éventuellement .gz / .bz2) :
+#     <http://dbpedia.org/resource/Berkeley,_California> rdfs:label "..."@en
+#   - TSV "label<TAB>ressource" (IRI complète ou nom local DBpedia)
+#   - checked_uris.tsv de request.py : seules les URI "ok" sont gardées,
+#     le label est tiré du nom local
+#
+# Trois niveaux, essayés dans cet ordre :
+#   exact : label normalisé (casse, accents, ponctuation)
+#   alias : "X (now Y)" -> Y puis X ; "Berkeley CA" -> "Berkeley, California"
+#           puis "Berkeley" (États américains et provinces canadiennes)
+#   fuzzy : trigrammes, coefficient de Dice >= FUZZY_THRESHOLD, et un seul
+#           meilleur candidat (sinon rien : mieux vaut l'URI naïve qu'une
+#           mauvaise ville)
+#
+# Chaque texte n'est résolu qu'une fois (cache) : la conversion complète ne
+# paie le coût d'une recherche que par valeur distincte.
+
+DBPEDIA_RESOURCE = "http://dbpedia.org/resource/"
+RDFS_LABEL = "<http://www.w3.org/2000/01/rdf-schema#label>"
+INDEX_SUFFIX = ".index"
+INDEX_VERSION = 1
+
+FUZZY_THRESHOLD = 0.85
+FUZZY_MIN_LENGTH = 4
+# trigrammes trop fréquents (" sa", "on ") : ignorés pour le filtrage des
+# candidats, le score n'en est que plus prudent
+MAX_POSTINGS = 20000
+
+US_STATES = {
+    "AL": "Alabama",
+    "AK": "Alaska",
+    "AZ": "Arizona",
+    "AR": "Arkansas",
+    "CA": "California",
+    "CO": "Colorado",
+    "CT": "Connecticut",
+    "DE": "Delaware",
+    "DC": "Washington, D.C.",
+    "FL": "Florida",
+    "GA": "Georgia",
+    "HI": "Hawaii",
+    "ID": "Idaho",
+    "IL": "Illinois",
+    "IN": "Indiana",
+    "IA": "Iowa",
+    "KS": "Kansas",
+    "KY": "Kentucky",
+    "LA": "Louisiana",
+    "ME": "Maine",
+    "MD": "Maryland",
+    "MA": "Massachusetts",
+    "MI": "Michigan",
+    "MN": "Minnesota",
+    "MS": "Mississippi",
+    "MO": "Missouri",
+    "MT": "Montana",
+    "NE": "Nebraska",
+    "NV": "Nevada",
+    "NH": "New Hampshire",
+    "NJ": "New Jersey",
+    "NM": "New Mexico",
+    "NY": "New York",
+    "NC": "North Carolina",
+    "ND": "North Dakota",
+    "OH": "Ohio",
+    "OK": "Oklahoma",
+    "OR": "Oregon",
+    "PA": "Pennsylvania",
+    "RI": "Rhode Island",
+    "SC": "South Carolina",
+    "SD": "South Dakota",
+    "TN": "Tennessee",
+    "TX": "Texas",
+    "UT": "Utah",
+    "VT": "Vermont",
+    "VA": "Virginia",
+    "WA": "Washington",
+    "WV": "West Virginia",
+    "WI": "Wisconsin",
+    "WY": "Wyoming",
+}
+CANADIAN_PROVINCES = {
+    "AB": "Alberta",
+    "BC": "British Columbia",
+    "MB": "Manitoba",
+    "NB": "New Brunswick",
+    "NL": "Newfoundland and Labrador",
+    "NS": "Nova Scotia",
+    "ON": "Ontario",
+    "PE": "Prince Edward Island",
+    "QC": "Quebec",
+    "SK": "Saskatchewan",
+}
+REGIONS = {**US_STATES, **CANADIAN_PROVINCES}
+
+_NOW_RE = re.compile(r"^(.*?)\s*\(now (.+)\)$")
+_REGION_RE = re.compile(r"^(.+?),?\s+([A-Z]{2})$")
+_PUNCT_RE = re.compile(r"[\W_]+")
+_SAINT_RE = re.compile(r"\bSt\.?\s+(?=[A-Z])")
+# lettres que NFKD ne décompose pas
+_LETTERS = str.maketrans({"ł": "l", "ø": "o", "đ": "d", "æ": "ae", "œ": "oe", "ı": "i"})
+
+Match = namedtuple("Match", "iri method score")
+
+
+def normalize_key(text):
+    """Clé de comparaison : sans accents, casse ni ponctuation."""
+    text = unicodedata.normalize("NFKD", text.casefold().translate(_LETTERS))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _PUNCT_RE.sub(" ", text).strip()
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _region_forms(text):
+    yield text
+    m = _REGION_RE.match(text)
+    if m and m.group(2) in REGIONS:
+        yield f"{m.group(1)}, {REGIONS[m.group(2)]}"
+        yield m.group(1)
+    if _SAINT_RE.search(text):
+        # St. Petersburg -> Saint Petersburg
+        yield from _region_forms(_SAINT_RE.sub("Saint ", text))
+
+
+def alias_forms(text):
+    """Formes à essayer pour text, la forme d'origine en premier."""
+    text = text.strip()
+    m = _NOW_RE.match(text)
+    parts = (m.group(2), m.group(1)) if m else ()
+    forms = list(_region_forms(text))
+    for part in parts:
+        forms.extend(_region_forms(part.strip()))
+    return list(dict.fromkeys(f for f in forms if f))
+
+
+def local_label(iri):
+    """Label tiré du nom local d'une IRI DBpedia (Berkeley,_California)."""
+    return unquote(iri.rsplit("/", 1)[-1]).replace("_", " ")
+
+
+def _open_text(path):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rt", encoding="utf-8")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def read_gazetteer(path):
+    """Paires (label, IRI) du fichier path."""
+    base = re.sub(r"\.(gz|bz2)$", "", path)
+    with _open_text(path) as f:
+        if base.endswith((".ttl", ".nt")):
+            for s, p, o in iter_triples_from(f):
+                if p == RDFS_LABEL and s.startswith("<") and o.startswith('"'):
+                    yield unescape(o[1 : o.rindex('"')]), s[1:-1]
+            return
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 2 or not fields[0] or line.startswith("#"):
+                continue
+            first, second = fields[0], fields[1]
+            if second in ("ok", "invalid"):
+                # checked_uris.tsv : uri<TAB>statut
+                if second == "ok" and first.startswith(DBPEDIA_RESOURCE):
+                    yield local_label(first), first
+                continue
+            iri = second if "://" in second else DBPEDIA_RESOURCE + second
+            yield first, iri
+
+
+class Gazetteer:
+    def __init__(self):
+        self.iris = []
+        self.keys = []
+        self.exact = {}  # clé normalisée -> indice
+        self.postings = {}  # trigramme -> array d'indices
+        self.sizes = array("H")  # nombre de trigrammes de chaque clé
+        self._cache = {}
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_cache"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, _cache={})
+
+    def __len__(self):
+        return len(self.iris)
+
+    def add(self, label, iri):
+        key = normalize_key(label)
+        if not key:
+            return
+        previous = self.exact.get(key)
+        if previous is not None:
+            # homonymes : on garde la ressource dont le nom local est le label
+            if normalize_key(local_label(self.iris[previous])) == key:
+                return
+            if normalize_key(local_label(iri)) != key:
+                return
+            self.iris[previous] = iri
+            return
+        i = len(self.iris)
+        self.iris.append(iri)
+        self.keys.append(key)
+        self.exact[key] = i
+        grams = trigrams(key)
+        self.sizes.append(min(len(grams), 65535))
+        for g in grams:
+            ids = self.postings.get(g)
+            if ids is None:
+                ids = self.postings[g] = array("I")
+            ids.append(i)
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        gazetteer = cls()
+        for label, iri in pairs:
+            gazetteer.add(label, iri)
+        return gazetteer
+
+    def lookup(self, text):
+        i = self.exact.get(normalize_key(text))
+        return None if i is None else self.iris[i]
+
+    def fuzzy(self, text, threshold=FUZZY_THRESHOLD):
+        key = normalize_key(text)
+        if len(key) < FUZZY_MIN_LENGTH:
+            return None
+        grams = trigrams(key)
+        shared = {}
+        for g in grams:
+            ids = self.postings.get(g)
+            if ids is None or len(ids) > MAX_POSTINGS:
+                continue
+            for i in ids:
+                shared[i] = shared.get(i, 0) + 1
+        best, best_score, tie = None, 0.0, False
+        n = len(grams)
+        for i, common in shared.items():
+            score = 2 * common / (n + self.sizes[i])
+            if score > best_score:
+                best, best_score, tie = i, score, False
+            elif score == best_score and self.iris[i] != self.iris[best]:
+                tie = True
+        if best is None or best_score < threshold or tie:
+            return None
+        return Match(self.iris[best], "fuzzy", round(best_score, 3))
+
+    def resolve(self, text):
+        """Match(iri, méthode, score) pour text, ou None."""
+        if text in self._cache:
+            return self._cache[text]
+        forms = alias_forms(text)
+        match = None
+        for n, form in enumerate(forms):
+            iri = self.lookup(form)
+            if iri is not None:
+                match = Match(iri, "exact" if n == 0 else "alias", 1.0)
+                break
+        else:
+            for form in forms:
+                match = self.fuzzy(form)
+                if match is not None:
+                    break
+        self._cache[text] = match
+        return match
+
+
+def _source_info(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_gazetteer(path, index_path=None):
+    """Gazetteer de path, via son index s'il est à jour (sinon construit et
+    enregistré)."""
+    index_path = index_path or path + INDEX_SUFFIX
+    info = _source_info(path)
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "rb") as f:
+                header, state = pickle.load(f)
+            if header == {"version": INDEX_VERSION, "source": info}:
+                gazetteer = Gazetteer.__new__(Gazetteer)
+                gazetteer.__setstate__(state)
+                return gazetteer
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            pass
+    gazetteer = Gazetteer.from_pairs(read_gazetteer(path))
+    tmp = index_path + ".tmp"
+    with open(tmp, "wb") as f:
+        header = {"version": INDEX_VERSION, "source": info}
+        # état brut (dicts, arrays) : lisible même si reconcile.py est __main__
+        pickle.dump(
+            (header, gazetteer.__getstate__()), f, protocol=pickle.HIGHEST_PROTOCOL
+        )
+    os.replace(tmp, index_path)
+    return gazetteer
+
+
+def coverage(gazetteer, values):
+    """Répartition des valeurs distinctes par méthode de résolution."""
+    counts = {"exact": 0, "alias": 0, "fuzzy": 0, "unresolved": 0}
+    unresolved = []
+    for value in values:
+        match = gazetteer.resolve(value)
+        if match is None:
+            counts["unresolved"] += 1
+            unresolved.append(value)
+        else:
+            counts[match.method] += 1
+    return counts, unresolved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Réconciliation locale des lieux")
+    parser.add_argument("gazetteer", help="dump de labels DBpedia ou TSV")
+    parser.add_argument("values", nargs="*", help="textes à résoudre")
+    parser.add_argument(
+        "--csv", help="affiche la couverture des villes et pays de ce CSV"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    gazetteer = load_gazetteer(args.gazetteer)
+    print(f"{len(gazetteer)} entrées chargées en {time.perf_counter() - start:.2f}s")
+    for value in args.values:
+        print(f"{value!r} -> {gazetteer.resolve(value)}")
+
+    if args.csv:
+        import pandas as pd
+
+        df = pd.read_csv(args.csv, delimiter=";", encoding="utf-8", dtype=str)
+        columns = [c for c in df.columns if c.endswith((" city", " country"))]
+        values = sorted(set(df[columns].stack().dropna().str.strip()) - {""})
+        start = time.perf_counter()
+        counts, unresolved = coverage(gazetteer, values)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{len(values)} valeurs distinctes, {1e6 * elapsed / len(values):.1f} µs "
+            f"par recherche : {counts}"
+        )
+        for value in unresolved[:20]:
+            print(f"  non résolu : {value}")
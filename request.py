@@ -1,46 +1,125 @@
-import rdflib
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
 
+from lookup_cache import shared_cache
+
 TTL_FILE = "outTest.ttl"
 LOG_FILE = "invalid_uris.txt"
+# résultats écrits au fil de l'eau : une exécution interrompue reprend ici
+RESULTS_FILE = "checked_uris.tsv"
+
+DBPEDIA_PREFIX = "<http://dbpedia.org/resource/"
 
 # Timeout court pour éviter de bloquer sur une URI cassée
 TIMEOUT = 5
+WORKERS = 16
+RETRIES = 3
+BACKOFF = 0.5  # secondes, doublé à chaque nouvel essai
+
+
+class RetryableStatus(requests.RequestException):
+    pass
+
 
 def is_valid_dbpedia_uri(uri: str) -> bool:
-    """Teste l'existence d'une URI DBpedia via une requête HEAD."""
-    try:
+    """Teste l'existence d'une URI DBpedia via une requête HEAD (mise en cache)."""
+
+    def fetch():
         resp = requests.head(uri, allow_redirects=True, timeout=TIMEOUT)
-        return resp.status_code == 200
-    except requests.RequestException:
-        return False
+        # surcharge ou erreur serveur : on réessaiera, sans mettre en cache
+        if resp.status_code == 429 or resp.status_code >= 500:
+            raise RetryableStatus(f"HTTP {resp.status_code}")
+        return uri if resp.status_code == 200 else None
 
-def main():
-    g = rdflib.Graph()
-    g.parse(TTL_FILE, format="turtle")
+    return bool(shared_cache().lookup("dbpedia_exists", uri, fetch))
 
-    # Récupérer toutes les URI DBpedia présentes dans le fichier
-    dbpedia_uris = set(
-        str(o)
-        for s, p, o in g
-        if isinstance(o, rdflib.URIRef) and str(o).startswith("http://dbpedia.org/resource/")
-    ) | set(
-        str(s)
-        for s, p, o in g
-        if isinstance(s, rdflib.URIRef) and str(s).startswith("http://dbpedia.org/resource/")
+
+def check_uri(uri: str):
+    """True / False, ou None si l'URI n'a pas pu être testée après RETRIES essais."""
+    for attempt in range(RETRIES + 1):
+        try:
+            return is_valid_dbpedia_uri(uri)
+        except requests.RequestException:
+            if attempt == RETRIES:
+                return None
+            time.sleep(BACKOFF * 2**attempt)
+
+
+def collect_dbpedia_uris(ttl_file):
+    """URI DBpedia (sujets et objets) en une seule passe sur le fichier."""
+    from snapshot import iter_graph  # numpy : seulement si on lit un graphe
+
+    uris = set()
+    for s, _, o in iter_graph(ttl_file):
+        if s.startswith(DBPEDIA_PREFIX):
+            uris.add(s[1:-1])
+        if o.startswith(DBPEDIA_PREFIX):
+            uris.add(o[1:-1])
+    return uris
+
+
+def load_results(results_file):
+    done = {}
+    if os.path.exists(results_file):
+        with open(results_file, encoding="utf-8") as f:
+            for line in f:
+                uri, _, status = line.rstrip("\n").rpartition("\t")
+                if uri and status in ("ok", "invalid"):
+                    done[uri] = status
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifie les URI DBpedia d'un graphe")
+    parser.add_argument("ttl", nargs="?", default=TTL_FILE)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore les résultats déjà enregistrés"
     )
+    parser.add_argument(
+        "--uri",
+        action="append",
+        default=[],
+        help="URI à tester (répétable) au lieu de celles du graphe",
+    )
+    args = parser.parse_args()
 
+    # Récupérer toutes les URI DBpedia présentes dans le fichier
+    dbpedia_uris = set(args.uri) or collect_dbpedia_uris(args.ttl)
     print(f"🔍 {len(dbpedia_uris)} URI DBpedia détectées à tester...")
 
-    invalid = []
+    if args.restart and os.path.exists(args.results):
+        os.remove(args.results)
+    done = load_results(args.results)
+    todo = sorted(dbpedia_uris - done.keys())
+    if done:
+        print(f"Reprise : {len(dbpedia_uris) - len(todo)} URI déjà testées")
 
-    for uri in sorted(dbpedia_uris):
-        if not is_valid_dbpedia_uri(uri):
-            invalid.append(uri)
-            print(f"Invalide : {uri}")
-        else:
-            print(f"OK : {uri}")
+    with open(args.results, "a", encoding="utf-8") as out, ThreadPoolExecutor(
+        max_workers=args.workers
+    ) as pool:
+        futures = {pool.submit(check_uri, uri): uri for uri in todo}
+        for future in as_completed(futures):
+            uri = futures[future]
+            valid = future.result()
+            status = {True: "ok", False: "invalid", None: "error"}[valid]
+            out.write(f"{uri}\t{status}\n")
+            out.flush()
+            done[uri] = status
+            if valid:
+                print(f"OK : {uri}")
+            elif valid is None:
+                print(f"Erreur réseau : {uri}")
+            else:
+                print(f"Invalide : {uri}")
 
+    invalid = sorted(u for u in dbpedia_uris if done.get(u) == "invalid")
+    errors = sum(1 for u in dbpedia_uris if done.get(u) == "error")
     if invalid:
         with open(LOG_FILE, "w", encoding="utf-8") as f:
             for uri in invalid:
@@ -48,6 +127,9 @@ def main():
         print(f"\n{len(invalid)} URI invalides enregistrées dans {LOG_FILE}")
     else:
         print("\nToutes les URI DBpedia sont valides.")
+    if errors:
+        print(f"{errors} URI non testées (erreurs réseau) : relancer pour réessayer")
+    print(shared_cache().summary())
 
 if __name__ == "__main__":
     main()
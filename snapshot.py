@@ -0,0 +1,236 @@
+import json
+import os
+import re
+import struct
+import zlib
+
+import numpy as np
+
+from triplestore import TripleStore, normalize_term
+from ttl_stream import iter_triples, unescape
+
+# Snapshot binaire d'un graphe, écrit à côté du Turtle (out.ttl -> out.snapshot)
+# pour que les scripts en aval n'aient plus à re-parser le Turtle :
+#
+#   "NOBELSNP" | longueur de l'en-tête (uint32) | en-tête JSON
+#   table des termes N-Triples, séparés par "\n", compressée zlib
+#   tableaux S, P, O (entiers, triés SPO), non compressés : lus par mmap
+#   [table des termes et tableaux S, P, O du graphe normalisé]
+#
+# Le second jeu n'est écrit que si la normalisation change des termes
+# ("x"^^xsd:string -> "x") : load_snapshot(normalize=True) le lit tel quel
+# (mmap, sans remappage ni re-tri), normalize=False lit les termes exacts.
+# Chaque bloc est aligné sur 8 octets. L'en-tête garde la taille et la date
+# du Turtle source : un snapshot plus vieux que son Turtle est ignoré.
+
+MAGIC = b"NOBELSNP"
+VERSION = 2
+SUFFIX = ".snapshot"
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def snapshot_path(source):
+    return os.path.splitext(source)[0] + SUFFIX
+
+
+def _source_info(source):
+    st = os.stat(source)
+    return {
+        "path": os.path.basename(source),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+
+
+def _pad(f):
+    f.write(b"\0" * (-f.tell() % 8))
+
+
+def _table(store):
+    s, p, o = store.spo if store.spo is not None else store.freeze().spo
+    terms = zlib.compress("\n".join(store.terms).encode("utf-8"), 6)
+    return terms, (s, p, o), {
+        "terms": len(store.terms),
+        "triples": len(s),
+        "terms_bytes": len(terms),
+    }
+
+
+def write_snapshot(store, path, source=None):
+    """Écrit le TripleStore dans path ; source : fichier Turtle d'origine."""
+    tables = [_table(store)]
+    if not store.normalize and any(normalize_term(t) != t for t in store.terms):
+        normalized = TripleStore.from_arrays(store.terms, *tables[0][1])
+        tables.append(_table(normalized))
+    dtype = np.dtype("<i4") if len(store.terms) < 2**31 else np.dtype("<i8")
+    header = dict(tables[0][2], version=VERSION, dtype=dtype.str)
+    header["normalized"] = tables[1][2] if len(tables) > 1 else None
+    header["source"] = _source_info(source) if source else None
+    raw = json.dumps(header).encode("utf-8")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(raw)) + raw)
+        for terms, columns, _ in tables:
+            _pad(f)
+            f.write(terms)
+            _pad(f)
+            for column in columns:
+                f.write(np.ascontiguousarray(column, dtype=dtype).tobytes())
+    os.replace(tmp, path)  # jamais de snapshot à moitié écrit
+    return path
+
+
+def _offsets(table, offset, itemsize):
+    table["terms_offset"] = offset + (-offset % 8)
+    end = table["terms_offset"] + table["terms_bytes"]
+    table["triples_offset"] = end + (-end % 8)
+    return table["triples_offset"] + 3 * table["triples"] * itemsize
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise SnapshotError(f"{path} n'est pas un snapshot")
+        (size,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(size))
+        if header.get("version") != VERSION:
+            raise SnapshotError(f"version de snapshot inconnue : {header['version']}")
+        itemsize = np.dtype(header["dtype"]).itemsize
+        end = _offsets(header, len(MAGIC) + 4 + size, itemsize)
+        if header["normalized"]:
+            _offsets(header["normalized"], end, itemsize)
+        return header
+
+
+def load_snapshot(path, mmap=True, normalize=True):
+    """TripleStore du snapshot ; les tableaux d'entiers restent sur disque (mmap).
+
+    normalize=False rend les termes exacts (aller-retour rdflib sans perte)."""
+    header = read_header(path)
+    table = header["normalized"] if normalize and header["normalized"] else header
+    with open(path, "rb") as f:
+        f.seek(table["terms_offset"])
+        data = zlib.decompress(f.read(table["terms_bytes"]))
+    terms = data.decode("utf-8").split("\n") if table["terms"] else []
+    n = table["triples"]
+    dtype = np.dtype(header["dtype"])
+    if n == 0:
+        columns = np.zeros((3, 0), dtype=np.int64)
+    elif mmap:
+        columns = np.memmap(
+            path, dtype=dtype, mode="r", offset=table["triples_offset"], shape=(3, n)
+        )
+    else:
+        with open(path, "rb") as f:
+            f.seek(table["triples_offset"])
+            columns = np.frombuffer(f.read(3 * n * dtype.itemsize), dtype=dtype)
+            columns = columns.reshape(3, n)
+    # termes normalisés à l'écriture : pas de passe de normalisation ici
+    store = TripleStore.from_arrays(terms, *columns, normalize=False)
+    store.normalize = normalize
+    return store
+
+
+def is_fresh(path, source):
+    """Le snapshot existe et correspond au fichier source tel qu'il est."""
+    if not os.path.exists(path) or not os.path.exists(source):
+        return False
+    try:
+        recorded = read_header(path).get("source")
+    except (SnapshotError, ValueError, struct.error):
+        return False
+    return recorded is not None and recorded == _source_info(source)
+
+
+def write_file_snapshot(source, path=None):
+    """Snapshot d'un fichier Turtle / N-Triples déjà écrit."""
+    store = TripleStore.load(source, normalize=False)
+    return write_snapshot(store, path or snapshot_path(source), source=source)
+
+
+def load_store(source):
+    """TripleStore de source, via son snapshot s'il est à jour."""
+    path = snapshot_path(source)
+    if is_fresh(path, source):
+        return load_snapshot(path)
+    return TripleStore.load(source)
+
+
+def iter_graph(source):
+    """Triplets (termes N-Triples) de source, via le snapshot s'il est à jour."""
+    path = snapshot_path(source)
+    if is_fresh(path, source):
+        yield from load_snapshot(path, normalize=False).triples()
+    else:
+        yield from iter_triples(source)
+
+
+# --- passerelle rdflib (scripts qui modifient le graphe) ---
+
+_LITERAL_RE = re.compile(r'^"(.*)"(?:@([A-Za-z0-9\-]+)|\^\^<([^>]*)>)?$', re.S)
+
+
+def rdflib_term_factory():
+    from rdflib import BNode, Literal, URIRef
+
+    def convert(nt):
+        if nt.startswith("<"):
+            return URIRef(nt[1:-1])  # IRI déjà décodée par ttl_stream
+        if nt.startswith("_:"):
+            return BNode(nt[2:])
+        m = _LITERAL_RE.match(nt)
+        return Literal(
+            unescape(m.group(1)),
+            lang=m.group(2),
+            datatype=URIRef(m.group(3)) if m.group(3) else None,
+        )
+
+    return convert
+
+
+def load_graph(source, graph=None):
+    """rdflib.Graph de source : lu depuis le snapshot s'il est à jour,
+    sinon Graph().parse classique."""
+    from rdflib import Graph
+
+    g = Graph() if graph is None else graph
+    path = snapshot_path(source)
+    if not is_fresh(path, source):
+        g.parse(source)
+        return g
+    store = load_snapshot(path, normalize=False)
+    convert = rdflib_term_factory()
+    terms = [convert(t) for t in store.terms]
+    # les préfixes du Turtle ne sont pas dans le snapshot : ceux de rdflib suffisent
+    add = g.add
+    for s, p, o in zip(*(c.tolist() for c in store.spo)):
+        add((terms[s], terms[p], terms[o]))
+    return g
+
+
+def write_graph_snapshot(g, source, path=None):
+    """Snapshot d'un rdflib.Graph qui vient d'être sérialisé dans source."""
+    from stream_writer import nt_term
+
+    store = TripleStore(normalize=False)
+    for s, p, o in g:
+        store.add(nt_term(s), nt_term(p), nt_term(o))
+    return write_snapshot(store, path or snapshot_path(source), source=source)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Crée le snapshot binaire d'un graphe")
+    parser.add_argument("source", nargs="?", default="out.ttl")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    path = write_file_snapshot(args.source)
+    print(
+        f"Snapshot {path} ({os.path.getsize(path)} octets) "
+        f"écrit en {time.perf_counter() - start:.2f}s"
+    )
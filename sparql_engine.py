@@ -0,0 +1,1774 @@
+import argparse
+import csv
+import io
+import json
+import math
+import re
+import sys
+import time
+from decimal import ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_UP, Decimal, InvalidOperation
+from functools import lru_cache
+from urllib.parse import quote
+
+from snapshot import load_store
+from triplestore import load_named_graphs, normalize_term
+from ttl_stream import RDF_TYPE, XSD, nt_literal, unescape
+
+# Moteur SPARQL embarqué : interprète le sous-ensemble de SPARQL 1.1 utilisé
+# dans Queries/ (SELECT, BGP, FILTER, OPTIONAL, UNION, MINUS, BIND, VALUES,
+# sous-requêtes, GROUP BY / HAVING / agrégats, ORDER BY, LIMIT / OFFSET)
+# directement sur un TripleStore.
+#
+# Les motifs de triplets sont résolus sur les index triés (identifiants
+# entiers) et joints avec pandas ; les solutions manipulées ensuite sont des
+# dict {variable: terme N-Triples}, indépendants du store d'origine.
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+XSD_INTEGER = f"{XSD}integer"
+XSD_DECIMAL = f"{XSD}decimal"
+XSD_DOUBLE = f"{XSD}double"
+XSD_BOOLEAN = f"{XSD}boolean"
+XSD_STRING = f"{XSD}string"
+RDF_LANGSTRING = f"{RDF}langString"
+
+INTEGER_TYPES = {
+    XSD + t
+    for t in (
+        "integer",
+        "int",
+        "long",
+        "short",
+        "byte",
+        "nonNegativeInteger",
+        "positiveInteger",
+        "negativeInteger",
+        "nonPositiveInteger",
+        "unsignedLong",
+        "unsignedInt",
+        "unsignedShort",
+        "unsignedByte",
+    )
+}
+NUMERIC_TYPES = INTEGER_TYPES | {XSD_DECIMAL, XSD_DOUBLE, f"{XSD}float"}
+
+MODIFIERS = {"GROUP", "HAVING", "ORDER", "LIMIT", "OFFSET", "VALUES", "ASC", "DESC"}
+AGGREGATES = {"COUNT", "SUM", "AVG", "MIN", "MAX", "SAMPLE", "GROUP_CONCAT"}
+# au-delà, les clés de jointure ne sont plus poussées dans un SERVICE
+MAX_PUSHDOWN = 1000
+
+
+class SparqlSyntaxError(ValueError):
+    pass
+
+
+class SparqlUnsupported(ValueError):
+    pass
+
+
+class ExprError(Exception):
+    """Erreur d'évaluation d'une expression (FILTER : traité comme faux)."""
+
+
+# ---------------------------------------------------------------------------
+# Termes
+# ---------------------------------------------------------------------------
+
+
+class Term:
+    __slots__ = ("kind", "value", "lang", "datatype")
+
+    def __init__(self, kind, value, lang=None, datatype=None):
+        self.kind = kind  # "iri", "bnode" ou "literal"
+        self.value = value
+        self.lang = lang.lower() if lang else None
+        self.datatype = None if datatype == XSD_STRING else datatype
+
+    def nt(self):
+        if self.kind == "iri":
+            return f"<{self.value}>"
+        if self.kind == "bnode":
+            return f"_:{self.value}"
+        return nt_literal(
+            self.value, self.lang, f"<{self.datatype}>" if self.datatype else None
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, Term) and self.nt() == other.nt()
+
+    def __hash__(self):
+        return hash(self.nt())
+
+    def __repr__(self):
+        return f"Term({self.nt()})"
+
+
+_LITERAL_RE = re.compile(r'^"(.*)"(?:@([A-Za-z0-9\-]+)|\^\^<([^>]*)>)?$', re.S)
+
+
+@lru_cache(maxsize=1 << 16)
+def term_of(nt: str) -> Term:
+    """Terme N-Triples -> Term."""
+    if nt.startswith("<"):
+        return Term("iri", unescape(nt[1:-1]))
+    if nt.startswith("_:"):
+        return Term("bnode", nt[2:])
+    m = _LITERAL_RE.match(nt)
+    if m is None:
+        raise ValueError(f"terme N-Triples invalide : {nt!r}")
+    return Term("literal", unescape(m.group(1)), m.group(2), m.group(3))
+
+
+def literal(value, datatype=None, lang=None):
+    return Term("literal", value, lang, datatype)
+
+
+TRUE = literal("true", XSD_BOOLEAN)
+FALSE = literal("false", XSD_BOOLEAN)
+
+
+def boolean(value):
+    return TRUE if value else FALSE
+
+
+def numeric(value):
+    if isinstance(value, bool):
+        return boolean(value)
+    if isinstance(value, int):
+        return literal(str(value), XSD_INTEGER)
+    if isinstance(value, Decimal):
+        text = format(value, "f")
+        if "." not in text:
+            text += ".0"
+        return literal(text, XSD_DECIMAL)
+    if math.isnan(value):
+        return literal("NaN", XSD_DOUBLE)
+    if math.isinf(value):
+        return literal("INF" if value > 0 else "-INF", XSD_DOUBLE)
+    return literal(repr(float(value)).replace("e+", "E").replace("e", "E"), XSD_DOUBLE)
+
+
+def is_numeric(term):
+    return term.kind == "literal" and term.datatype in NUMERIC_TYPES
+
+
+def numeric_value(term):
+    if not is_numeric(term):
+        raise ExprError(f"valeur non numérique : {term!r}")
+    text = term.value.strip()
+    try:
+        if term.datatype in INTEGER_TYPES:
+            return int(text)
+        if term.datatype == XSD_DECIMAL:
+            return Decimal(text)
+        return float(text.replace("INF", "inf"))
+    except (ValueError, InvalidOperation):
+        raise ExprError(f"littéral numérique invalide : {term!r}")
+
+
+def is_string(term):
+    return term.kind == "literal" and term.datatype in (None, RDF_LANGSTRING)
+
+
+def ebv(term):
+    """Valeur booléenne effective."""
+    if term.kind != "literal":
+        raise ExprError("EBV d'une IRI")
+    if term.datatype == XSD_BOOLEAN:
+        return term.value.strip() in ("true", "1")
+    if is_numeric(term):
+        try:
+            value = numeric_value(term)
+        except ExprError:
+            return False
+        return bool(value) and not (isinstance(value, float) and math.isnan(value))
+    if term.datatype is None:
+        return bool(term.value)
+    raise ExprError(f"EBV indéfinie : {term!r}")
+
+
+def order_key(nt):
+    # ordre de tri SPARQL : non lié < nœuds anonymes < IRI < littéraux
+    if nt is None:
+        return (0,)
+    term = term_of(nt) if isinstance(nt, str) else nt
+    if term.kind == "bnode":
+        return (1, term.value)
+    if term.kind == "iri":
+        return (2, term.value)
+    if is_numeric(term):
+        try:
+            return (3, 0, float(numeric_value(term)), "")
+        except ExprError:
+            pass
+    return (3, 1, term.value, term.lang or term.datatype or "")
+
+
+# ---------------------------------------------------------------------------
+# Analyse syntaxique
+# ---------------------------------------------------------------------------
+
+_PN = r"[\w\-%]|\\[^\s]"
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+|\#[^\n]*)
+    |(?P<iri><[^<>"{}|^`\\\s]*>)
+    |(?P<long>\"\"\"(?:[^"\\]|\\.|"(?!""))*\"\"\"|'''(?:[^'\\]|\\.|'(?!''))*''')
+    |(?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+    |(?P<var>[?$]\w+)
+    |(?P<lang>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)
+    |(?P<dt>\^\^)
+    |(?P<number>(?:\d+\.\d*[eE][+-]?\d+|\.\d+[eE][+-]?\d+|\d+[eE][+-]?\d+|\d*\.\d+|\d+))
+    |(?P<bnode>_:(?:[\w\-]|\.(?=[\w\-]))+)
+    |(?P<pname>(?:[A-Za-z][\w\-.]*)?:(?:(?:%(pn)s|:)(?:(?:%(pn)s|[.:])*(?:%(pn)s|:))?)?)
+    |(?P<op>&&|\|\||!=|<=|>=|[=<>!+*/\-])
+    |(?P<punct>[{}()\[\];,.])
+    |(?P<word>[A-Za-z_]\w*)
+    """
+    % {"pn": _PN},
+    re.VERBOSE,
+)
+
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if m is None:
+            line = text.count("\n", 0, pos) + 1
+            raise SparqlSyntaxError(
+                f"jeton invalide ligne {line} : {text[pos:pos + 30]!r}"
+            )
+        pos = m.end()
+        if m.lastgroup != "ws":
+            tokens.append((m.lastgroup, m.group()))
+    tokens.append((None, None))
+    return tokens
+
+
+class Query:
+    def __init__(self):
+        self.distinct = False
+        self.projection = None  # None pour SELECT *, sinon [(var, expr|None)]
+        self.where = None
+        self.group_by = []  # [(expr, var|None)]
+        self.having = []
+        self.order_by = []  # [(expr, descendant)]
+        self.limit = None
+        self.offset = 0
+        self.values = None
+
+    def has_aggregates(self):
+        exprs = [e for _, e in self.projection or [] if e is not None]
+        exprs += self.having + [e for e, _ in self.order_by]
+        return bool(self.group_by) or any(_contains_aggregate(e) for e in exprs)
+
+
+def _contains_aggregate(expr):
+    if not isinstance(expr, tuple):
+        return False
+    if expr[0] == "agg":
+        return True
+    if expr[0] == "exists":
+        return False
+    return any(
+        _contains_aggregate(e)
+        for part in expr[1:]
+        for e in (part if isinstance(part, list) else [part])
+    )
+
+
+class Parser:
+    def __init__(self, text, prefixes=None):
+        self.tokens = tokenize(text)
+        self.pos = 0
+        self.prefixes = dict(prefixes or {})
+        self.base = ""
+        self.bnodes = 0
+
+    # --- jetons ---
+    def peek(self, offset=0):
+        return self.tokens[min(self.pos + offset, len(self.tokens) - 1)]
+
+    def next(self):
+        tok = self.tokens[self.pos]
+        if tok[0] is not None:
+            self.pos += 1
+        return tok
+
+    def at(self, *values):
+        kind, value = self.peek()
+        if kind == "word":
+            return value.upper() in values
+        return value in values
+
+    def accept(self, *values):
+        if self.at(*values):
+            return self.next()[1]
+        return None
+
+    def expect(self, value):
+        if not self.at(value):
+            raise SparqlSyntaxError(f"attendu {value!r}, trouvé {self.peek()[1]!r}")
+        return self.next()[1]
+
+    # --- requêtes ---
+    def prologue(self):
+        while self.at("PREFIX", "BASE"):
+            if self.next()[1].upper() == "PREFIX":
+                kind, name = self.next()
+                if kind != "pname" or not name.endswith(":"):
+                    raise SparqlSyntaxError(f"préfixe invalide : {name!r}")
+                self.prefixes[name[:-1]] = self.iri(*self.next())[1:-1]
+            else:
+                self.base = self.iri(*self.next())[1:-1]
+
+    def parse_query(self):
+        self.prologue()
+        if not self.accept("SELECT"):
+            raise SparqlUnsupported(
+                f"seules les requêtes SELECT sont gérées (trouvé {self.peek()[1]!r})"
+            )
+        query = self.select()
+        self.accept(";")
+        if self.peek()[0] is not None:
+            raise SparqlSyntaxError(f"texte inattendu : {self.peek()[1]!r}")
+        return query
+
+    def select(self):
+        query = Query()
+        if self.accept("DISTINCT"):
+            query.distinct = True
+        else:
+            self.accept("REDUCED")
+        if self.accept("*"):
+            query.projection = None
+        else:
+            query.projection = []
+            while not self.at("WHERE", "{"):
+                kind, value = self.next()
+                if kind == "var":
+                    query.projection.append((value[1:], None))
+                elif value == "(":
+                    expr = self.expression()
+                    self.expect("AS")
+                    query.projection.append((self.variable(), expr))
+                    self.expect(")")
+                else:
+                    raise SparqlSyntaxError(f"projection invalide : {value!r}")
+            if not query.projection:
+                raise SparqlSyntaxError("SELECT sans variable")
+        self.accept("WHERE")
+        query.where = self.group()
+        self.modifiers(query)
+        return query
+
+    def modifiers(self, query):
+        if self.accept("GROUP"):
+            self.expect("BY")
+            while True:
+                kind, value = self.peek()
+                if kind == "var":
+                    self.next()
+                    query.group_by.append((("var", value[1:]), value[1:]))
+                elif value == "(":
+                    self.next()
+                    expr = self.expression()
+                    var = self.variable() if self.accept("AS") else None
+                    self.expect(")")
+                    query.group_by.append((expr, var))
+                elif self.at_call():
+                    query.group_by.append((self.primary(), None))
+                else:
+                    break
+        if self.accept("HAVING"):
+            while self.at("(") or self.at_call():
+                query.having.append(self.constraint())
+        if self.accept("ORDER"):
+            self.expect("BY")
+            while True:
+                if self.at("ASC", "DESC"):
+                    descending = self.next()[1].upper() == "DESC"
+                    self.expect("(")
+                    query.order_by.append((self.expression(), descending))
+                    self.expect(")")
+                elif self.peek()[0] == "var":
+                    query.order_by.append((("var", self.next()[1][1:]), False))
+                elif self.at("(") or self.at_call():
+                    query.order_by.append((self.constraint(), False))
+                else:
+                    break
+        for _ in range(2):
+            if self.accept("LIMIT"):
+                query.limit = self.integer()
+            elif self.accept("OFFSET"):
+                query.offset = self.integer()
+        if self.accept("VALUES"):
+            query.values = self.values_block()
+
+    def at_call(self):
+        # appel de fonction (et pas mot-clé suivi d'une parenthèse)
+        kind, value = self.peek()
+        if self.peek(1)[1] != "(" or kind not in ("word", "pname", "iri"):
+            return False
+        return kind != "word" or value.upper() not in MODIFIERS
+
+    def integer(self):
+        kind, value = self.next()
+        if kind != "number" or not value.isdigit():
+            raise SparqlSyntaxError(f"entier attendu, trouvé {value!r}")
+        return int(value)
+
+    def variable(self):
+        kind, value = self.next()
+        if kind != "var":
+            raise SparqlSyntaxError(f"variable attendue, trouvé {value!r}")
+        return value[1:]
+
+    # --- motifs ---
+    def group(self):
+        """Bloc { ... } -> liste d'éléments ("bgp", [...]), ("filter", e)..."""
+        self.expect("{")
+        if self.at("SELECT"):
+            self.next()
+            query = self.select()
+            self.expect("}")
+            return [("subquery", query)]
+        elements = []
+        while not self.accept("}"):
+            if self.peek()[0] is None:
+                raise SparqlSyntaxError("'}' manquant")
+            if self.at("{"):
+                branches = [self.group()]
+                while self.accept("UNION"):
+                    branches.append(self.group())
+                if len(branches) > 1:
+                    elements.append(("union", branches))
+                else:
+                    elements.append(("group", branches[0]))
+            elif self.accept("FILTER"):
+                elements.append(("filter", self.constraint()))
+            elif self.accept("OPTIONAL"):
+                elements.append(("optional", self.group()))
+            elif self.accept("MINUS"):
+                elements.append(("minus", self.group()))
+            elif self.accept("BIND"):
+                self.expect("(")
+                expr = self.expression()
+                self.expect("AS")
+                var = self.variable()
+                self.expect(")")
+                elements.append(("bind", expr, var))
+            elif self.accept("VALUES"):
+                elements.append(("values", self.values_block()))
+            elif self.accept("SERVICE"):
+                silent = bool(self.accept("SILENT"))
+                endpoint = self.var_or_iri()
+                elements.append(("service", endpoint, self.group(), silent))
+            elif self.accept("GRAPH"):
+                name = self.var_or_iri()
+                elements.append(("graph", name, self.group()))
+            elif self.accept("."):
+                continue
+            else:
+                patterns = []
+                self.triples_block(patterns)
+                if elements and elements[-1][0] == "bgp":
+                    elements[-1][1].extend(patterns)
+                else:
+                    elements.append(("bgp", patterns))
+        return elements
+
+    def var_or_iri(self):
+        kind, value = self.next()
+        if kind == "var":
+            return ("var", value[1:])
+        return ("const", self.iri(kind, value))
+
+    def values_block(self):
+        if self.peek()[0] == "var":
+            variables = [self.variable()]
+            single = True
+        else:
+            self.expect("(")
+            variables = []
+            while not self.accept(")"):
+                variables.append(self.variable())
+            single = False
+        self.expect("{")
+        rows = []
+        while not self.accept("}"):
+            if single:
+                rows.append([self.data_value()])
+            else:
+                self.expect("(")
+                row = []
+                while not self.accept(")"):
+                    row.append(self.data_value())
+                rows.append(row)
+        return variables, rows
+
+    def data_value(self):
+        if self.accept("UNDEF"):
+            return None
+        return self.term(*self.next())
+
+    def triples_block(self, patterns):
+        subject = self.pattern_term(patterns, *self.next())
+        if subject[0] == "blank" and self.at(".", "}"):
+            return
+        self.property_list(subject, patterns, ".")
+
+    def property_list(self, subject, patterns, end):
+        while True:
+            kind, value = self.next()
+            if kind == "word" and value == "a":
+                predicate = ("const", RDF_TYPE)
+            elif kind == "var":
+                predicate = ("var", value[1:])
+            else:
+                predicate = ("const", self.iri(kind, value))
+            while True:
+                obj = self.pattern_term(patterns, *self.next())
+                patterns.append((subject, predicate, obj))
+                if not self.accept(","):
+                    break
+            if self.accept(";"):
+                while self.accept(";"):
+                    pass
+                if self.at(end, "}", ".", "]"):
+                    break
+                continue
+            break
+        if end == "]":
+            self.expect("]")
+
+    def pattern_term(self, patterns, kind, value):
+        if kind == "var":
+            return ("var", value[1:])
+        if value == "[":
+            # nœud anonyme de la requête : variable cachée
+            self.bnodes += 1
+            node = ("var", f"_b{self.bnodes}")
+            if not self.accept("]"):
+                self.property_list(node, patterns, "]")
+            return node
+        if kind == "bnode":
+            return ("var", "_" + value[2:])
+        return ("const", self.term(kind, value))
+
+    def iri(self, kind, value):
+        if kind == "iri":
+            iri = unescape(value[1:-1])
+            if self.base and ":" not in iri:
+                iri = self.base + iri
+            return f"<{iri}>"
+        if kind == "pname":
+            prefix, local = value.split(":", 1)
+            if prefix not in self.prefixes:
+                raise SparqlSyntaxError(f"préfixe inconnu : {prefix}:")
+            local = re.sub(r"\\(.)", r"\1", local)
+            return f"<{self.prefixes[prefix]}{local}>"
+        raise SparqlSyntaxError(f"IRI attendue, trouvé {value!r}")
+
+    def term(self, kind, value):
+        """Constante de la requête, sous forme N-Triples normalisée."""
+        if kind in ("iri", "pname"):
+            return self.iri(kind, value)
+        if kind in ("string", "long"):
+            q = 3 if kind == "long" else 1
+            text = unescape(value[q:-q])
+            if self.peek()[0] == "lang":
+                return nt_literal(text, lang=self.next()[1][1:].lower())
+            if self.accept("^^"):
+                return normalize_term(nt_literal(text, datatype=self.iri(*self.next())))
+            return nt_literal(text)
+        if kind == "number":
+            return numeric_literal(value)
+        if kind == "word" and value in ("true", "false"):
+            return nt_literal(value, datatype=f"<{XSD_BOOLEAN}>")
+        if kind == "op" and value in ("-", "+") and self.peek()[0] == "number":
+            return numeric_literal(value + self.next()[1])
+        raise SparqlSyntaxError(f"terme inattendu : {value!r}")
+
+    # --- expressions ---
+    def constraint(self):
+        if self.at("("):
+            self.next()
+            expr = self.expression()
+            self.expect(")")
+            return expr
+        return self.primary()
+
+    def expression(self):
+        left = self.conjunction()
+        while self.accept("||"):
+            left = ("or", left, self.conjunction())
+        return left
+
+    def conjunction(self):
+        left = self.relational()
+        while self.accept("&&"):
+            left = ("and", left, self.relational())
+        return left
+
+    def relational(self):
+        left = self.additive()
+        op = self.accept("=", "!=", "<", ">", "<=", ">=")
+        if op:
+            return ("cmp", op, left, self.additive())
+        negated = False
+        if self.at("NOT") and self.peek(1)[1].upper() == "IN":
+            self.next()
+            negated = True
+        if self.accept("IN"):
+            return ("in", left, self.arguments(), negated)
+        return left
+
+    def additive(self):
+        left = self.multiplicative()
+        while True:
+            op = self.accept("+", "-")
+            if op is None:
+                return left
+            left = ("arith", op, left, self.multiplicative())
+
+    def multiplicative(self):
+        left = self.unary()
+        while True:
+            op = self.accept("*", "/")
+            if op is None:
+                return left
+            left = ("arith", op, left, self.unary())
+
+    def unary(self):
+        if self.accept("!"):
+            return ("not", self.unary())
+        if self.accept("-"):
+            return ("neg", self.unary())
+        if self.accept("+"):
+            return ("pos", self.unary())
+        return self.primary()
+
+    def arguments(self):
+        self.expect("(")
+        args = []
+        if self.accept(")"):
+            return args
+        while True:
+            args.append(self.expression())
+            if self.accept(")"):
+                return args
+            self.expect(",")
+
+    def primary(self):
+        kind, value = self.peek()
+        if value == "(":
+            self.next()
+            expr = self.expression()
+            self.expect(")")
+            return expr
+        if kind == "var":
+            self.next()
+            return ("var", value[1:])
+        if kind in ("iri", "pname"):
+            self.next()
+            iri = self.iri(kind, value)
+            if self.at("("):
+                return ("call", iri[1:-1], self.arguments())
+            return ("const", iri)
+        if kind == "word" and value not in ("true", "false"):
+            self.next()
+            name = value.upper()
+            if name == "NOT":
+                self.expect("EXISTS")
+                return ("exists", self.group(), True)
+            if name == "EXISTS":
+                return ("exists", self.group(), False)
+            if name in AGGREGATES:
+                return self.aggregate(name)
+            return ("call", name, self.arguments())
+        self.next()
+        return ("const", self.term(kind, value))
+
+    def aggregate(self, name):
+        self.expect("(")
+        distinct = bool(self.accept("DISTINCT"))
+        separator = " "
+        if name == "COUNT" and self.accept("*"):
+            arg = None
+        else:
+            arg = self.expression()
+        if name == "GROUP_CONCAT" and self.accept(";"):
+            self.expect("SEPARATOR")
+            self.expect("=")
+            kind, value = self.next()
+            q = 3 if kind == "long" else 1
+            separator = unescape(value[q:-q])
+        self.expect(")")
+        return ("agg", name, distinct, arg, separator)
+
+
+def numeric_literal(text):
+    text = text.lstrip("+")
+    if "e" in text.lower():
+        datatype = XSD_DOUBLE
+    elif "." in text:
+        datatype = XSD_DECIMAL
+    else:
+        datatype = XSD_INTEGER
+    return nt_literal(text, datatype=f"<{datatype}>")
+
+
+def parse_query(text, prefixes=None):
+    return Parser(text, prefixes).parse_query()
+
+
+# ---------------------------------------------------------------------------
+# Fonctions
+# ---------------------------------------------------------------------------
+
+
+def _string_arg(term):
+    if term.kind != "literal" or not is_string(term) and term.datatype is not None:
+        raise ExprError(f"chaîne attendue : {term!r}")
+    return term.value
+
+
+def _same_kind(source, value):
+    # le résultat garde la langue de l'argument (LCASE, SUBSTR...)
+    return literal(value, lang=source.lang)
+
+
+def _xpath_regex(pattern, flags=""):
+    options = 0
+    for flag in flags:
+        options |= {"i": re.I, "s": re.S, "m": re.M, "x": re.X}.get(flag, 0)
+    try:
+        return re.compile(pattern, options)
+    except re.error as e:
+        raise ExprError(f"regex invalide : {e}")
+
+
+def fn_str(term):
+    if term.kind == "bnode":
+        raise ExprError("STR d'un nœud anonyme")
+    return literal(term.value)
+
+
+def fn_lang(term):
+    if term.kind != "literal":
+        raise ExprError("LANG d'un terme non littéral")
+    return literal(term.lang or "")
+
+
+def fn_datatype(term):
+    if term.kind != "literal":
+        raise ExprError("DATATYPE d'un terme non littéral")
+    return Term("iri", term.datatype or (RDF_LANGSTRING if term.lang else XSD_STRING))
+
+
+def fn_split(term, separator, part):
+    text, sep = _string_arg(term), _string_arg(separator)
+    if sep not in text:
+        return literal("")
+    return _same_kind(term, text.partition(sep)[part])
+
+
+def fn_substr(term, start, length=None):
+    text = _string_arg(term)
+    begin = numeric_value(start)
+    # SUBSTR commence à 1 et arrondit ses arguments
+    first = int(round(begin))
+    last = len(text) + 1 if length is None else first + int(round(numeric_value(length)))
+    return _same_kind(term, text[max(first, 1) - 1 : max(last - 1, 0)])
+
+
+def fn_replace(term, pattern, replacement, flags=None):
+    regex = _xpath_regex(_string_arg(pattern), flags.value if flags else "")
+    repl = re.sub(r"\$(\d+)", r"\\g<\1>", _string_arg(replacement))
+    return _same_kind(term, regex.sub(repl, _string_arg(term)))
+
+
+def fn_concat(*terms):
+    langs = {t.lang for t in terms}
+    lang = langs.pop() if len(langs) == 1 else None
+    return literal("".join(_string_arg(t) for t in terms), lang=lang)
+
+
+def _rounding(term, mode):
+    value = numeric_value(term)
+    if isinstance(value, int):
+        return term
+    if isinstance(value, Decimal):
+        return numeric(value.to_integral_value(rounding=mode))
+    if math.isnan(value) or math.isinf(value):
+        return term
+    if mode == ROUND_FLOOR:
+        return numeric(float(math.floor(value)))
+    if mode == ROUND_CEILING:
+        return numeric(float(math.ceil(value)))
+    return numeric(float(math.floor(value + 0.5)))
+
+
+def _cast_integer(term):
+    if is_numeric(term):
+        value = numeric_value(term)
+        if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+            raise ExprError("cast impossible")
+        return numeric(int(value))
+    if term.datatype == XSD_BOOLEAN:
+        return numeric(int(ebv(term)))
+    try:
+        return numeric(int(term.value.strip()))
+    except ValueError:
+        raise ExprError(f"cast xsd:integer impossible : {term!r}")
+
+
+def _cast_decimal(term):
+    if is_numeric(term):
+        return numeric(Decimal(str(numeric_value(term))))
+    try:
+        return numeric(Decimal(term.value.strip()))
+    except InvalidOperation:
+        raise ExprError(f"cast xsd:decimal impossible : {term!r}")
+
+
+def _cast_double(term):
+    if is_numeric(term):
+        return numeric(float(numeric_value(term)))
+    try:
+        return numeric(float(term.value.strip()))
+    except ValueError:
+        raise ExprError(f"cast xsd:double impossible : {term!r}")
+
+
+def _cast_boolean(term):
+    if is_numeric(term):
+        return boolean(numeric_value(term) != 0)
+    if term.value.strip() in ("true", "1"):
+        return TRUE
+    if term.value.strip() in ("false", "0"):
+        return FALSE
+    raise ExprError(f"cast xsd:boolean impossible : {term!r}")
+
+
+def _lang_matches(tag, pattern):
+    tag, pattern = _string_arg(tag).lower(), _string_arg(pattern).lower()
+    if pattern == "*":
+        return boolean(tag != "")
+    return boolean(tag == pattern or tag.startswith(pattern + "-"))
+
+
+def _year(term):
+    m = re.match(r"-?\d{4,}", term.value.strip())
+    if m is None:
+        raise ExprError(f"pas d'année : {term!r}")
+    return numeric(int(m.group()))
+
+
+FUNCTIONS = {
+    "STR": fn_str,
+    "LANG": fn_lang,
+    "DATATYPE": fn_datatype,
+    "LANGMATCHES": _lang_matches,
+    "ISIRI": lambda t: boolean(t.kind == "iri"),
+    "ISURI": lambda t: boolean(t.kind == "iri"),
+    "ISBLANK": lambda t: boolean(t.kind == "bnode"),
+    "ISLITERAL": lambda t: boolean(t.kind == "literal"),
+    "ISNUMERIC": lambda t: boolean(is_numeric(t)),
+    "SAMETERM": lambda a, b: boolean(a == b),
+    "IRI": lambda t: Term("iri", t.value),
+    "URI": lambda t: Term("iri", t.value),
+    "STRLEN": lambda t: numeric(len(_string_arg(t))),
+    "SUBSTR": fn_substr,
+    "UCASE": lambda t: _same_kind(t, _string_arg(t).upper()),
+    "LCASE": lambda t: _same_kind(t, _string_arg(t).lower()),
+    "STRSTARTS": lambda a, b: boolean(_string_arg(a).startswith(_string_arg(b))),
+    "STRENDS": lambda a, b: boolean(_string_arg(a).endswith(_string_arg(b))),
+    "CONTAINS": lambda a, b: boolean(_string_arg(b) in _string_arg(a)),
+    "STRBEFORE": lambda a, b: fn_split(a, b, 0),
+    "STRAFTER": lambda a, b: fn_split(a, b, 2),
+    "CONCAT": fn_concat,
+    "REPLACE": fn_replace,
+    "REGEX": lambda t, p, f=None: boolean(
+        _xpath_regex(_string_arg(p), f.value if f else "").search(_string_arg(t))
+    ),
+    "ENCODE_FOR_URI": lambda t: literal(quote(_string_arg(t), safe="")),
+    "STRDT": lambda t, dt: literal(_string_arg(t), dt.value),
+    "STRLANG": lambda t, lang: literal(_string_arg(t), lang=_string_arg(lang)),
+    "ABS": lambda t: numeric(abs(numeric_value(t))),
+    "CEIL": lambda t: _rounding(t, ROUND_CEILING),
+    "FLOOR": lambda t: _rounding(t, ROUND_FLOOR),
+    "ROUND": lambda t: _rounding(t, ROUND_HALF_UP),
+    "YEAR": _year,
+    XSD_INTEGER: _cast_integer,
+    f"{XSD}int": _cast_integer,
+    XSD_DECIMAL: _cast_decimal,
+    XSD_DOUBLE: _cast_double,
+    f"{XSD}float": _cast_double,
+    XSD_BOOLEAN: _cast_boolean,
+    XSD_STRING: fn_str,
+}
+
+
+def _promote(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        return float(a), float(b)
+    if isinstance(a, Decimal) or isinstance(b, Decimal):
+        return Decimal(a), Decimal(b)
+    return a, b
+
+
+def arithmetic(op, a, b):
+    x, y = _promote(numeric_value(a), numeric_value(b))
+    if op == "+":
+        return numeric(x + y)
+    if op == "-":
+        return numeric(x - y)
+    if op == "*":
+        return numeric(x * y)
+    if isinstance(x, int):
+        if y == 0:
+            raise ExprError("division par zéro")
+        return numeric(Decimal(x) / Decimal(y))
+    if y == 0 and isinstance(x, Decimal):
+        raise ExprError("division par zéro")
+    try:
+        return numeric(x / y)
+    except ZeroDivisionError:
+        return numeric(math.copysign(math.inf, x) if x else math.nan)
+
+
+def compare(op, a, b):
+    if is_numeric(a) and is_numeric(b):
+        x, y = _promote(numeric_value(a), numeric_value(b))
+    elif (
+        a.kind == b.kind == "literal"
+        and a.lang == b.lang
+        and a.datatype == b.datatype
+        and (op in ("=", "!=") or a.datatype != RDF_LANGSTRING)
+    ):
+        # chaînes, dates, années... : ordre lexical
+        x, y = a.value, b.value
+    elif op in ("=", "!="):
+        if a.kind == b.kind == "literal" and a.datatype == b.datatype and a.datatype:
+            raise ExprError("comparaison de littéraux incompatibles")
+        x, y = a.nt(), b.nt()
+    else:
+        raise ExprError("comparaison impossible")
+    return {
+        "=": x == y,
+        "!=": x != y,
+        "<": x < y,
+        ">": x > y,
+        "<=": x <= y,
+        ">=": x >= y,
+    }[op]
+
+
+# ---------------------------------------------------------------------------
+# Évaluation
+# ---------------------------------------------------------------------------
+
+
+def _certain_vars(solutions):
+    """Variables liées dans toutes les solutions."""
+    if not solutions:
+        return set()
+    common = set(solutions[0])
+    for sol in solutions[1:]:
+        common.intersection_update(sol)
+        if not common:
+            break
+    return common
+
+
+def _compatible(a, b):
+    for var, value in b.items():
+        other = a.get(var)
+        if other is not None and value is not None and other != value:
+            return False
+    return True
+
+
+def join(left, right):
+    if len(left) == 1 and not left[0]:
+        return right
+    if len(right) == 1 and not right[0]:
+        return left
+    if not left or not right:
+        return []
+    keys = sorted(_certain_vars(left) & _certain_vars(right))
+    index = {}
+    for r in right:
+        index.setdefault(tuple(r[k] for k in keys), []).append(r)
+    result = []
+    for l in left:
+        for r in index.get(tuple(l[k] for k in keys), ()):
+            if _compatible(l, r):
+                result.append({**l, **r})
+    return result
+
+
+def _expr_vars(expr):
+    """Variables d'une expression, ou None si elle contient EXISTS / un agrégat."""
+    kind = expr[0]
+    if kind == "var":
+        return {expr[1]}
+    if kind == "const":
+        return set()
+    if kind in ("exists", "agg"):
+        return None
+    if kind == "call":
+        children = expr[2]
+    elif kind == "in":
+        children = [expr[1], *expr[2]]
+    else:
+        children = [e for e in expr[1:] if isinstance(e, tuple)]
+    found = set()
+    for child in children:
+        sub = _expr_vars(child)
+        if sub is None:
+            return None
+        found |= sub
+    return found
+
+
+def _equi_filters(elements):
+    """Égalités FILTER(f(?a) = g(?b)) d'un groupe dont les deux côtés
+    portent sur des variables distinctes : des conditions de jointure."""
+    conjuncts = [e[1] for e in elements if e[0] == "filter"]
+    pairs = []
+    while conjuncts:
+        expr = conjuncts.pop()
+        if expr[0] == "and":
+            conjuncts.extend(expr[1:])
+        elif expr[0] == "cmp" and expr[1] == "=":
+            left, right = _expr_vars(expr[2]), _expr_vars(expr[3])
+            if left and right and not left & right:
+                pairs.append((expr[2], expr[3], left, right))
+    return pairs
+
+
+def _bound_vars(elements):
+    """Variables liées par les éléments obligatoires d'un groupe (hors
+    OPTIONAL, UNION, MINUS)."""
+    found = set()
+    for element in elements:
+        kind = element[0]
+        if kind == "bgp":
+            for pattern in element[1]:
+                found.update(value for k, value in pattern if k == "var")
+        elif kind == "bind":
+            found.add(element[2])
+        elif kind == "values":
+            variables, rows = element[1]
+            for i, var in enumerate(variables):
+                if all(row[i] is not None for row in rows):
+                    found.add(var)
+        elif kind == "subquery":
+            q = element[1]
+            if q.projection is None:
+                found |= _bound_vars(q.where)
+            else:
+                found.update(var for var, _ in q.projection)
+        elif kind in ("group", "service"):
+            found |= _bound_vars(element[2] if kind == "service" else element[1])
+        elif kind == "graph":
+            found |= _bound_vars(element[2])
+    return found
+
+
+class Evaluator:
+    def __init__(self, store, named_graphs=None, services=None, federation=None):
+        """named_graphs : {iri: TripleStore} ; services : {iri: TripleStore}
+        pour les SERVICE évalués localement ; federation : exécuteur des
+        autres SERVICE (federation.Federation)."""
+        self.store = store
+        self.named_graphs = named_graphs or {}
+        self.services = services or {}
+        self.federation = federation
+        self._exists_cache = {}
+
+    # --- motifs de triplets ---
+    def eval_bgp(self, patterns, store=None):
+        import pandas as pd  # chargé à la première requête, pas à l'import
+
+        store = store or self.store
+        if not patterns:
+            return [{}]
+        tables = []
+        for pattern in patterns:
+            ids = []
+            for kind, value in pattern:
+                if kind == "const":
+                    term_id = store.lookup(value)
+                    if term_id is None:
+                        return []  # terme absent du graphe : aucune solution
+                    ids.append(term_id)
+                else:
+                    ids.append(None)
+            columns = store.match(*ids)
+            frame = {}
+            mask = None
+            for (kind, value), column in zip(pattern, columns):
+                if kind != "var":
+                    continue
+                if value in frame:  # même variable deux fois dans le motif
+                    same = frame[value] == column
+                    mask = same if mask is None else mask & same
+                else:
+                    frame[value] = column
+            if mask is not None:
+                frame = {k: v[mask] for k, v in frame.items()}
+            if not frame:
+                if len(columns[0]) == 0:
+                    return []
+                continue
+            tables.append(pd.DataFrame(frame, copy=False))
+        if not tables:
+            return [{}]
+
+        # ordre de jointure : le motif le plus sélectif d'abord, puis ceux
+        # qui partagent une variable avec le résultat courant
+        tables.sort(key=len)
+        result = tables.pop(0)
+        while tables:
+            bound = set(result.columns)
+            linked = [i for i, t in enumerate(tables) if bound & set(t.columns)]
+            table = tables.pop(
+                min(linked or range(len(tables)), key=lambda i: len(tables[i]))
+            )
+            shared = sorted(bound & set(table.columns))
+            if len(result) == 0:
+                return []
+            if shared:
+                result = result.merge(table, on=shared, how="inner")
+            else:
+                result = result.merge(table, how="cross")
+        return self.decode(result, store)
+
+    @staticmethod
+    def decode(frame, store):
+        terms = store.term_array()
+        columns = {c: terms[frame[c].to_numpy()] for c in frame.columns}
+        names = list(columns)
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+    # --- groupes ---
+    def eval_group(self, elements, store=None, filters_out=None):
+        solutions = [{}]
+        filters = []
+        # égalités entre variables de deux éléments : jointure par hachage
+        # au lieu d'un produit cartésien filtré à la fin
+        equi = _equi_filters(elements)
+        for element in elements:
+            kind = element[0]
+            right = None
+            if kind == "bgp":
+                right = self.eval_bgp(element[1], store)
+            elif kind == "filter":
+                filters.append(element[1])
+            elif kind == "bind":
+                _, expr, var = element
+                extended = []
+                for sol in solutions:
+                    sol = dict(sol)
+                    try:
+                        sol[var] = self.eval_expr(expr, sol).nt()
+                    except ExprError:
+                        pass
+                    extended.append(sol)
+                solutions = extended
+            elif kind == "optional":
+                right_filters = []
+                right = self.eval_group(element[1], store, right_filters)
+                solutions = self.left_join(solutions, right, right_filters)
+                right = None
+            elif kind == "union":
+                right = []
+                for branch in element[1]:
+                    right.extend(self.eval_group(branch, store))
+            elif kind == "group":
+                right = self.eval_group(element[1], store)
+            elif kind == "subquery":
+                _, right = self.run(element[1], store)
+            elif kind == "minus":
+                solutions = self.minus(solutions, self.eval_group(element[1], store))
+            elif kind == "values":
+                right = self.values_solutions(*element[1])
+            elif kind == "graph":
+                right = self.eval_graph(element[1], element[2])
+            elif kind == "service":
+                _, endpoint, group, silent = element
+                pushed = self.pushdown(solutions, group, equi)
+                right = self.eval_service(endpoint, group + pushed, silent)
+            if right is not None:
+                solutions = self.join_on(solutions, right, equi)
+        if filters_out is not None:
+            # filtres d'un OPTIONAL : appliqués pendant la jointure gauche
+            filters_out.extend(filters)
+            return solutions
+        return [s for s in solutions if all(self.test(f, s) for f in filters)]
+
+    def join_on(self, left, right, equi):
+        """join(left, right), par hachage sur une égalité FILTER quand les
+        deux côtés n'ont aucune variable commune."""
+        trivial = (len(left) == 1 and not left[0]) or (len(right) == 1 and not right[0])
+        if equi and left and right and not trivial:
+            left_vars, right_vars = _certain_vars(left), _certain_vars(right)
+            if not left_vars & right_vars:
+                for a, b, a_vars, b_vars in equi:
+                    if a_vars <= left_vars and b_vars <= right_vars:
+                        return self.hash_join(left, right, a, b)
+                    if b_vars <= left_vars and a_vars <= right_vars:
+                        return self.hash_join(left, right, b, a)
+        return join(left, right)
+
+    def join_key(self, expr, solution):
+        try:
+            term = self.eval_expr(expr, solution)
+        except ExprError:
+            return None  # le FILTER échouerait : la ligne ne joint rien
+        if is_numeric(term):
+            try:
+                return ("number", numeric_value(term))
+            except ExprError:
+                return None
+        return term.nt()
+
+    def hash_join(self, left, right, left_expr, right_expr):
+        # le FILTER reste appliqué en fin de groupe : le hachage ne fait
+        # qu'écarter les paires qui ne peuvent pas le satisfaire
+        index = {}
+        for r in right:
+            key = self.join_key(right_expr, r)
+            if key is not None:
+                index.setdefault(key, []).append(r)
+        result = []
+        for l in left:
+            key = self.join_key(left_expr, l)
+            if key is None:
+                continue
+            for r in index.get(key, ()):
+                if _compatible(l, r):
+                    result.append({**l, **r})
+        return result
+
+    def pushdown(self, solutions, elements, equi):
+        """Éléments ajoutés au groupe d'un SERVICE pour n'en rapporter que les
+        lignes utiles : VALUES des variables déjà liées, et VALUES / FILTER IN
+        des clés des égalités FILTER avec le reste de la requête."""
+        if not solutions or (len(solutions) == 1 and not solutions[0]):
+            return []
+        scope = _bound_vars(elements)
+        certain = _certain_vars(solutions)
+        pushed = []
+        shared = sorted(certain & scope)
+        if shared:
+            rows = list(dict.fromkeys(tuple(s[v] for v in shared) for s in solutions))
+            if len(rows) <= MAX_PUSHDOWN:
+                pushed.append(("values", (shared, [list(r) for r in rows])))
+        for a, b, a_vars, b_vars in equi:
+            for outer, inner, outer_vars, inner_vars in (
+                (a, b, a_vars, b_vars),
+                (b, a, b_vars, a_vars),
+            ):
+                if not (outer_vars <= certain and inner_vars <= scope):
+                    continue
+                if inner_vars & certain:
+                    continue
+                keys = {}
+                for sol in solutions:
+                    try:
+                        keys[self.eval_expr(outer, sol).nt()] = None
+                    except ExprError:
+                        continue
+                if len(keys) > MAX_PUSHDOWN or any(k.startswith("_:") for k in keys):
+                    continue
+                if inner[0] == "var" and all(k.startswith("<") for k in keys):
+                    pushed.append(("values", ([inner[1]], [[k] for k in keys])))
+                else:
+                    options = [("const", k) for k in keys]
+                    pushed.append(("filter", ("in", inner, options, False)))
+        return pushed
+
+    @staticmethod
+    def values_solutions(variables, rows):
+        return [
+            {v: x for v, x in zip(variables, row) if x is not None} for row in rows
+        ]
+
+    def left_join(self, left, right, filters):
+        keys = sorted(_certain_vars(left) & _certain_vars(right)) if left else []
+        index = {}
+        for r in right:
+            index.setdefault(tuple(r[k] for k in keys), []).append(r)
+        result = []
+        for l in left:
+            matched = False
+            for r in index.get(tuple(l[k] for k in keys), ()):
+                if _compatible(l, r):
+                    merged = {**l, **r}
+                    if all(self.test(f, merged) for f in filters):
+                        result.append(merged)
+                        matched = True
+            if not matched:
+                result.append(l)
+        return result
+
+    @staticmethod
+    def minus(left, right):
+        result = []
+        for l in left:
+            removed = False
+            for r in right:
+                if set(l) & set(r) and _compatible(l, r):
+                    removed = True
+                    break
+            if not removed:
+                result.append(l)
+        return result
+
+    def eval_graph(self, name, elements):
+        kind, value = name
+        if kind == "const":
+            store = self.named_graphs.get(value[1:-1])
+            if store is None:
+                return []
+            return self.eval_group(elements, store)
+        solutions = []
+        for iri, store in self.named_graphs.items():
+            for sol in self.eval_group(elements, store):
+                if sol.get(value, f"<{iri}>") == f"<{iri}>":
+                    solutions.append({**sol, value: f"<{iri}>"})
+        return solutions
+
+    def eval_service(self, endpoint, elements, silent):
+        """Solutions du groupe d'un SERVICE : sur un store local s'il est
+        déclaré dans services, sinon par la fédération. SILENT : un échec
+        donne une solution vide (neutre pour la jointure)."""
+        kind, value = endpoint
+        iri = value[1:-1] if kind == "const" else None
+        store = self.services.get(iri) if iri else None
+        if store is not None:
+            return self.eval_group(elements, store)
+        try:
+            if iri is None or self.federation is None:
+                raise SparqlUnsupported(f"SERVICE non géré : {value}")
+            return self.federation.select(iri, elements)
+        except SparqlUnsupported:
+            if silent:
+                return [{}]
+            raise
+
+    # --- expressions ---
+    def test(self, expr, solution):
+        try:
+            return ebv(self.eval_expr(expr, solution))
+        except ExprError:
+            return False
+
+    def eval_expr(self, expr, solution, group=None):
+        kind = expr[0]
+        if kind == "var":
+            value = solution.get(expr[1])
+            if value is None:
+                raise ExprError(f"?{expr[1]} non liée")
+            return term_of(value)
+        if kind == "const":
+            return term_of(expr[1])
+        if kind == "or":
+            try:
+                left = ebv(self.eval_expr(expr[1], solution, group))
+            except ExprError:
+                if ebv(self.eval_expr(expr[2], solution, group)):
+                    return TRUE
+                raise
+            return TRUE if left else boolean(ebv(self.eval_expr(expr[2], solution, group)))
+        if kind == "and":
+            try:
+                left = ebv(self.eval_expr(expr[1], solution, group))
+            except ExprError:
+                if not ebv(self.eval_expr(expr[2], solution, group)):
+                    return FALSE
+                raise
+            return boolean(left and ebv(self.eval_expr(expr[2], solution, group)))
+        if kind == "not":
+            return boolean(not ebv(self.eval_expr(expr[1], solution, group)))
+        if kind == "cmp":
+            a = self.eval_expr(expr[2], solution, group)
+            b = self.eval_expr(expr[3], solution, group)
+            return boolean(compare(expr[1], a, b))
+        if kind == "arith":
+            a = self.eval_expr(expr[2], solution, group)
+            b = self.eval_expr(expr[3], solution, group)
+            return arithmetic(expr[1], a, b)
+        if kind == "neg":
+            return numeric(-numeric_value(self.eval_expr(expr[1], solution, group)))
+        if kind == "pos":
+            return numeric(numeric_value(self.eval_expr(expr[1], solution, group)))
+        if kind == "in":
+            value = self.eval_expr(expr[1], solution, group)
+            found = False
+            for option in expr[2]:
+                try:
+                    if compare("=", value, self.eval_expr(option, solution, group)):
+                        found = True
+                        break
+                except ExprError:
+                    continue
+            return boolean(found != expr[3])
+        if kind == "exists":
+            return boolean(self.exists(expr[1], solution) != expr[2])
+        if kind == "agg":
+            if group is None:
+                raise ExprError("agrégat hors GROUP BY")
+            return self.aggregate(expr, group)
+        if kind == "call":
+            return self.call(expr[1], expr[2], solution, group)
+        raise SparqlUnsupported(f"expression inconnue : {kind}")
+
+    def call(self, name, args, solution, group):
+        if name == "BOUND":
+            return boolean(solution.get(args[0][1]) is not None)
+        if name == "IF":
+            condition = ebv(self.eval_expr(args[0], solution, group))
+            return self.eval_expr(args[1 if condition else 2], solution, group)
+        if name == "COALESCE":
+            for arg in args:
+                try:
+                    return self.eval_expr(arg, solution, group)
+                except ExprError:
+                    continue
+            raise ExprError("COALESCE sans valeur")
+        function = FUNCTIONS.get(name)
+        if function is None:
+            raise SparqlUnsupported(f"fonction non gérée : {name}")
+        values = [self.eval_expr(a, solution, group) for a in args]
+        try:
+            return function(*values)
+        except TypeError:
+            raise ExprError(f"{name} : mauvais nombre d'arguments")
+
+    def exists(self, elements, solution):
+        # le motif est évalué une fois, puis confronté à chaque solution
+        key = id(elements)
+        if key not in self._exists_cache:
+            self._exists_cache[key] = (elements, self.eval_group(elements))
+        _, candidates = self._exists_cache[key]
+        return any(_compatible(solution, c) for c in candidates)
+
+    def aggregate(self, expr, group):
+        _, name, distinct, arg, separator = expr
+        if arg is None:  # COUNT(*)
+            rows = group
+            if distinct:
+                rows = {tuple(sorted(r.items())) for r in rows}
+            return numeric(len(rows))
+        values = []
+        for sol in group:
+            try:
+                values.append(self.eval_expr(arg, sol))
+            except ExprError:
+                continue
+        if distinct:
+            values = list(dict.fromkeys(values))
+        if name == "COUNT":
+            return numeric(len(values))
+        if name == "SAMPLE":
+            if not values:
+                raise ExprError("SAMPLE vide")
+            return values[0]
+        if name == "GROUP_CONCAT":
+            return literal(separator.join(_string_arg(fn_str(v)) for v in values))
+        if name in ("MIN", "MAX"):
+            if not values:
+                raise ExprError(f"{name} vide")
+            pick = min if name == "MIN" else max
+            return pick(values, key=order_key)
+        total = 0
+        for value in values:
+            total = _promote(total, numeric_value(value))
+            total = total[0] + total[1]
+        if name == "SUM":
+            return numeric(total)
+        if not values:
+            return numeric(0)
+        if isinstance(total, int):
+            total = Decimal(total)
+        return numeric(total / len(values))
+
+    # --- requête complète ---
+    def run(self, query, store=None):
+        """Évalue une requête SELECT : (variables, solutions)."""
+        solutions = self.eval_group(query.where, store)
+        if query.values is not None:
+            solutions = join(solutions, self.values_solutions(*query.values))
+
+        if query.has_aggregates():
+            items = self.group(query, solutions)
+        else:
+            items = []
+            for sol in solutions:
+                row = dict(sol)
+                for var, expr in query.projection or []:
+                    if expr is not None:
+                        self.assign(row, var, expr, row, None)
+                items.append((row, None))
+
+        for expr, descending in reversed(query.order_by):
+            items.sort(
+                key=lambda item: order_key(self.safe_eval(expr, *item)),
+                reverse=descending,
+            )
+
+        if query.projection is None:
+            variables = []
+            for row, _ in items:
+                for var in row:
+                    if var not in variables and not var.startswith("_"):
+                        variables.append(var)
+            if not items:
+                variables = _pattern_vars(query.where)
+        else:
+            variables = [var for var, _ in query.projection]
+        rows = [{v: row[v] for v in variables if row.get(v) is not None} for row, _ in items]
+
+        if query.distinct:
+            seen = set()
+            unique = []
+            for row in rows:
+                key = tuple(row.get(v) for v in variables)
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(row)
+            rows = unique
+        end = None if query.limit is None else query.offset + query.limit
+        return variables, rows[query.offset : end]
+
+    def group(self, query, solutions):
+        groups = {}
+        for sol in solutions:
+            key = tuple(self.safe_eval(expr, sol, None) for expr, _ in query.group_by)
+            groups.setdefault(key, []).append(sol)
+        if not groups and not query.group_by:
+            groups[()] = []
+        items = []
+        for key, members in groups.items():
+            row = {}
+            for (expr, var), value in zip(query.group_by, key):
+                if var is not None and value is not None:
+                    row[var] = value
+            if not all(self.test_group(h, row, members) for h in query.having):
+                continue
+            for var, expr in query.projection or []:
+                if expr is not None:
+                    self.assign(row, var, expr, row, members)
+                elif var not in row and members:
+                    # variable hors GROUP BY : on prend un échantillon
+                    value = members[0].get(var)
+                    if value is not None:
+                        row[var] = value
+            items.append((row, members))
+        return items
+
+    def test_group(self, expr, row, members):
+        try:
+            return ebv(self.eval_expr(expr, row, members))
+        except ExprError:
+            return False
+
+    def assign(self, row, var, expr, solution, group):
+        try:
+            row[var] = self.eval_expr(expr, solution, group).nt()
+        except ExprError:
+            row.pop(var, None)
+
+    def safe_eval(self, expr, solution, group):
+        try:
+            return self.eval_expr(expr, solution, group).nt()
+        except ExprError:
+            return None
+
+
+def _pattern_vars(elements):
+    variables = []
+    for element in elements:
+        if element[0] == "bgp":
+            for pattern in element[1]:
+                for kind, value in pattern:
+                    if kind == "var" and not value.startswith("_"):
+                        if value not in variables:
+                            variables.append(value)
+    return variables
+
+
+def query(store, text, named_graphs=None, services=None, federation=None):
+    """Exécute une requête SELECT sur le store : (variables, lignes)."""
+    evaluator = Evaluator(store, named_graphs, services, federation)
+    return evaluator.run(parse_query(text))
+
+
+# ---------------------------------------------------------------------------
+# Sorties
+# ---------------------------------------------------------------------------
+
+
+def csv_value(nt):
+    # même rendu que les exports Fuseki : valeur brute, sans langue ni type
+    if nt is None:
+        return ""
+    term = term_of(nt)
+    if term.kind == "bnode":
+        return f"_:{term.value}"
+    return term.value
+
+
+# Les résultats sont produits par morceaux de CHUNK_ROWS lignes : un serveur
+# peut les envoyer au fil de l'eau (sparql_server.py), un fichier les écrit
+# sans construire tout le document en mémoire.
+CHUNK_ROWS = 500
+
+
+def iter_csv(variables, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator="\n")
+    writer.writerow(variables)
+    for i, row in enumerate(rows, 1):
+        writer.writerow([csv_value(row.get(v)) for v in variables])
+        if i % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_csv(variables, rows, f):
+    f.writelines(iter_csv(variables, rows))
+
+
+def json_binding(nt):
+    term = term_of(nt)
+    if term.kind == "iri":
+        return {"type": "uri", "value": term.value}
+    if term.kind == "bnode":
+        return {"type": "bnode", "value": term.value}
+    binding = {"type": "literal", "value": term.value}
+    if term.lang:
+        binding["xml:lang"] = term.lang
+    elif term.datatype:
+        binding["datatype"] = term.datatype
+    return binding
+
+
+def iter_json(variables, rows):
+    # même texte que json.dump du document complet
+    head = json.dumps({"vars": variables}, ensure_ascii=False)
+    chunk = [f'{{"head": {head}, "results": {{"bindings": [']
+    for i, row in enumerate(rows):
+        binding = {v: json_binding(x) for v, x in row.items()}
+        chunk.append((", " if i else "") + json.dumps(binding, ensure_ascii=False))
+        if len(chunk) >= CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append("]}}")
+    yield "".join(chunk)
+
+
+def write_json(variables, rows, f):
+    f.writelines(iter_json(variables, rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exécute une requête SPARQL en local")
+    parser.add_argument("query", help="fichier .sparql")
+    parser.add_argument("--data", default="out.ttl", help="graphe Turtle / N-Triples")
+    parser.add_argument("-o", "--output", help="fichier de résultats (défaut : stdout)")
+    parser.add_argument("--format", choices=("csv", "json"), default="csv")
+    parser.add_argument(
+        "--named",
+        action="append",
+        default=[],
+        metavar="FICHIER",
+        help="fichier TriG dont les graphes nommés sont interrogeables (GRAPH <iri>)",
+    )
+    parser.add_argument(
+        "--service-local",
+        action="append",
+        default=[],
+        metavar="IRI",
+        help="SERVICE <IRI> évalué sur le graphe local",
+    )
+    parser.add_argument(
+        "--service",
+        action="append",
+        default=[],
+        metavar="IRI=FICHIER|URL",
+        help="SERVICE <IRI> remplacé par un graphe local ou un autre endpoint",
+    )
+    parser.add_argument(
+        "--service-cache",
+        metavar="DOSSIER",
+        help="cache des résultats de SERVICE (défaut : service_cache/)",
+    )
+    parser.add_argument(
+        "--service-ttl", type=float, help="durée de vie du cache, en heures"
+    )
+    parser.add_argument(
+        "--offline", action="store_true", help="SERVICE servis par le cache seul"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = load_store(args.data)
+    loaded = time.perf_counter()
+    with open(args.query, encoding="utf-8") as f:
+        text = f.read()
+    named = {}
+    for path in args.named:
+        named.update(load_named_graphs(path))
+    services = {iri: store for iri in args.service_local}
+    endpoints = {}
+    for spec in args.service:
+        iri, _, target = spec.partition("=")
+        if target.startswith(("http://", "https://")):
+            endpoints[iri] = target
+        else:
+            services[iri] = load_store(target)
+
+    from federation import DEFAULT_CACHE_DIR, DEFAULT_TTL, Federation
+
+    federation = Federation(
+        endpoints,
+        cache_dir=args.service_cache or DEFAULT_CACHE_DIR,
+        ttl=DEFAULT_TTL if args.service_ttl is None else args.service_ttl * 3600,
+        offline=args.offline,
+    )
+    try:
+        variables, rows = query(store, text, named, services, federation)
+    except (SparqlSyntaxError, SparqlUnsupported) as e:
+        sys.exit(f"Requête non exécutée : {e}")
+    done = time.perf_counter()
+
+    writer = write_json if args.format == "json" else write_csv
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            writer(variables, rows, f)
+    else:
+        writer(variables, rows, sys.stdout)
+    print(
+        f"{len(store)} triplets chargés en {loaded - start:.2f}s, "
+        f"{len(rows)} résultats en {done - loaded:.3f}s",
+        file=sys.stderr,
+    )
+    if federation.requests or federation.cache.hits or federation.cache.misses:
+        print(federation.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    # federation.py importe sparql_engine : une seule copie du module (et de
+    # ses exceptions) quand le moteur est lancé en script
+    sys.modules.setdefault("sparql_engine", sys.modules[__name__])
+    main()
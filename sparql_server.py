@@ -0,0 +1,277 @@
+import argparse
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from snapshot import load_store
+from sparql_engine import (
+    SparqlSyntaxError,
+    SparqlUnsupported,
+    iter_csv,
+    iter_json,
+    query,
+    tokenize,
+)
+from triplestore import load_named_graphs
+
+# Endpoint SPARQL (protocole SPARQL 1.1, requêtes SELECT) sur le graphe
+# converti, pour remplacer Fuseki auprès de nos propres consommateurs :
+#
+#   python sparql_server.py --data out.ttl --port 3030
+#   curl --data-urlencode query@Queries/requete1.sparql http://localhost:3030/sparql
+#
+# Le graphe (ou son snapshot) est chargé une fois ; les requêtes sont servies
+# par un pool de WORKERS threads. Les résultats sont gardés dans un cache LRU
+# indexé par le texte normalisé de la requête (jetons, sans espaces ni
+# commentaires) et envoyés par morceaux (Transfer-Encoding: chunked) en JSON
+# ou en CSV selon l'en-tête Accept ou le paramètre format.
+
+WORKERS = 8
+CACHE_SIZE = 256
+IDLE_TIMEOUT = 30  # secondes avant de fermer une connexion keep-alive inactive
+
+FORMATS = {
+    "json": ("application/sparql-results+json; charset=utf-8", iter_json),
+    "csv": ("text/csv; charset=utf-8", iter_csv),
+}
+ACCEPT = {
+    "application/sparql-results+json": "json",
+    "application/json": "json",
+    "text/csv": "csv",
+}
+
+
+def normalize_query(text):
+    """Clé de cache : jetons de la requête, mots-clés en majuscules."""
+    tokens = tokenize(text)[:-1]  # sans le jeton de fin
+    return " ".join(
+        value.upper() if kind == "word" else value for kind, value in tokens
+    )
+
+
+class ResultCache:
+    """Cache LRU (variables, lignes) partagé par les workers."""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, result):
+        if not self.size:
+            return
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+def negotiate(accept, requested=None):
+    if requested:
+        return requested if requested in FORMATS else None
+    for part in (accept or "").split(","):
+        media = part.split(";")[0].strip()
+        if media in ACCEPT:
+            return ACCEPT[media]
+    return "json"
+
+
+class SparqlHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, réponses par morceaux
+    timeout = IDLE_TIMEOUT
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status, body):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _params(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if self.command == "POST":
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length).decode("utf-8")
+            content_type = self.headers.get("Content-Type", "").split(";")[0]
+            if content_type == "application/sparql-query":
+                params["query"] = [body]
+            else:
+                params.update(parse_qs(body))
+        return url.path, {k: v[0] for k, v in params.items()}
+
+    def _route(self):
+        path, params = self._params()
+        if path not in ("/sparql", "/query", "/"):
+            return self._send(404, f"chemin inconnu : {path}\n")
+        text = params.get("query")
+        if not text:
+            return self._send(200 if path == "/" else 400, self.server.describe())
+        fmt = negotiate(self.headers.get("Accept"), params.get("format"))
+        if fmt is None:
+            return self._send(406, f"format inconnu : {params['format']}\n")
+        try:
+            variables, rows = self.server.select(text)
+        except (SparqlSyntaxError, SparqlUnsupported) as e:
+            return self._send(400, f"Requête non exécutée : {e}\n")
+
+        content_type, serializer = FORMATS[fmt]
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+        for chunk in serializer(variables, rows):
+            data = chunk.encode("utf-8")
+            if data:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.write(b"0\r\n\r\n")
+
+    do_GET = _route
+    do_POST = _route
+    do_HEAD = _route
+
+
+class SparqlServer(HTTPServer):
+    """HTTPServer dont les connexions sont traitées par un pool de threads."""
+
+    def __init__(
+        self,
+        address,
+        store,
+        named_graphs=None,
+        workers=WORKERS,
+        cache_size=CACHE_SIZE,
+        quiet=False,
+    ):
+        super().__init__(address, SparqlHandler)
+        # index construits avant la première requête : les workers ne font
+        # ensuite que lire le store
+        len(store)
+        store.pos, store.osp, store.ids, store.term_array()
+        self.store = store
+        self.named_graphs = named_graphs or {}
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="sparql")
+        self.workers = workers
+        self.cache = ResultCache(cache_size)
+        self.quiet = quiet
+        self.queries = 0
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+    def select(self, text):
+        """(variables, lignes) de la requête, depuis le cache si possible."""
+        self.queries += 1
+        key = normalize_query(text)
+        result = self.cache.get(key)
+        if result is None:
+            result = query(self.store, text, self.named_graphs)
+            self.cache.set(key, result)
+        return result
+
+    def describe(self):
+        return (
+            f"Endpoint SPARQL : {len(self.store)} triplets, {self.workers} workers, "
+            f"{self.queries} requêtes, cache {self.cache.hits} hits / "
+            f"{self.cache.misses} misses\n"
+            "GET ou POST /sparql?query=... (JSON ou CSV : en-tête Accept ou format=)\n"
+        )
+
+
+def serve(store, host="127.0.0.1", port=0, background=False, **options):
+    """Démarre un SparqlServer sur store : (serveur, url). background=True : dans
+    un thread, sinon bloque jusqu'à Ctrl+C."""
+    server = SparqlServer((host, port), store, **options)
+    host, port = server.server_address[:2]
+    url = f"http://{host}:{port}/sparql"
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, url
+    print(f"Endpoint SPARQL sur {url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return server, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint SPARQL sur le graphe local")
+    parser.add_argument("--data", default="out.ttl", help="graphe Turtle / N-Triples")
+    parser.add_argument(
+        "--named",
+        action="append",
+        default=[],
+        metavar="FICHIER",
+        help="fichier TriG dont les graphes nommés sont interrogeables (GRAPH <iri>)",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3030)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument(
+        "--cache-size", type=int, default=CACHE_SIZE, help="résultats gardés (0 : aucun)"
+    )
+    parser.add_argument("--quiet", action="store_true", help="pas de log par requête")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = load_store(args.data)
+    named = {}
+    for path in args.named:
+        named.update(load_named_graphs(path))
+    print(
+        f"{len(store)} triplets chargés en {time.perf_counter() - start:.2f}s",
+        file=sys.stderr,
+    )
+    serve(
+        store,
+        args.host,
+        args.port,
+        named_graphs=named,
+        workers=args.workers,
+        cache_size=args.cache_size,
+        quiet=args.quiet,
+    )
+
+
+if __name__ == "__main__":
+    main()
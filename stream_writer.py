@@ -0,0 +1,158 @@
+import hashlib
+import re
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.namespace import XSD
+
+# --- Écriture de triplets en flux, sans passer par un rdflib.Graph ---
+# Les writers exposent add((s, p, o)) comme un Graph : les fonctions
+# add_*_triples du converter peuvent donc écrire directement dedans.
+
+_RDF_TYPE = URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#type")
+
+_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_ESCAPE_RE = re.compile(r'[\\"\n\r\t]')
+
+# partie locale d'un nom préfixé (sous-ensemble prudent de PN_LOCAL)
+_LOCAL_RE = re.compile(
+    r"^(?:[A-Za-z0-9_]|%[0-9A-Fa-f]{2})"
+    r"(?:(?:[A-Za-z0-9_\-.]|%[0-9A-Fa-f]{2})*(?:[A-Za-z0-9_\-]|%[0-9A-Fa-f]{2}))?$"
+)
+
+
+def escape_string(value: str) -> str:
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES[m.group()], value)
+
+
+def nt_term(term) -> str:
+    """Sérialise un terme rdflib au format N-Triples."""
+    if isinstance(term, URIRef):
+        return f"<{term}>"
+    if isinstance(term, Literal):
+        lexical = f'"{escape_string(str(term))}"'
+        if term.language:
+            return f"{lexical}@{term.language}"
+        if term.datatype:
+            return f"{lexical}^^<{term.datatype}>"
+        return lexical
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    raise TypeError(f"Terme RDF non supporté : {term!r}")
+
+
+def nt_line(triple) -> str:
+    s, p, o = triple
+    return f"{nt_term(s)} {nt_term(p)} {nt_term(o)} .\n"
+
+
+def triple_digest(line: str) -> bytes:
+    # 8 octets suffisent pour dédupliquer quelques millions de triplets
+    return hashlib.blake2b(line.encode("utf-8"), digest_size=8).digest()
+
+
+class _StreamWriter:
+    def __init__(self, destination, dedup_prefixes=()):
+        self.destination = destination
+        self.dedup_prefixes = tuple(str(p) for p in dedup_prefixes)
+        self.seen = set()
+        self.written = 0
+        self.duplicates = 0
+        self.prefixes = {}
+        self.f = open(destination, "w", encoding="utf-8")
+
+    def bind(self, prefix, namespace):
+        self.prefixes[prefix] = str(namespace)
+
+    def _is_duplicate(self, triple, line):
+        # seuls les sujets partagés (lieux, organisations...) sont dédupliqués
+        if not str(triple[0]).startswith(self.dedup_prefixes):
+            return False
+        digest = triple_digest(line)
+        if digest in self.seen:
+            self.duplicates += 1
+            return True
+        self.seen.add(digest)
+        return False
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        if not self.f.closed:
+            self.flush()
+            self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NTriplesWriter(_StreamWriter):
+    def add(self, triple):
+        line = nt_line(triple)
+        if self.dedup_prefixes and self._is_duplicate(triple, line):
+            return
+        self.f.write(line)
+        self.written += 1
+
+
+class TurtleWriter(_StreamWriter):
+    """Turtle "assez joli" : les triplets sont regroupés par sujet à
+    chaque flush (fin de chunk). Un sujet présent dans plusieurs chunks
+    donne plusieurs blocs, ce qui reste du Turtle valide."""
+
+    def __init__(self, destination, dedup_prefixes=()):
+        super().__init__(destination, dedup_prefixes)
+        self.buffer = {}
+        self.header_written = False
+
+    def add(self, triple):
+        if self.dedup_prefixes and self._is_duplicate(triple, nt_line(triple)):
+            return
+        self.buffer.setdefault(triple[0], []).append((triple[1], triple[2]))
+        self.written += 1
+
+    def term(self, term):
+        if isinstance(term, URIRef):
+            uri = str(term)
+            best = None
+            for prefix, ns in self.prefixes.items():
+                if uri.startswith(ns) and (best is None or len(ns) > len(best[1])):
+                    best = (prefix, ns)
+            if best and _LOCAL_RE.match(uri[len(best[1]) :]):
+                return f"{best[0]}:{uri[len(best[1]):]}"
+            return f"<{uri}>"
+        if isinstance(term, Literal) and term.datatype and not term.language:
+            return f'"{escape_string(str(term))}"^^{self.term(term.datatype)}'
+        return nt_term(term)
+
+    def _write_header(self):
+        if "xsd" not in self.prefixes:
+            self.prefixes["xsd"] = str(XSD)
+        for prefix, ns in sorted(self.prefixes.items()):
+            self.f.write(f"@prefix {prefix}: <{ns}> .\n")
+        self.f.write("\n")
+        self.header_written = True
+
+    def flush(self):
+        if not self.header_written:
+            self._write_header()
+        for subject, pairs in self.buffer.items():
+            lines = []
+            for p, o in pairs:
+                pred = "a" if p == _RDF_TYPE else self.term(p)
+                lines.append(f"{pred} {self.term(o)}")
+            self.f.write(f"{self.term(subject)} " + " ;\n    ".join(lines) + " .\n\n")
+        self.buffer.clear()
+        super().flush()
+
+
+WRITERS = {"nt": NTriplesWriter, "turtle": TurtleWriter}
+
+
+def open_writer(destination, fmt="nt", dedup_prefixes=()):
+    if fmt not in WRITERS:
+        raise ValueError(f"Format de sortie inconnu : {fmt} (attendu : nt, turtle)")
+    return WRITERS[fmt](destination, dedup_prefixes)
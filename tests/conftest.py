@@ -0,0 +1,20 @@
+import os
+import socket
+import sys
+
+import pytest
+
+# les modules du dépôt sont des scripts à la racine, dans Step4/ et Step5/
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for path in (ROOT, os.path.join(ROOT, "Step4"), os.path.join(ROOT, "Step5")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def offline_url():
+    """URL d'un port local fermé : toute requête lève ConnectionError."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
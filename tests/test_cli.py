@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+# imports lourds qu'une sous-commande ne doit pas payer pour --help
+HEAVY = ("pandas", "rdflib", "numpy")
+SCRIPT = """
+import sys
+import nobel
+try:
+    nobel.main(sys.argv[1:])
+except SystemExit:
+    pass
+print(" ".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+@pytest.mark.parametrize("command", ["convert", "void"])
+def test_help_does_not_import_heavy_modules(command):
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(heavy=HEAVY), command, "--help"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert "usage: nobel.py " + command in result.stdout
+    assert result.stdout.splitlines()[-1] == ""
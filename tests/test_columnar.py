@@ -0,0 +1,85 @@
+import os
+
+import pandas as pd
+import pytest
+from rdflib import RDF, RDFS, Graph, Literal
+from rdflib.namespace import FOAF, XSD
+
+from columnar import (
+    FORMATS,
+    TEXT_COLUMNS,
+    build_tables,
+    laureates_by_country,
+    read_tables,
+    write_tables,
+)
+from converter import SCHEMA, csv_to_rdf, prepare_frame
+
+CSV = os.path.join(os.path.dirname(__file__), "..", "nobel-prize-laureates.csv")
+
+
+@pytest.fixture(scope="module")
+def laureates():
+    return pd.read_csv(CSV, delimiter=";", encoding="utf-8").head(400)
+
+
+def values(df):
+    return df.astype("object").where(df.notna(), None).values.tolist()
+
+
+def graph_counts(g, gender=None):
+    """Lauréats distincts par libellé du lieu de naissance, lus dans le graphe."""
+    persons = {}
+    literal = Literal(gender, datatype=XSD.string)
+    for person in g.subjects(RDF.type, FOAF.Person):
+        if gender is not None and (person, SCHEMA.gender, literal) not in g:
+            continue
+        for place in g.objects(person, SCHEMA.birthPlace):
+            for label in g.objects(place, RDFS.label):
+                persons.setdefault(str(label), set()).add(person)
+    return {label: len(found) for label, found in persons.items()}
+
+
+def test_tables_count_like_the_graph(laureates, tmp_path):
+    csv_file = str(tmp_path / "laureates.csv")
+    laureates.to_csv(csv_file, sep=";", index=False, encoding="utf-8")
+    output = str(tmp_path / "out.ttl")
+    csv_to_rdf(csv_file, output, snapshot=False, search_index=False)
+    g = Graph().parse(output)
+
+    tables = build_tables(prepare_frame(laureates))
+    for gender in (None, "female"):
+        counts = laureates_by_country(tables, gender)
+        assert len(counts) > 1
+        assert counts.to_dict() == graph_counts(g, gender)
+    assert len(tables["persons"]["person"].unique()) == len(
+        set(g.subjects(RDF.type, FOAF.Person))
+    )
+    assert len(tables["awards"]) == len(set(g.subjects(RDF.type, SCHEMA.Award)))
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_tables_round_trip_dictionary_encoded(laureates, tmp_path, fmt):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    tables = build_tables(prepare_frame(laureates))
+    directory = write_tables(tables, str(tmp_path / "out.tables"), fmt)
+
+    read = read_tables(directory)
+    assert set(read) == set(tables)
+    for name, df in tables.items():
+        assert list(read[name].columns) == list(df.columns)
+        assert values(read[name]) == values(df)
+
+        # colonnes dictionnaire dans le fichier, pas seulement dans pandas
+        path = os.path.join(directory, name + FORMATS[fmt])
+        if fmt == "parquet":
+            schema = pq.read_schema(path)
+        else:
+            schema = pa.ipc.open_file(path).schema
+        for field in schema:
+            if field.name in TEXT_COLUMNS or field.name == "year":
+                assert not pa.types.is_dictionary(field.type), field.name
+            else:
+                assert pa.types.is_dictionary(field.type), field.name
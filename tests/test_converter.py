@@ -0,0 +1,251 @@
+import functools
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+from rdflib import Graph, URIRef
+
+import converter
+from converter import (
+    DBR,
+    NOBEL,
+    ORG_NS,
+    PLACE_NS,
+    cache_stats,
+    clear_caches,
+    csv_to_rdf,
+    csv_to_rdf_incremental,
+    csv_to_rdf_parallel,
+    csv_to_rdf_stream,
+    index_record,
+    iter_records,
+    normalize_city_to_uri,
+    normalize_country_to_uri,
+    prepare_frame,
+)
+from text_index import SearchIndex
+
+CSV = os.path.join(os.path.dirname(__file__), "..", "nobel-prize-laureates.csv")
+
+GAZETTEER = (
+    "Göttingen\thttp://dbpedia.org/resource/Göttingen\n"
+    "Tübingen\thttp://dbpedia.org/resource/T%C3%BCbingen\n"
+    "Ruritania\thttp://dbpedia.org/resource/Kingdom of Ruritania\n"
+)
+
+
+# lignes limites ajoutées aux 300 premières du CSV : ligne vide, champs NaN,
+# lieu partagé, organisation lauréate, ligne en double
+EDGE_ROWS = [
+    {},
+    {"Firstname": "Nan", "Surname": "Cities", "Gender": "female", "Year": 1999,
+     "Born country": "Germany (now Poland)", "Died city": "Paris"},
+    {"Firstname": "Same", "Surname": "Place", "Gender": "male", "Year": 2001,
+     "Category": "Physics", "Born city": "Berlin", "Born country": "Germany",
+     "Organization name": "Nowhere Institute", "Organization country": "U.S.A."},
+    {"Firstname": "Other", "Surname": "Place", "Gender": "male", "Year": 2001,
+     "Category": "Physics", "Born city": "Berlin", "Born country": "Germany",
+     "Organization name": "Nowhere Institute", "Organization country": "U.S.A."},
+    {"Firstname": "Some Union", "Gender": "org", "Year": 2002, "Category": "Peace"},
+    {"Surname": "Onlysurname", "Year": "  ", "Motivation": '"quoted"'},
+]
+
+
+@pytest.fixture
+def laureates():
+    df = pd.read_csv(CSV, delimiter=";", encoding="utf-8").head(300)
+    edge = pd.DataFrame(EDGE_ROWS, columns=df.columns)
+    return pd.concat([df, edge, edge.iloc[[2]]], ignore_index=True)
+
+
+def write_csv(df, path):
+    df.to_csv(path, sep=";", index=False, encoding="utf-8")
+    return str(path)
+
+
+def full_graph(csv_file, tmp_path):
+    output = str(tmp_path / "full.ttl")
+    csv_to_rdf(csv_file, output, snapshot=False, search_index=False)
+    return set(Graph().parse(output))
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    path = tmp_path / "labels.tsv"
+    path.write_text(GAZETTEER, encoding="utf-8")
+    converter.use_gazetteer(str(path))
+    yield
+    converter.use_gazetteer(None)
+
+
+def test_reconciled_iris_are_quoted_like_the_maps(gazetteer):
+    assert normalize_city_to_uri("Göttingen", DBR) == URIRef(DBR + "G%C3%B6ttingen")
+    assert normalize_city_to_uri("Tübingen", DBR) == URIRef(DBR + "T%C3%BCbingen")
+    assert normalize_country_to_uri("Ruritania", DBR) == URIRef(
+        DBR + "Kingdom_of_Ruritania"
+    )
+
+    df = pd.DataFrame(
+        {
+            "Firstname": ["Ada"],
+            "Surname": ["Example"],
+            "Born city": ["Göttingen"],
+            "Born country": ["Ruritania"],
+        }
+    )
+    prepared = converter.prepare_frame(df)
+    assert prepared["birth_city"].iloc[0] == URIRef(DBR + "G%C3%B6ttingen")
+    assert prepared["birth_country"].iloc[0] == URIRef(DBR + "Kingdom_of_Ruritania")
+
+
+def test_parallel_output_does_not_depend_on_workers(laureates, tmp_path):
+    csv_file = write_csv(laureates, tmp_path / "laureates.csv")
+    outputs = []
+    for workers, chunksize in ((1, 300), (4, 37)):
+        output = str(tmp_path / f"out-{workers}.nt")
+        csv_to_rdf_parallel(csv_file, output, "nt", workers, chunksize, False)
+        with open(output, "rb") as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1]
+    parsed = set(Graph().parse(data=outputs[0].decode("utf-8"), format="nt"))
+    assert parsed == full_graph(csv_file, tmp_path)
+
+
+@pytest.mark.parametrize("workers", [0, -1])
+def test_parallel_rejects_workers_below_one(laureates, tmp_path, workers):
+    csv_file = write_csv(laureates, tmp_path / "laureates.csv")
+    with pytest.raises(ValueError, match="workers"):
+        csv_to_rdf_parallel(csv_file, str(tmp_path / "out.nt"), workers=workers)
+
+
+def test_parallel_workers_get_the_gazetteer_under_spawn(
+    gazetteer, laureates, tmp_path, monkeypatch
+):
+    # sous spawn, les workers n'héritent pas du gazetteer chargé par le parent
+    spawn = multiprocessing.get_context("spawn")
+    pool = functools.partial(ProcessPoolExecutor, mp_context=spawn)
+    monkeypatch.setattr(converter, "ProcessPoolExecutor", pool)
+    laureates.loc[0, "Born country"] = "Ruritania"
+    csv_file = write_csv(laureates, tmp_path / "laureates.csv")
+    output = str(tmp_path / "out.nt")
+    csv_to_rdf_parallel(csv_file, output, "nt", 2, 100, False)
+    parsed = set(Graph().parse(output, format="nt"))
+    assert parsed == full_graph(csv_file, tmp_path)
+    assert any(o == URIRef(DBR + "Kingdom_of_Ruritania") for _, _, o in parsed)
+
+
+def test_incremental_matches_full_rebuild(laureates, tmp_path):
+    csv_file = str(tmp_path / "laureates.csv")
+    output = str(tmp_path / "incremental.ttl")
+    write_csv(laureates.head(250), csv_file)
+    csv_to_rdf_incremental(csv_file, output, snapshot=False)
+
+    # 20 lignes retirées, les lignes après 250 ajoutées, une ville modifiée
+    df = pd.concat([laureates.iloc[20:250], laureates.iloc[250:]])
+    df.loc[df.index[0], "Born city"] = "Tübingen"
+    write_csv(df, csv_file)
+    changes = csv_to_rdf_incremental(csv_file, output, snapshot=False)
+    added = len(laureates) - 250
+    assert (len(changes["added"]), len(changes["removed"])) == (added, 20)
+    assert len(changes["changed"]) == 1
+
+    assert set(Graph().parse(output)) == full_graph(csv_file, tmp_path)
+
+
+def test_cache_stats_count_hits_and_misses():
+    clear_caches()
+    for country in ("USA", "France", "USA", "USA", " France"):
+        normalize_country_to_uri(country, DBR)
+    # clé du cache : la valeur brute (" France" n'est pas "France")
+    stats = cache_stats()["normalize_country_to_uri"]
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 3, 3)
+    assert stats["hit_rate"] == 0.4
+    clear_caches()
+    assert cache_stats()["normalize_country_to_uri"]["misses"] == 0
+
+
+def test_row_mode_matches_baseline_triples(tmp_path):
+    # edge_cases.nt : sortie du converter d'origine (avant LaureateRecord) sur
+    # edge_cases.csv — villes NaN, pays « X (now Y) », organisations sans
+    # ville, ligne en double, organisation lauréate, ligne vide
+    data = os.path.join(os.path.dirname(__file__), "data")
+    expected = set(Graph().parse(os.path.join(data, "edge_cases.nt"), format="nt"))
+    got = full_graph(os.path.join(data, "edge_cases.csv"), tmp_path)
+    assert got == expected
+
+
+def test_vectorized_matches_row_mode(laureates, tmp_path):
+    csv_file = write_csv(laureates, tmp_path / "laureates.csv")
+    output = str(tmp_path / "vectorized.ttl")
+    csv_to_rdf(csv_file, output, vectorized=True, snapshot=False, search_index=False)
+    assert set(Graph().parse(output)) == full_graph(csv_file, tmp_path)
+
+
+def test_row_and_frame_search_indexes_agree(laureates):
+    rows, frame = SearchIndex(), SearchIndex()
+    for r in iter_records(laureates):
+        index_record(rows, r)
+    frame.add_frame(prepare_frame(laureates))
+    assert rows.docs == frame.docs
+    queries = [
+        ((), {}),
+        (("radiat*",), {}),
+        (("physics",), {"decade": "1900"}),
+        ((), {"category": "Peace", "gender": "org"}),
+        ((), {"country": "Germany"}),
+        (("nowhere",), {}),
+    ]
+    for words, facets in queries:
+        assert rows.search(words, **facets) == frame.search(words, **facets)
+    docs = rows.search()
+    for facets in [("category",), ("country",), ("gender", "decade")]:
+        assert rows.counts(docs, *facets) == frame.counts(frame.search(), *facets)
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+@pytest.mark.parametrize("fmt", ["nt", "turtle"])
+def test_stream_matches_graph_conversion(laureates, tmp_path, fmt, vectorized):
+    csv_file = write_csv(laureates, tmp_path / "laureates.csv")
+    output = str(tmp_path / ("stream.nt" if fmt == "nt" else "stream.ttl"))
+    csv_to_rdf_stream(
+        csv_file,
+        output,
+        fmt,
+        chunksize=64,
+        vectorized=vectorized,
+        snapshot=False,
+        search_index=False,
+    )
+    parsed = Graph().parse(output, format="nt" if fmt == "nt" else "turtle")
+    assert set(parsed) == full_graph(csv_file, tmp_path)
+
+    if fmt == "nt":
+        with open(output, encoding="utf-8") as f:
+            repeated = [line for line, n in Counter(f).items() if n > 1]
+        # lieux et organisations dédupliqués, un lauréat en double se répète
+        shared = (f"<{PLACE_NS}", f"<{ORG_NS}")
+        assert not any(line.startswith(shared) for line in repeated)
+        assert any(line.startswith(f"<{NOBEL}person/") for line in repeated)
+
+
+def test_incremental_rebuilds_when_the_gazetteer_changes(laureates, tmp_path):
+    laureates.loc[0, "Born country"] = "Ruritania"
+    csv_file = write_csv(laureates, tmp_path / "laureates.csv")
+    output = str(tmp_path / "incremental.ttl")
+    csv_to_rdf_incremental(csv_file, output, snapshot=False)
+
+    path = tmp_path / "labels.tsv"
+    path.write_text(GAZETTEER, encoding="utf-8")
+    converter.use_gazetteer(str(path))
+    try:
+        changes = csv_to_rdf_incremental(csv_file, output, snapshot=False)
+        assert len(changes["added"]) == len(laureates)
+        expected = full_graph(csv_file, tmp_path)
+    finally:
+        converter.use_gazetteer(None)
+    graph = set(Graph().parse(output))
+    assert graph == expected
+    assert any(o == URIRef(DBR + "Kingdom_of_Ruritania") for _, _, o in graph)
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+import requests
+
+from async_enrichment import AsyncEnricher, answered, enrich_resources
+from lookup_cache import MISS, LookupCache
+from mock_dbpedia import serve_in_thread, wikidata_for
+from sameas_batch import resolve_wikidata_batch
+
+DBR = "http://dbpedia.org/resource/"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LookupCache(str(tmp_path / "cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def mock():
+    server, url = serve_in_thread(known=["Marie_Curie"])
+    yield url
+    server.shutdown()
+
+
+def enrich(names, base, cache, progress=None):
+    return enrich_resources(
+        names,
+        progress=progress,
+        dbpedia_base=base,
+        sparql_endpoint=base + "/sparql",
+        rate=0,
+        timeout=2,
+        cache=cache,
+    )
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_unanswered_status_raises(status):
+    response = requests.Response()
+    response.status_code = status
+    with pytest.raises(requests.HTTPError):
+        answered(response)
+
+
+def test_answers_are_cached(mock, cache):
+    seen = {}
+    result = enrich(["Marie_Curie", "Nobody"], mock, cache, seen.__setitem__)
+    expected = {
+        "Marie_Curie": (DBR + "Marie_Curie", wikidata_for("Marie_Curie")),
+        "Nobody": (None, None),
+    }
+    assert result == seen == expected
+    assert cache.get("dbpedia_exists", DBR + "Nobody") is None
+    assert cache.get("wikidata", DBR + "Marie_Curie") == wikidata_for("Marie_Curie")
+
+
+def test_transport_errors_are_not_cached(cache, offline_url):
+    seen = {}
+    result = enrich(["Marie_Curie"], offline_url, cache, seen.__setitem__)
+    assert result == seen == {}
+    assert cache.get("dbpedia_exists", DBR + "Marie_Curie") is MISS
+    assert cache.get("wikidata", DBR + "Marie_Curie") is MISS
+
+
+def test_batches_report_failed_names():
+    names = ["A", "B", "C"]
+    server, url = serve_in_thread(known=["A", "C"])
+    try:
+        found, failed = resolve_wikidata_batch(names, url + "/sparql", batch_size=2)
+    finally:
+        server.shutdown()
+    assert found == {"A": wikidata_for("A"), "C": wikidata_for("C")}
+    assert failed == []
+
+    # requête refusée même pour un seul nom
+    server, url = serve_in_thread(max_query_length=10)
+    try:
+        found, failed = resolve_wikidata_batch(names, url + "/sparql", batch_size=2)
+    finally:
+        server.shutdown()
+    assert found == {}
+    assert sorted(failed) == names
+
+
+def test_failed_batch_is_not_cached(cache, offline_url):
+    server, url = serve_in_thread()
+    enricher = AsyncEnricher(
+        dbpedia_base=url, sparql_endpoint=offline_url, rate=0, timeout=2, cache=cache
+    )
+    try:
+        assert asyncio.run(enricher.wikidata_batch(["A"])) == {}
+    finally:
+        enricher.close()
+        server.shutdown()
+    assert cache.get("wikidata", DBR + "A") is MISS
@@ -0,0 +1,48 @@
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import FOAF, OWL, RDF
+
+from StepEnrichissement import DBO, EntityIndex, SCHEMA
+
+NOBEL = "http://example.org/nobel/"
+ORG = URIRef(NOBEL + "organization/University_of_California")
+PERSON = URIRef(NOBEL + "person/Ada_Example")
+BERKELEY = URIRef(NOBEL + "place/Berkeley_CA_USA")
+IRVINE = URIRef(NOBEL + "place/Irvine_CA_USA")
+
+
+def graph(locations):
+    g = Graph()
+    g.add((PERSON, RDF.type, FOAF.Person))
+    g.add((PERSON, OWL.sameAs, URIRef("http://dbpedia.org/resource/Ada_Example")))
+    g.add((PERSON, OWL.sameAs, URIRef("urn:isni:0000000121032683")))
+    g.add((ORG, RDF.type, SCHEMA.Organization))
+    g.add((ORG, FOAF.name, Literal("University of California")))
+    for place in locations:
+        g.add((ORG, SCHEMA.location, place))
+    g.add((BERKELEY, RDF.type, SCHEMA.Place))
+    g.add((BERKELEY, DBO.city, URIRef("http://dbpedia.org/resource/Berkeley")))
+    return g
+
+
+def test_entities_values_and_links():
+    index = EntityIndex(graph([BERKELEY]))
+    assert index.entities(FOAF.Person) == [PERSON]
+    assert index.entities(SCHEMA.Organization) == [ORG]
+    assert index.entities(SCHEMA.Award) == []
+
+    assert index.value(ORG, FOAF.name) == Literal("University of California")
+    assert index.value(ORG, SCHEMA.location) == BERKELEY
+    assert index.value(ORG, SCHEMA.name) is None
+    assert index.value(BERKELEY, DBO.country) is None
+
+    assert index.linked(PERSON)
+    assert index.linked(PERSON, "urn")
+    assert not index.linked(ORG)
+
+
+def test_several_values_do_not_depend_on_graph_order():
+    # une organisation dans plusieurs villes a plusieurs schema:location
+    for locations in ([BERKELEY, IRVINE], [IRVINE, BERKELEY]):
+        index = EntityIndex(graph(locations))
+        assert index.value(ORG, SCHEMA.location) == BERKELEY
+        assert index.values[ORG, SCHEMA.location] == {BERKELEY, IRVINE}
@@ -0,0 +1,67 @@
+import os
+from collections import Counter
+
+import pytest
+
+from federation import Federation, ServiceError
+from sparql_engine import query
+from sparql_server import serve
+from triplestore import TripleStore
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+REMOTE = "http://example.org/remote/sparql"
+PREFIXES = """PREFIX foaf: <http://xmlns.com/foaf/0.1/>
+PREFIX schema1: <http://schema.org/>
+PREFIX dbo: <http://dbpedia.org/ontology/>
+"""
+QUERIES = {
+    "join": """SELECT ?award ?country WHERE {
+        ?award schema1:recipient ?person .
+        SERVICE <%s> { ?person schema1:birthPlace ?place .
+                       ?place dbo:country ?country } }""",
+    "filter": """SELECT ?person ?other WHERE {
+        ?person foaf:givenName ?given .
+        SERVICE <%s> { ?other foaf:familyName ?family }
+        FILTER(LCASE(STR(?given)) = LCASE(STR(?family))) }""",
+}
+
+
+@pytest.fixture(scope="module")
+def store():
+    return TripleStore.load(os.path.join(ROOT, "out.ttl"))
+
+
+@pytest.fixture(scope="module")
+def endpoint(store):
+    server, url = serve(store, background=True, quiet=True)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+def solutions(rows):
+    return Counter(tuple(sorted(row.items())) for row in rows)
+
+
+@pytest.mark.parametrize("name", QUERIES)
+def test_service_matches_local_evaluation(store, endpoint, tmp_path, name):
+    federated = PREFIXES + QUERIES[name] % REMOTE
+    # référence : le même SERVICE évalué sur le store, sans HTTP ni cache
+    expected = solutions(query(store, federated, services={REMOTE: store})[1])
+    assert expected
+
+    federation = Federation({REMOTE: endpoint}, cache_dir=str(tmp_path))
+    assert solutions(query(store, federated, federation=federation)[1]) == expected
+    assert federation.requests > 0
+
+    # relance hors ligne : tout vient du cache
+    offline = Federation({REMOTE: endpoint}, cache_dir=str(tmp_path), offline=True)
+    assert solutions(query(store, federated, federation=offline)[1]) == expected
+    assert offline.requests == 0 and offline.cache.misses == 0
+
+
+def test_offline_without_cache_fails(store, tmp_path):
+    federated = PREFIXES + QUERIES["join"] % REMOTE
+    offline = Federation(cache_dir=str(tmp_path), offline=True)
+    with pytest.raises(ServiceError):
+        query(store, federated, federation=offline)
@@ -0,0 +1,67 @@
+import pytest
+from rdflib import OWL, RDF, Graph, URIRef
+
+from generate_void import HyperLogLog, compute_statistics
+
+EX = "http://example.org/nobel/"
+TRIPLES = [
+    f"<{EX}person/a> <{RDF.type}> <http://xmlns.com/foaf/0.1/Person> .",
+    f"<{EX}person/a> <http://xmlns.com/foaf/0.1/name> \"A\" .",
+    f"<{EX}person/a> <{OWL.sameAs}> <http://dbpedia.org/resource/A> .",
+    f"<{EX}person/a> <{OWL.sameAs}> <http://www.wikidata.org/entity/Q1> .",
+    f"<{EX}person/b> <{RDF.type}> <http://xmlns.com/foaf/0.1/Person> .",
+    f"<{EX}person/b> <{OWL.sameAs}> <urn:isbn:0451450523> .",
+    f"<{EX}award/x> <{RDF.type}> <http://schema.org/Award> .",
+    f"<{EX}award/x> <http://schema.org/recipient> <{EX}person/a> .",
+]
+
+
+@pytest.fixture
+def dump(tmp_path):
+    # mode flux : les triplets d'un lauréat primé deux fois se répètent
+    path = tmp_path / "dump.nt"
+    path.write_text("\n".join(TRIPLES + TRIPLES[:4]) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def rdflib_statistics(path):
+    g = Graph().parse(path, format="nt")
+    linksets = {}
+    for o in g.objects(None, OWL.sameAs):
+        domain = o.split("/")[2] if "//" in o else o.split(":")[0]
+        linksets[domain] = linksets.get(domain, 0) + 1
+    return {
+        "triples": len(g),
+        "entities": len(set(g.subjects())),
+        "classes": {
+            str(c): len(set(g.subjects(RDF.type, c))) for c in g.objects(None, RDF.type)
+        },
+        "properties": {
+            str(p): len(list(g.triples((None, p, None)))) for p in g.predicates()
+        },
+        "linksets": linksets,
+    }
+
+
+def test_exact_statistics_match_rdflib(dump):
+    stats = compute_statistics(dump)
+    assert stats == rdflib_statistics(dump)
+    assert stats["linksets"]["urn"] == 1
+
+
+def test_approximate_statistics_on_a_small_graph(dump):
+    exact = rdflib_statistics(dump)
+    stats = compute_statistics(dump, approximate=True)
+    # pas de dédoublonnage en mode approximatif : le fichier a 4 doublons
+    assert stats["triples"] == exact["triples"] + 4
+    assert stats["entities"] == exact["entities"]
+    assert stats["classes"] == exact["classes"]
+
+
+@pytest.mark.parametrize("n", [1000, 50000])
+def test_hyperloglog_error_bound(n):
+    hll = HyperLogLog()
+    for i in range(n):
+        hll.add(f"<{EX}person/{i}>")
+    # erreur relative ~ 1.04 / sqrt(2**14) : marge de 3 écarts-types
+    assert abs(len(hll) - n) <= 3 * 1.04 / 2**7 * n
@@ -0,0 +1,93 @@
+import pytest
+from rdflib import Graph, Literal, URIRef
+
+from journal import Journal, journal_path, merge_journal
+from snapshot import load_graph
+
+EX = "http://example.org/nobel/"
+SAME_AS = URIRef("http://www.w3.org/2002/07/owl#sameAs")
+BASE = f"""@prefix ex: <{EX}> .
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+
+ex:a ex:name "A" ;
+    owl:sameAs <http://dbpedia.org/resource/Eugene_O\\'Neill> .
+
+ex:b ex:name "B" .
+
+ex:c ex:name "C" .
+"""
+
+
+def ex(name):
+    return URIRef(EX + name)
+
+
+def expected_graph(base, removed, added):
+    g = Graph().parse(base)
+    for triple in removed:
+        g.remove(triple)
+    for triple in added:
+        g.add(triple)
+    return g
+
+
+@pytest.fixture
+def base(tmp_path):
+    path = tmp_path / "base.ttl"
+    path.write_text(BASE, encoding="utf-8")
+    return str(path)
+
+
+def test_resume_and_merge(tmp_path, base):
+    output = str(tmp_path / "out.ttl")
+    old = (ex("a"), SAME_AS, URIRef("http://dbpedia.org/resource/Eugene_O\\'Neill"))
+    new = (ex("a"), SAME_AS, URIRef("http://dbpedia.org/resource/Eugene_O'Neill"))
+    b_link = (ex("b"), SAME_AS, URIRef("http://www.wikidata.org/entity/Q1"))
+
+    journal = Journal(journal_path(output), base)
+    journal.record("persons", ex("a"), added=[new], removed=[old], value="x")
+    journal.record("persons", ex("b"), added=[b_link], value="")
+    journal.close()
+    # arrêt brutal pendant l'écriture de c : lignes sans "=" puis ligne tronquée
+    with open(journal_path(output), "a", encoding="utf-8") as f:
+        f.write(f"+\t<{EX}c> <{SAME_AS}> <{EX}d> .\n+\t<{EX}c> <{SAME_AS}")
+
+    journal = Journal(journal_path(output), base)
+    assert journal.value("persons", ex("a")) == "x"
+    assert journal.value("persons", ex("b")) == ""
+    assert journal.value("persons", ex("c")) is None
+    assert journal.count("persons") == 2
+    c_name = (ex("c"), ex("name"), Literal("C, corrigé"))
+    journal.record("persons", ex("c"), added=[c_name], value="C")
+    journal.close()
+
+    assert merge_journal(journal, output) == 6
+    expected = expected_graph(base, [old], [new, b_link, c_name])
+    assert set(Graph().parse(output)) == set(expected)
+    assert set(load_graph(output)) == set(expected)
+
+
+def test_restart_ignores_previous_journal(tmp_path, base):
+    output = str(tmp_path / "out.ttl")
+    journal = Journal(journal_path(output), base)
+    journal.record("others", ex("a"), value="x")
+    journal.close()
+    journal = Journal(journal_path(output), base, restart=True)
+    journal.close()
+    assert journal.count("others") == 0
+
+
+def test_merge_falls_back_to_rdflib(tmp_path):
+    # les collections ( ) ne sont pas lues par ttl_stream
+    path = tmp_path / "base.ttl"
+    path.write_text(BASE + f"<{EX}d> <{EX}list> ( 1 2 ) .\n", encoding="utf-8")
+    output = str(tmp_path / "out.ttl")
+    link = (ex("d"), SAME_AS, URIRef("http://www.wikidata.org/entity/Q2"))
+    journal = Journal(journal_path(output), str(path))
+    journal.record("others", ex("d"), added=[link])
+    journal.close()
+
+    merge_journal(journal, output)
+    merged = Graph().parse(output)
+    assert len(merged) == len(expected_graph(str(path), [], [link]))
+    assert link in merged
@@ -0,0 +1,58 @@
+import pytest
+import requests
+
+import StepEnrichissement
+from lookup_cache import MISS, LookupCache
+from mock_dbpedia import serve_in_thread, wikidata_for
+
+DBR = "http://dbpedia.org/resource/"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = LookupCache(str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(StepEnrichissement, "shared_cache", lambda: cache)
+    yield cache
+    cache.close()
+
+
+def test_lookup_stores_answers_only(cache):
+    assert cache.lookup("k", "absent", lambda: None) is None
+    assert cache.get("k", "absent") is None
+
+    def fail():
+        raise requests.ConnectionError("hors ligne")
+
+    with pytest.raises(requests.ConnectionError):
+        cache.lookup("k", "offline", fail)
+    assert cache.get("k", "offline") is MISS
+
+
+def test_step_helpers_do_not_cache_transport_errors(cache, monkeypatch, offline_url):
+    url = offline_url
+    monkeypatch.setattr(StepEnrichissement, "DBPEDIA_BASE", url)
+    monkeypatch.setattr(StepEnrichissement, "SPARQL_ENDPOINT", url + "/sparql")
+    with pytest.raises(requests.RequestException):
+        StepEnrichissement.dbpedia_exists("Paris")
+    with pytest.raises(requests.RequestException):
+        StepEnrichissement.wikidata("Paris")
+    assert StepEnrichissement.wikidata_batch(["Paris"]) == {}
+    assert cache.get("dbpedia_exists_noredirect", DBR + "Paris") is MISS
+    assert cache.get("wikidata", DBR + "Paris") is MISS
+
+
+def test_step_helpers_cache_answers(cache, monkeypatch):
+    server, url = serve_in_thread(known=["Paris"])
+    monkeypatch.setattr(StepEnrichissement, "DBPEDIA_BASE", url)
+    monkeypatch.setattr(StepEnrichissement, "SPARQL_ENDPOINT", url + "/sparql")
+    try:
+        assert StepEnrichissement.dbpedia_exists("Paris") == DBR + "Paris"
+        assert StepEnrichissement.dbpedia_exists("Nowhere") is None
+        assert StepEnrichissement.wikidata_batch(["Paris", "Nowhere"]) == {
+            "Paris": wikidata_for("Paris"),
+            "Nowhere": None,
+        }
+    finally:
+        server.shutdown()
+    assert cache.get("dbpedia_exists_noredirect", DBR + "Nowhere") is None
+    assert cache.get("wikidata", DBR + "Paris") == wikidata_for("Paris")
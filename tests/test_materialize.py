@@ -0,0 +1,33 @@
+import os
+
+from materialize import materialize
+from ttl_stream import iter_triples
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def write_nt(path, triples):
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(f"{s} {p} {o} .\n" for s, p, o in triples)
+    return str(path)
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_incremental_matches_full(tmp_path):
+    triples = list(iter_triples(os.path.join(ROOT, "out.ttl")))
+    # premier passage sans les prix de 2000 et après : ils arrivent en delta
+    recent = {s for s, p, o in triples if p.endswith("awardDate>") and o >= '"2000"'}
+    data = str(tmp_path / "data.nt")
+    write_nt(data, [t for t in triples if t[0] not in recent])
+    incremental = str(tmp_path / "incremental.trig")
+    materialize(data, incremental)
+
+    write_nt(data, triples)
+    materialize(data, incremental)
+    full = materialize(data, str(tmp_path / "full.trig"), full=True)
+    assert read(incremental) == read(full)
+    assert "<urn:materialized>" in read(full)
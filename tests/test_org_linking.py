@@ -0,0 +1,65 @@
+import pytest
+
+from lookup_cache import MISS, LookupCache
+from mock_dbpedia import serve_in_thread
+from org_linking import (
+    CACHE_KIND,
+    Organization,
+    SparqlResolver,
+    link_organizations,
+    resolve_candidates,
+)
+
+DBR = "http://dbpedia.org/resource/"
+ORGS = [
+    Organization("urn:org:1", "Harvard University", "Cambridge", "USA"),
+    Organization("urn:org:2", "Pasteur Institute", "Paris", "France"),
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LookupCache(str(tmp_path / "cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+def test_answered_candidates_are_cached(cache):
+    server, url = serve_in_thread(known=["Harvard_University"])
+    try:
+        resolver = SparqlResolver(url + "/sparql", batch_size=2)
+        links, unresolved, stats = link_organizations(ORGS, resolver, cache)
+    finally:
+        server.shutdown()
+    assert [(link.subject, link.iri) for link in links] == [
+        ("urn:org:1", DBR + "Harvard_University")
+    ]
+    assert unresolved == []
+    assert cache.get(CACHE_KIND, "Harvard_University")["iri"] == (
+        DBR + "Harvard_University"
+    )
+    assert cache.get(CACHE_KIND, "Pasteur_Institute") is None
+
+
+def test_unanswered_candidates_are_not_cached(cache, offline_url):
+    resolver = SparqlResolver(offline_url + "/sparql", timeout=2)
+    found, failed = resolve_candidates(["Harvard_University"], resolver, cache)
+    assert found == {}
+    assert failed == {"Harvard_University"}
+    assert cache.get(CACHE_KIND, "Harvard_University") is MISS
+
+    links, unresolved, stats = link_organizations(ORGS, resolver, cache)
+    assert links == []
+    assert unresolved == ["urn:org:1", "urn:org:2"]
+    assert stats["unresolved"] == 2
+
+
+def test_rejected_single_names_are_not_cached(cache):
+    server, url = serve_in_thread(max_query_length=10)
+    try:
+        resolver = SparqlResolver(url + "/sparql", batch_size=2)
+        _, failed = resolve_candidates(["A", "B", "C"], resolver, cache)
+    finally:
+        server.shutdown()
+    assert failed == {"A", "B", "C"}
+    assert all(cache.get(CACHE_KIND, n) is MISS for n in "ABC")
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from snapshot import load_snapshot, load_store, read_header, write_file_snapshot
+from triplestore import TripleStore
+
+XSD_STRING = "<http://www.w3.org/2001/XMLSchema#string>"
+TTL = """@prefix ex: <http://example.org/> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+
+ex:a ex:name "A"^^xsd:string, "A" ;
+    ex:label "a"^^xsd:string .
+
+ex:b ex:name "B" ;
+    ex:knows ex:a .
+"""
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "g.ttl"
+    path.write_text(TTL, encoding="utf-8")
+    write_file_snapshot(str(path))
+    return str(path)
+
+
+def test_normalized_terms_are_written_once(source):
+    header = read_header(source[:-4] + ".snapshot")
+    assert header["triples"] == 5
+    assert header["normalized"]["triples"] == 4
+
+
+@pytest.mark.parametrize("normalize", [True, False])
+def test_load_keeps_mmap_views(source, normalize):
+    store = load_snapshot(source[:-4] + ".snapshot", normalize=normalize)
+    assert all(isinstance(column, np.memmap) for column in store.spo)
+    assert store.normalize is normalize
+    expected = TripleStore.load(source, normalize=normalize)
+    assert sorted(store.triples()) == sorted(expected.triples())
+
+
+def test_load_store_matches_parse(source):
+    store = load_store(source)
+    assert isinstance(store.spo[0], np.memmap)
+    assert not any(t.endswith(XSD_STRING) for t in store.terms)
+    assert sorted(store.triples()) == sorted(TripleStore.load(source).triples())
@@ -0,0 +1,73 @@
+import os
+from collections import Counter
+
+import pytest
+from rdflib import Graph
+
+from sparql_engine import csv_value, query
+from triplestore import TripleStore
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+DATA = os.path.join(ROOT, "out.ttl")
+PREFIXES = """PREFIX foaf: <http://xmlns.com/foaf/0.1/>
+PREFIX schema1: <http://schema.org/>
+PREFIX dbo: <http://dbpedia.org/ontology/>
+"""
+QUERIES = {
+    "optional": """SELECT ?person ?name ?org WHERE {
+        ?person a foaf:Person ; foaf:familyName ?name .
+        OPTIONAL { ?person schema1:affiliation ?o . ?o foaf:name ?org }
+    }""",
+    "filter": """SELECT ?award ?year WHERE {
+        ?award a schema1:Award ; schema1:awardDate ?year .
+        FILTER(STR(?year) >= "2000" && CONTAINS(STR(?award), "Physics"))
+    }""",
+    "group": """SELECT ?gender (COUNT(DISTINCT ?person) AS ?n) WHERE {
+        ?award schema1:recipient ?person . ?person schema1:gender ?gender .
+    } GROUP BY ?gender HAVING (COUNT(?person) > 10)""",
+    "union": """SELECT DISTINCT ?country WHERE {
+        { ?person schema1:birthPlace ?place } UNION
+        { ?person schema1:deathPlace ?place }
+        ?place dbo:country ?country .
+    } ORDER BY ?country""",
+}
+
+
+@pytest.fixture(scope="module")
+def graphs():
+    return TripleStore.load(DATA), Graph().parse(DATA)
+
+
+def assert_same_results(graphs, text):
+    store, g = graphs
+    variables, rows = query(store, text)
+    expected = g.query(text)
+    assert variables == [str(v) for v in expected.vars]
+    # ORDER BY ne départage pas les ex aequo : on compare les multi-ensembles
+    got = Counter(tuple(csv_value(row.get(v)) for v in variables) for row in rows)
+    want = Counter(tuple("" if t is None else str(t) for t in r) for r in expected)
+    assert got == want
+    assert rows
+
+
+def test_requete3_matches_rdflib(graphs):
+    with open(os.path.join(ROOT, "Queries", "requete3.sparql"), encoding="utf-8") as f:
+        assert_same_results(graphs, f.read())
+
+
+@pytest.mark.parametrize("name", QUERIES)
+def test_results_match_rdflib(graphs, name):
+    assert_same_results(graphs, PREFIXES + QUERIES[name])
+
+
+def test_gyear_cast_to_integer_like_fuseki(graphs):
+    # requete1 / requete2 font xsd:integer(?year) sur des xsd:gYear : Fuseki
+    # lit la valeur lexicale, rdflib rend une erreur (variable non liée)
+    store, _ = graphs
+    variables, rows = query(
+        store,
+        PREFIXES + """PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+        SELECT (xsd:integer(?year) AS ?y) WHERE {
+            ?award schema1:awardDate ?year } LIMIT 1""",
+    )
+    assert csv_value(rows[0]["y"]).isdigit()
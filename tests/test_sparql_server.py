@@ -0,0 +1,76 @@
+import csv
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from sparql_engine import csv_value, query
+from sparql_server import serve
+from triplestore import TripleStore
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+@pytest.fixture(scope="module")
+def store():
+    return TripleStore.load(os.path.join(ROOT, "out.ttl"))
+
+
+@pytest.fixture(scope="module")
+def endpoint(store):
+    server, url = serve(store, background=True, workers=4, quiet=True)
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="module")
+def requete3():
+    with open(os.path.join(ROOT, "Queries", "requete3.sparql"), encoding="utf-8") as f:
+        return f.read()
+
+
+def csv_rows(variables, rows):
+    return [[csv_value(row.get(v)) for v in variables] for row in rows]
+
+
+def test_json_and_csv_match_the_engine(store, endpoint, requete3):
+    _, url = endpoint
+    variables, rows = query(store, requete3)
+
+    r = requests.post(url, data={"query": requete3}, timeout=30)
+    r.raise_for_status()
+    data = r.json()
+    assert data["head"]["vars"] == variables
+    bindings = data["results"]["bindings"]
+    got = [[b.get(v, {}).get("value", "") for v in variables] for b in bindings]
+    assert got == csv_rows(variables, rows)
+
+    r = requests.get(url, params={"query": requete3, "format": "csv"}, timeout=30)
+    r.raise_for_status()
+    assert r.headers["Content-Type"].startswith("text/csv")
+    got = list(csv.reader(io.StringIO(r.text)))
+    assert got == [variables] + csv_rows(variables, rows)
+
+
+def test_concurrent_queries_share_the_cache(endpoint, requete3):
+    server, url = endpoint
+
+    def fetch(_):
+        r = requests.post(url, data={"query": requete3, "format": "csv"}, timeout=30)
+        r.raise_for_status()
+        return r.text
+
+    hits = server.cache.hits
+    with ThreadPoolExecutor(8) as pool:
+        bodies = set(pool.map(fetch, range(16)))
+    assert len(bodies) == 1
+    assert server.cache.hits > hits
+
+
+def test_bad_query_is_a_400(endpoint):
+    _, url = endpoint
+    r = requests.get(url, params={"query": "SELECT WHERE"}, timeout=30)
+    assert r.status_code == 400
@@ -0,0 +1,33 @@
+import pytest
+from rdflib import RDF, Graph, Literal, Namespace, URIRef
+from rdflib.namespace import XSD
+
+from stream_writer import open_writer
+
+EX = Namespace("http://example.org/")
+PLACE = Namespace("http://example.org/place/")
+TRIPLES = [
+    (EX.a, RDF.type, EX.Person),
+    (EX.a, EX.name, Literal('guillemets " et \\ barre', datatype=XSD.string)),
+    (EX.a, EX.note, Literal("deux\nlignes\tet tab", lang="fr")),
+    (EX.a, EX.born, PLACE["Paris_France"]),
+    (EX.a, EX.born, PLACE["Paris_France"]),
+    (PLACE["Paris_France"], RDF.type, EX.Place),
+    (PLACE["Paris_France"], RDF.type, EX.Place),
+    (URIRef("http://example.org/x/a.b."), EX.year, Literal("1901", datatype=XSD.gYear)),
+]
+
+
+@pytest.mark.parametrize("fmt", ["nt", "turtle"])
+def test_writer_output_parses_to_the_same_graph(tmp_path, fmt):
+    path = str(tmp_path / f"out.{fmt}")
+    with open_writer(path, fmt, dedup_prefixes=(PLACE,)) as w:
+        w.bind("ex", EX)
+        w.bind("place", PLACE)
+        for i, triple in enumerate(TRIPLES):
+            w.add(triple)
+            if i == 3:
+                w.flush()  # un sujet sur deux blocs reste du Turtle valide
+    assert set(Graph().parse(path, format=fmt)) == set(TRIPLES)
+    # seul le sujet du lieu est dédupliqué ; le triplet répété de ex:a est écrit
+    assert (w.written, w.duplicates) == (len(TRIPLES) - 1, 1)
@@ -0,0 +1,38 @@
+import io
+import os
+
+import pytest
+from rdflib import Graph
+
+import ttl_stream
+from stream_writer import nt_term
+from ttl_stream import TurtleSyntaxError, iter_triples, iter_triples_from
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+TTL_FILES = ("out.ttl", "Step4/out_enriched.ttl", "Step4/out_enriched_complete.ttl")
+
+
+def rdflib_triples(**source):
+    return {tuple(nt_term(t) for t in triple) for triple in Graph().parse(**source)}
+
+
+@pytest.mark.parametrize("name", TTL_FILES)
+def test_same_triples_as_rdflib(name):
+    path = os.path.join(ROOT, name)
+    assert set(iter_triples(path)) == rdflib_triples(source=path)
+
+
+def test_backslash_in_iri_kept_like_rdflib():
+    data = (
+        "<http://dbpedia.org/resource/Eugene_O\\'Neill> <http://a/p> "
+        "<http://a/\\u00e9> ."
+    )
+    assert set(iter_triples_from(io.StringIO(data))) == rdflib_triples(data=data)
+
+
+def test_error_reports_absolute_line(monkeypatch):
+    monkeypatch.setattr(ttl_stream, "READ_SIZE", 64)
+    lines = [f"<http://a/s{i}> <http://a/p> <http://a/o{i}> ." for i in range(50)]
+    lines.append("<http://a/s> <http://a/p> <http://a/o o> .")
+    with pytest.raises(TurtleSyntaxError, match="ligne 51 "):
+        list(iter_triples_from(io.StringIO("\n".join(lines))))
@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import sys
+import time
+from bisect import bisect_left
+
+from reconcile import normalize_key
+
+# Index plein texte et à facettes des prix, écrit par le converter à côté du
+# Turtle (out.ttl -> out.search.json) : "quels prix parlent de radiation ?",
+# "lauréates par catégorie et par décennie" sans REGEX / CONTAINS sur tous les
+# littéraux du graphe, ni même chargement du graphe.
+#
+#   docs     : un document par prix (IRI du prix et du lauréat, nom, motivation,
+#              catégorie, année, genre, pays de naissance)
+#   terms    : mot normalisé (reconcile.normalize_key) -> documents, pour les
+#              motivations et les noms (lauréat et organisation)
+#   facets   : facette -> valeur normalisée -> documents
+#
+# Les listes de documents sont triées : une requête est une intersection de
+# listes (mots et facettes), un mot suivi de * cherche tous les mots qui
+# commencent ainsi ("radiat*").
+
+VERSION = 1
+SUFFIX = ".search.json"
+FACETS = ("category", "year", "decade", "gender", "country")
+
+
+def index_path(source):
+    return os.path.splitext(source)[0] + SUFFIX
+
+
+def tokens(text):
+    return normalize_key(text).split() if text else []
+
+
+def decade(year):
+    return f"{year[:3]}0" if len(year) == 4 and year.isdigit() else ""
+
+
+class SearchIndex:
+    def __init__(self):
+        self.docs = []
+        self.terms = {}
+        self.facets = {name: {} for name in FACETS}
+        self._awards = {}  # IRI du prix -> document (une ligne par affiliation)
+        self._vocabulary = None
+
+    # --- construction ---
+    def add(
+        self,
+        award,
+        laureate,
+        name,
+        motivation,
+        category,
+        year,
+        gender,
+        country,
+        organization="",
+    ):
+        if award in self._awards:
+            return self._awards[award]
+        doc = len(self.docs)
+        self._awards[award] = doc
+        self.docs.append(
+            {
+                "award": award,
+                "laureate": laureate,
+                "name": name,
+                "motivation": motivation,
+                "category": category,
+                "year": year,
+                "gender": gender,
+                "country": country,
+                "organization": organization,
+            }
+        )
+        words = set(tokens(name)) | set(tokens(motivation)) | set(tokens(organization))
+        for term in words:
+            self.terms.setdefault(term, []).append(doc)
+        values = {
+            "category": category,
+            "year": year,
+            "decade": decade(year),
+            "gender": gender,
+            "country": country,
+        }
+        for facet, value in values.items():
+            key = normalize_key(value) if value else ""
+            if key and key != "unknown":
+                self.facets[facet].setdefault(key, []).append(doc)
+        self._vocabulary = None
+        return doc
+
+    def add_frame(self, prepared):
+        """Documents des lignes d'un DataFrame issu de converter.prepare_frame."""
+        for r in prepared.itertuples(index=False):
+            if r.is_org:
+                name = r.firstname or r.surname
+            else:
+                name = f"{r.firstname} {r.surname}".strip()
+            motivation = "" if r.motivation == "unknown" else r.motivation
+            self.add(
+                str(r.award_uri),
+                str(r.laureate_uri),
+                name,
+                motivation,
+                r.category,
+                r.year,
+                r.gender.lower(),
+                "" if r.is_org else r.birth_label,
+                r.org_name,
+            )
+
+    # --- requêtes ---
+    def _postings(self, word):
+        key = normalize_key(word.rstrip("*"))
+        if not word.endswith("*"):
+            return set(self.terms.get(key, ()))
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.terms)
+        found = set()
+        i = bisect_left(self._vocabulary, key)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(key):
+            found.update(self.terms[self._vocabulary[i]])
+            i += 1
+        return found
+
+    def search(self, words=(), **facets):
+        """Documents (dans l'ordre du CSV) qui contiennent tous les mots et ont
+        toutes les valeurs de facettes demandées (category="Physics",
+        decade="1900", ...)."""
+        selected = None
+        for word in words:
+            for part in [word] if word.endswith("*") else tokens(word):
+                selected = self._intersect(selected, self._postings(part))
+        for facet, value in facets.items():
+            if value is None:
+                continue
+            if facet not in self.facets:
+                raise ValueError(f"facette inconnue : {facet} ({', '.join(FACETS)})")
+            postings = self.facets[facet].get(normalize_key(str(value)), ())
+            selected = self._intersect(selected, set(postings))
+        if selected is None:
+            selected = range(len(self.docs))
+        return [self.docs[i] for i in sorted(selected)]
+
+    @staticmethod
+    def _intersect(selected, postings):
+        return postings if selected is None else selected & postings
+
+    def counts(self, docs, *facets):
+        """{(valeur, ...): nombre de documents} pour une ou plusieurs facettes."""
+        result = {}
+        for doc in docs:
+            key = tuple(
+                decade(doc["year"]) if f == "decade" else doc[f] for f in facets
+            )
+            result[key] = result.get(key, 0) + 1
+        return dict(sorted(result.items()))
+
+    # --- fichier ---
+    def write(self, path):
+        data = {
+            "version": VERSION,
+            "docs": self.docs,
+            "terms": self.terms,
+            "facets": self.facets,
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != VERSION:
+            raise ValueError(f"{path} : version d'index inconnue")
+        index = cls()
+        index.docs = data["docs"]
+        index.terms = data["terms"]
+        index.facets = data["facets"]
+        index._awards = {doc["award"]: i for i, doc in enumerate(index.docs)}
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recherche dans l'index des prix (motivations, noms, facettes)"
+    )
+    parser.add_argument("words", nargs="*", help="mots cherchés (radiat* : préfixe)")
+    parser.add_argument("--index", default=index_path("out.ttl"))
+    for facet in FACETS:
+        parser.add_argument(f"--{facet}")
+    parser.add_argument(
+        "--count",
+        metavar="FACETTE[,FACETTE]",
+        help="nombre de prix par valeur de facette(s) au lieu de la liste",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = SearchIndex.load(args.index)
+    loaded = time.perf_counter()
+    try:
+        docs = index.search(args.words, **{f: getattr(args, f) for f in FACETS})
+    except ValueError as e:
+        sys.exit(str(e))
+    if args.count:
+        facets = args.count.split(",")
+        unknown = [f for f in facets if f not in FACETS]
+        if unknown:
+            sys.exit(f"facette inconnue : {', '.join(unknown)} ({', '.join(FACETS)})")
+        for key, n in index.counts(docs, *facets).items():
+            print("\t".join(value or "-" for value in key) + f"\t{n}")
+    else:
+        for doc in docs:
+            fields = ("year", "category", "name", "motivation")
+            print("\t".join(doc[f] for f in fields))
+    done = time.perf_counter()
+    print(
+        f"{len(docs)} prix sur {len(index.docs)} ; index chargé en "
+        f"{1000 * (loaded - start):.1f} ms, "
+        f"requête en {1000 * (done - loaded):.1f} ms",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
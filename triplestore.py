@@ -0,0 +1,208 @@
+from array import array
+
+import numpy as np
+
+from ttl_stream import iter_quads, iter_triples
+
+# Triple store compact : chaque terme (forme N-Triples) reçoit un identifiant
+# entier, et les triplets sont rangés dans trois index triés (SPO, POS, OSP)
+# stockés en tableaux numpy int64. Un motif (s, p, o) avec des positions
+# fixées se résout par recherche dichotomique dans l'index adapté.
+
+XSD_STRING = "^^<http://www.w3.org/2001/XMLSchema#string>"
+
+
+def normalize_term(term: str) -> str:
+    # RDF 1.1 : "x"^^xsd:string et "x" sont le même terme
+    if term.endswith(XSD_STRING) and term.startswith('"'):
+        return term[: -len(XSD_STRING)]
+    return term
+
+
+class TripleStore:
+    def __init__(self, normalize=True):
+        # normalize=False garde les termes tels quels (snapshots sans perte)
+        self.normalize = normalize
+        self.terms = []  # id -> terme N-Triples
+        self._ids = {}  # terme N-Triples -> id (reconstruit à la demande)
+        self._s = array("q")
+        self._p = array("q")
+        self._o = array("q")
+        self.spo = None
+        self._pos = self._osp = None
+        self._term_array = None
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = {term: i for i, term in enumerate(self.terms)}
+        return self._ids
+
+    # --- dictionnaire des termes ---
+    def encode(self, term: str) -> int:
+        if self.normalize:
+            term = normalize_term(term)
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            self.ids[term] = term_id
+            self.terms.append(term)
+        return term_id
+
+    def lookup(self, term: str):
+        """Identifiant d'un terme, ou None s'il n'apparaît pas dans le graphe."""
+        return self.ids.get(normalize_term(term) if self.normalize else term)
+
+    # --- chargement ---
+    def _unfreeze(self):
+        if self._s is None:  # store chargé d'un snapshot
+            self._s, self._p, self._o = (
+                array("q", np.asarray(c, dtype=np.int64).tobytes()) for c in self.spo
+            )
+
+    def add(self, s: str, p: str, o: str):
+        self._unfreeze()
+        self._s.append(self.encode(s))
+        self._p.append(self.encode(p))
+        self._o.append(self.encode(o))
+        self.spo = None
+
+    def add_ids(self, s, p, o):
+        self._unfreeze()
+        self._s.extend(s)
+        self._p.extend(p)
+        self._o.extend(o)
+        self.spo = None
+
+    def freeze(self):
+        """Construit les index triés (et supprime les triplets en double)."""
+        s, p, o = (np.array(c, dtype=np.int64) for c in (self._s, self._p, self._o))
+
+        order = np.lexsort((o, p, s))
+        s, p, o = s[order], p[order], o[order]
+        if len(s):
+            keep = np.ones(len(s), dtype=bool)
+            keep[1:] = (s[1:] != s[:-1]) | (p[1:] != p[:-1]) | (o[1:] != o[:-1])
+            s, p, o = s[keep], p[keep], o[keep]
+        self.spo = (s, p, o)
+        self._pos = self._osp = None
+
+        # les tableaux bruts ne servent plus : on repart des triplets dédupliqués
+        self._s, self._p, self._o = (array("q", c.tobytes()) for c in (s, p, o))
+        return self
+
+    @classmethod
+    def from_arrays(cls, terms, s, p, o, normalize=True):
+        """Store déjà trié SPO et dédupliqué (snapshot) : pas de re-tri, sauf
+        si la normalisation fusionne des termes ("x" et "x"^^xsd:string)."""
+        store = cls(normalize)
+        if normalize:
+            normalized = [normalize_term(t) for t in terms]
+            if normalized != terms:
+                ids = {}
+                remap = np.array([ids.setdefault(t, len(ids)) for t in normalized])
+                store.terms = list(ids)
+                store._ids = ids
+                store.add_ids(*(remap[np.asarray(c)] for c in (s, p, o)))
+                return store.freeze()
+        store.terms = terms
+        store._ids = None
+        store.spo = (s, p, o)
+        store._s = store._p = store._o = None
+        return store
+
+    # index secondaires, construits au premier motif qui en a besoin
+    @property
+    def pos(self):
+        if self._pos is None:
+            s, p, o = self.spo
+            order = np.lexsort((s, o, p))
+            self._pos = (p[order], o[order], s[order])
+        return self._pos
+
+    @property
+    def osp(self):
+        if self._osp is None:
+            s, p, o = self.spo
+            order = np.lexsort((p, s, o))
+            self._osp = (o[order], s[order], p[order])
+        return self._osp
+
+    def term_array(self):
+        """Tableau numpy (objets) id -> terme, pour décoder des colonnes d'id."""
+        if self._term_array is None or len(self._term_array) != len(self.terms):
+            self._term_array = np.array(self.terms, dtype=object)
+        return self._term_array
+
+    def __len__(self):
+        if self.spo is None:
+            self.freeze()
+        return len(self.spo[0])
+
+    # --- interrogation ---
+    @staticmethod
+    def _range(columns, keys):
+        lo, hi = 0, len(columns[0])
+        for column, key in zip(columns, keys):
+            sub = column[lo:hi]
+            lo, hi = (
+                lo + int(np.searchsorted(sub, key, "left")),
+                lo + int(np.searchsorted(sub, key, "right")),
+            )
+            if lo == hi:
+                break
+        return lo, hi
+
+    def _plan(self, s, p, o):
+        # (index, clés dans l'ordre de l'index, permutation vers s, p, o)
+        if s is not None:
+            if p is not None:
+                keys = (s, p) if o is None else (s, p, o)
+                return self.spo, keys, (0, 1, 2)
+            if o is not None:
+                return self.osp, (o, s), (1, 2, 0)
+            return self.spo, (s,), (0, 1, 2)
+        if p is not None:
+            return self.pos, (p,) if o is None else (p, o), (2, 0, 1)
+        if o is not None:
+            return self.osp, (o,), (1, 2, 0)
+        return self.spo, (), (0, 1, 2)
+
+    def match(self, s=None, p=None, o=None):
+        """Tableaux (S, P, O) des triplets qui correspondent au motif."""
+        if self.spo is None:
+            self.freeze()
+        index, keys, perm = self._plan(s, p, o)
+        lo, hi = self._range(index, keys)
+        return tuple(index[i][lo:hi] for i in perm)
+
+    def count(self, s=None, p=None, o=None):
+        if self.spo is None:
+            self.freeze()
+        index, keys, _ = self._plan(s, p, o)
+        lo, hi = self._range(index, keys)
+        return hi - lo
+
+    def triples(self):
+        """Tous les triplets, sous forme de termes N-Triples."""
+        if self.spo is None:
+            self.freeze()
+        terms = self.terms
+        for s, p, o in zip(*(c.tolist() for c in self.spo)):
+            yield terms[s], terms[p], terms[o]
+
+    @classmethod
+    def load(cls, path, normalize=True):
+        store = cls(normalize)
+        for s, p, o in iter_triples(path):
+            store.add(s, p, o)
+        return store.freeze()
+
+
+def load_named_graphs(path):
+    """Graphes nommés d'un fichier TriG : {iri: TripleStore}."""
+    stores = {}
+    for s, p, o, g in iter_quads(path):
+        if g is not None:
+            stores.setdefault(g[1:-1], TripleStore()).add(s, p, o)
+    return {iri: store.freeze() for iri, store in stores.items()}
@@ -0,0 +1,280 @@
+import re
+from urllib.parse import urljoin
+
+# Lecture en flux d'un fichier Turtle / N-Triples, sans construire de
+# rdflib.Graph. Les triplets sont produits un par un, chaque terme sous sa
+# forme N-Triples : "<iri>", "_:b0", '"texte"@en', '"1903"^^<...#gYear>'.
+# Couvre ce qu'écrivent rdflib et stream_writer.py (préfixes, ; et ,
+# littéraux longs, nœuds anonymes [ ... ]) et les blocs TriG "<g> { ... }"
+# dont chaque triplet se termine par "." ; pas les collections ( ).
+
+RDF_TYPE = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+_PN_CHARS = r"[\w\-:%]|\\[^\s]"
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+|\#[^\n]*)
+    |(?P<iri><(?:[^<>"{}|^`\\\s]|\\[^\s])*>)
+    |(?P<long>\"\"\"(?:[^"\\]|\\.|"(?!""))*\"\"\"|'''(?:[^'\\]|\\.|'(?!''))*''')
+    |(?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+    |(?P<lang>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)
+    |(?P<dt>\^\^)
+    |(?P<number>[+-]?(?:\d+\.?\d*[eE][+-]?\d+|\.\d+[eE][+-]?\d+|\d*\.\d+|\d+))
+    |(?P<bnode>_:(?:[\w\-]|\.(?=[\w\-]))+)
+    |(?P<pname>(?:[A-Za-z][\w\-.]*)?:(?:(?:%(pn)s)(?:(?:%(pn)s|\.)*(?:%(pn)s))?)?)
+    |(?P<punct>[;,.\[\](){}])
+    |(?P<word>[A-Za-z]+)
+    """
+    % {"pn": _PN_CHARS},
+    re.VERBOSE,
+)
+
+_ECHAR = {
+    "t": "\t",
+    "b": "\b",
+    "n": "\n",
+    "r": "\r",
+    "f": "\f",
+    '"': '"',
+    "'": "'",
+    "\\": "\\",
+}
+_ECHAR_RE = re.compile(r"\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))", re.S)
+_UCHAR_RE = re.compile(r"\\u([0-9A-Fa-f]{4})|\\U([0-9A-Fa-f]{8})")
+_NT_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_NT_ESCAPE_RE = re.compile(r'[\\"\n\r\t]')
+
+READ_SIZE = 1 << 16
+
+
+class TurtleSyntaxError(ValueError):
+    pass
+
+
+def unescape(value):
+    def repl(m):
+        if m.group(1) or m.group(2):
+            return chr(int(m.group(1) or m.group(2), 16))
+        return _ECHAR.get(m.group(3), m.group(3))
+
+    return _ECHAR_RE.sub(repl, value) if "\\" in value else value
+
+
+def unescape_iri(value):
+    # comme rdflib : seuls \uXXXX / \UXXXXXXXX sont décodés, les autres "\"
+    # (ex. <...Eugene_O\'Neill> écrit par rdflib) restent dans l'IRI
+    if "\\" not in value:
+        return value
+    return _UCHAR_RE.sub(lambda m: chr(int(m.group(1) or m.group(2), 16)), value)
+
+
+def nt_literal(value, lang=None, datatype=None):
+    lexical = '"' + _NT_ESCAPE_RE.sub(lambda m: _NT_ESCAPES[m.group()], value) + '"'
+    if lang:
+        return f"{lexical}@{lang}"
+    if datatype:
+        return f"{lexical}^^{datatype}"
+    return lexical
+
+
+def tokenize(f):
+    """Découpe le flux en (type, texte) sans jamais lire tout le fichier."""
+    buffer = ""
+    pos = 0
+    line = 1  # ligne du début du tampon, pour les messages d'erreur
+    eof = False
+    while True:
+        if not eof and len(buffer) - pos < READ_SIZE:
+            chunk = f.read(READ_SIZE)
+            line += buffer.count("\n", 0, pos)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            eof = not chunk
+        if pos >= len(buffer):
+            return
+        m = _TOKEN_RE.match(buffer, pos)
+        # un jeton qui touche la fin du tampon est peut-être incomplet
+        if (m is None or m.end() == len(buffer)) and not eof:
+            chunk = f.read(READ_SIZE)
+            if chunk:
+                line += buffer.count("\n", 0, pos)
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            eof = True
+            m = _TOKEN_RE.match(buffer, pos)
+        if m is None:
+            line += buffer.count("\n", 0, pos)
+            raise TurtleSyntaxError(
+                f"jeton invalide ligne {line} : {buffer[pos:pos + 40]!r}"
+            )
+        pos = m.end()
+        kind = m.lastgroup
+        if kind != "ws":
+            yield kind, m.group()
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.peeked = None
+        self.prefixes = {}
+        self.base = ""
+        self.bnodes = 0
+        self.pending = []
+
+    def next(self):
+        if self.peeked is not None:
+            tok, self.peeked = self.peeked, None
+            return tok
+        return next(self.tokens, (None, None))
+
+    def peek(self):
+        if self.peeked is None:
+            self.peeked = next(self.tokens, (None, None))
+        return self.peeked
+
+    def expect(self, text):
+        kind, value = self.next()
+        if value != text:
+            raise TurtleSyntaxError(f"attendu {text!r}, trouvé {value!r}")
+
+    def iri(self, kind, value):
+        if kind == "iri":
+            iri = unescape_iri(value[1:-1])
+            if self.base and ":" not in iri:
+                iri = urljoin(self.base, iri)
+            return f"<{iri}>"
+        if kind == "pname":
+            prefix, local = value.split(":", 1)
+            if prefix not in self.prefixes:
+                raise TurtleSyntaxError(f"préfixe inconnu : {prefix}:")
+            local = re.sub(r"\\(.)", r"\1", local)
+            return f"<{self.prefixes[prefix]}{local}>"
+        raise TurtleSyntaxError(f"IRI attendue, trouvé {value!r}")
+
+    def term(self, kind, value):
+        if kind in ("iri", "pname"):
+            return self.iri(kind, value)
+        if kind == "bnode":
+            return value
+        if kind in ("string", "long"):
+            q = 3 if kind == "long" else 1
+            text = unescape(value[q:-q])
+            nkind, nvalue = self.peek()
+            if nkind == "lang":
+                self.next()
+                return nt_literal(text, lang=nvalue[1:])
+            if nkind == "dt":
+                self.next()
+                return nt_literal(text, datatype=self.iri(*self.next()))
+            return nt_literal(text)
+        if kind == "number":
+            if "e" in value.lower():
+                dt = "double"
+            elif "." in value:
+                dt = "decimal"
+            else:
+                dt = "integer"
+            return nt_literal(value, datatype=f"<{XSD}{dt}>")
+        if kind == "word" and value in ("true", "false"):
+            return nt_literal(value, datatype=f"<{XSD}boolean>")
+        if value == "[":
+            self.bnodes += 1
+            node = f"_:sb{self.bnodes}"
+            if self.peek()[1] != "]":
+                self.predicate_objects(node, "]")
+            else:
+                self.next()
+            return node
+        raise TurtleSyntaxError(f"terme inattendu : {value!r}")
+
+    def predicate_objects(self, subject, end):
+        while True:
+            kind, value = self.next()
+            if value == end:
+                return
+            if (kind, value) == ("word", "a"):
+                predicate = RDF_TYPE
+            else:
+                predicate = self.iri(kind, value)
+            while True:
+                obj = self.term(*self.next())
+                self.pending.append((subject, predicate, obj))
+                kind, value = self.next()
+                if value == ",":
+                    continue
+                if value == ";":
+                    # ";" final autorisé avant "." ou "]"
+                    while self.peek()[1] == ";":
+                        self.next()
+                    if self.peek()[1] == end:
+                        self.next()
+                        return
+                    break
+                if value == end:
+                    return
+                raise TurtleSyntaxError(
+                    f"attendu ',' ';' ou {end!r}, trouvé {value!r}"
+                )
+
+    def triples(self):
+        for s, p, o, _ in self.quads():
+            yield s, p, o
+
+    def quads(self):
+        # graph : None pour le graphe par défaut, sinon "<iri>" du bloc TriG
+        graph = None
+        while True:
+            kind, value = self.next()
+            if kind is None:
+                return
+            if value == "}":
+                graph = None
+                continue
+            if value == "{":
+                continue
+            if kind == "word" and value.upper() == "GRAPH":
+                graph = self.iri(*self.next())
+                self.expect("{")
+                continue
+            if value in ("@prefix", "@base") or (
+                kind == "word" and value.upper() in ("PREFIX", "BASE")
+            ):
+                sparql_style = not value.startswith("@")
+                if value.lower().endswith("prefix"):
+                    _, ns = self.next()
+                    _, iri = self.next()
+                    self.prefixes[ns[:-1]] = self.iri("iri", iri)[1:-1]
+                else:
+                    _, iri = self.next()
+                    self.base = self.iri("iri", iri)[1:-1]
+                if not sparql_style:
+                    self.expect(".")
+                continue
+            subject = self.term(kind, value)
+            if self.peek()[1] == "{":  # TriG : "<g> { ... }"
+                self.next()
+                graph = subject
+                continue
+            self.predicate_objects(subject, ".")
+            for s, p, o in self.pending:
+                yield s, p, o, graph
+            self.pending.clear()
+
+
+def iter_triples(path):
+    """Triplets (s, p, o) d'un fichier Turtle ou N-Triples, en flux."""
+    with open(path, encoding="utf-8") as f:
+        yield from _Parser(tokenize(f)).triples()
+
+
+def iter_quads(path):
+    """Comme iter_triples, avec le graphe nommé des blocs TriG (ou None)."""
+    with open(path, encoding="utf-8") as f:
+        yield from _Parser(tokenize(f)).quads()
+
+
+def iter_triples_from(stream):
+    yield from _Parser(tokenize(stream)).triples()